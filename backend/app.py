@@ -47,9 +47,25 @@ def create_app():
     app.register_blueprint(chat_bp, url_prefix='/api/chat')
     app.register_blueprint(pooling_bp, url_prefix='/api/pooling')  # Add this line
     
+    # Background job keeping the precomputed area grid fresh
+    if Config.AREA_GRID_REFRESH_ENABLED:
+        from services.area_grid import start_area_grid_refresher
+        start_area_grid_refresher()
+    
     @app.route('/api/health')
     def health():
-        return {'status': 'healthy', 'service': 'GeoSense API'}
+        from utils.circuit_breaker import all_circuit_breakers
+        from services.upstream import latency_stats
+        from utils.cache import all_cache_stats
+        from services.model_registry import get_model_registry
+        return {
+            'status': 'healthy',
+            'service': 'GeoSense API',
+            'upstream_circuits': all_circuit_breakers(),
+            'upstream_latency': latency_stats(),
+            'caches': all_cache_stats(),
+            'models': get_model_registry().stats()
+        }
     
     # Test route for auth
     @app.route('/api/auth/test')
@@ -8,6 +8,14 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _project_path(value):
+    """Relative paths are taken from the project root, so the API (run from backend/) and scripts agree"""
+    return os.path.join(PROJECT_ROOT, value) if value and not os.path.isabs(value) else value
+
+
 class Config:
     """Application configuration"""
     
@@ -45,6 +53,77 @@ class Config:
     # Traffic Update Interval
     TRAFFIC_UPDATE_INTERVAL = int(os.getenv('TRAFFIC_UPDATE_INTERVAL', '300'))  # seconds
     
+    # Upstream resilience (circuit breaker + stale-cache fallback)
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))
+    CIRCUIT_RECOVERY_TIMEOUT = float(os.getenv('CIRCUIT_RECOVERY_TIMEOUT', '30'))  # seconds before a half-open probe
+    CIRCUIT_LATENCY_THRESHOLD = float(os.getenv('CIRCUIT_LATENCY_THRESHOLD', '5'))  # slower calls count as failures
+    STALE_CACHE_MAX_ENTRIES = int(os.getenv('STALE_CACHE_MAX_ENTRIES', '1000'))
+    STALE_CACHE_TTL = int(os.getenv('STALE_CACHE_TTL', '3600'))  # seconds
+    STALE_CACHE_MAX_BYTES = int(os.getenv('STALE_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))  # 0 = entry limit only
+    
+    # Upstream latency control (adaptive timeouts, hedged requests, rate limits)
+    UPSTREAM_HEDGING_ENABLED = os.getenv('UPSTREAM_HEDGING_ENABLED', 'True').lower() == 'true'
+    UPSTREAM_LATENCY_WINDOW = int(os.getenv('UPSTREAM_LATENCY_WINDOW', '256'))  # samples per endpoint
+    UPSTREAM_MIN_SAMPLES = int(os.getenv('UPSTREAM_MIN_SAMPLES', '20'))  # before timeouts adapt / hedging starts
+    UPSTREAM_MIN_TIMEOUT = float(os.getenv('UPSTREAM_MIN_TIMEOUT', '0.5'))  # seconds
+    UPSTREAM_TIMEOUT_MULTIPLIER = float(os.getenv('UPSTREAM_TIMEOUT_MULTIPLIER', '3'))  # x observed p99
+    UPSTREAM_RATE_LIMIT = float(os.getenv('UPSTREAM_RATE_LIMIT', '20'))  # requests/sec per endpoint
+    UPSTREAM_RATE_BURST = int(os.getenv('UPSTREAM_RATE_BURST', '40'))
+    UPSTREAM_RATE_MAX_WAIT = float(os.getenv('UPSTREAM_RATE_MAX_WAIT', '1'))  # seconds
+    UPSTREAM_MAX_WORKERS = int(os.getenv('UPSTREAM_MAX_WORKERS', '16'))
+    
+    # Local POI store
+    POI_CELL_SIZE_DEG = float(os.getenv('POI_CELL_SIZE_DEG', '0.01'))  # ~1.1 km grid cells
+    POI_REFRESH_HORIZON = int(os.getenv('POI_REFRESH_HORIZON', '86400'))  # seconds before a cell is re-fetched
+    POI_IMPORT_PATH = os.getenv('POI_IMPORT_PATH', '')  # optional CSV: name,lat,lon,category,address
+    POI_STORE_PERSIST = os.getenv('POI_STORE_PERSIST', 'False').lower() == 'true'  # mirror into MongoDB
+    POI_STORE_MAX_POIS = int(os.getenv('POI_STORE_MAX_POIS', '200000'))  # least recently filled cells dropped beyond this
+    POI_STORE_MAX_FETCHED = int(os.getenv('POI_STORE_MAX_FETCHED', '100000'))  # (cell, category) fetch stamps kept
+    
+    # Offline gazetteer
+    GAZETTEER_PATH = os.getenv('GAZETTEER_PATH', '')  # optional CSV: name,lat,lon,address,type,aliases,popularity
+    GAZETTEER_MAX_LEARNED = int(os.getenv('GAZETTEER_MAX_LEARNED', '50000'))  # places remembered from upstream answers, 0 = unbounded
+    
+    # Autocomplete
+    AUTOCOMPLETE_QUERY_LOG = os.getenv('AUTOCOMPLETE_QUERY_LOG', '')  # optional file, one resolved query per line
+    
+    # Local reverse geocoding
+    REVERSE_GEOCODE_PATH = os.getenv('REVERSE_GEOCODE_PATH', '')  # optional CSV: lat,lon,address
+    REVERSE_GEOCODE_MAX_DISTANCE = float(os.getenv('REVERSE_GEOCODE_MAX_DISTANCE', '25'))  # meters
+    
+    # Response caches (bounded LRU; set CACHE_BACKEND_URL=redis://... to share across workers)
+    CACHE_BACKEND_URL = os.getenv('CACHE_BACKEND_URL', '')
+    POI_CACHE_MAX_ENTRIES = int(os.getenv('POI_CACHE_MAX_ENTRIES', '2000'))
+    ASSISTANT_CACHE_MAX_ENTRIES = int(os.getenv('ASSISTANT_CACHE_MAX_ENTRIES', '5000'))
+    ASSISTANT_CACHE_MAX_BYTES = int(os.getenv('ASSISTANT_CACHE_MAX_BYTES', str(16 * 1024 * 1024)))
+    CHAT_STREAM_WORKERS = int(os.getenv('CHAT_STREAM_WORKERS', '8'))  # concurrent lookups for streamed chat replies
+    
+    # Insights data gathering
+    INSIGHTS_FETCH_DEADLINE = float(os.getenv('INSIGHTS_FETCH_DEADLINE', '8'))  # seconds shared by a handler's upstream calls
+    SERVICE_AREA_BOUNDS = os.getenv('SERVICE_AREA_BOUNDS', '28.40,76.84,28.88,77.35')  # min_lat,min_lon,max_lat,max_lon
+    AREA_GRID_CELL_DEG = float(os.getenv('AREA_GRID_CELL_DEG', '0.01'))  # ~1.1 km cells
+    AREA_GRID_MAX_AGE = int(os.getenv('AREA_GRID_MAX_AGE', '86400'))  # seconds before a cell is recomputed
+    AREA_GRID_PATH = _project_path(os.getenv('AREA_GRID_PATH', ''))  # .npz file the grid is loaded from / saved to
+    AREA_GRID_REFRESH_ENABLED = os.getenv('AREA_GRID_REFRESH_ENABLED', 'False').lower() == 'true'
+    AREA_GRID_REFRESH_INTERVAL = int(os.getenv('AREA_GRID_REFRESH_INTERVAL', '300'))  # seconds between refresh batches
+    AREA_GRID_BATCH_SIZE = int(os.getenv('AREA_GRID_BATCH_SIZE', '25'))  # stalest cells recomputed per batch
+    INSIGHTS_BATCH_MAX_POINTS = int(os.getenv('INSIGHTS_BATCH_MAX_POINTS', '10000'))  # points (or bbox samples) per batch request
+    INSIGHTS_BATCH_MAX_FETCH = int(os.getenv('INSIGHTS_BATCH_MAX_FETCH', '20'))  # missing cells fetched live per batch request
+    TRAFFIC_HUB_INTERVAL = int(os.getenv('TRAFFIC_HUB_INTERVAL', '60'))  # seconds between polls of subscribed cells
+    TRAFFIC_HUB_MAX_CELLS = int(os.getenv('TRAFFIC_HUB_MAX_CELLS', '50'))  # cells per subscription
+    TRAFFIC_HUB_QUEUE_SIZE = int(os.getenv('TRAFFIC_HUB_QUEUE_SIZE', '100'))  # pending events per subscriber before dropping oldest
+    TRAFFIC_HUB_KEEPALIVE = int(os.getenv('TRAFFIC_HUB_KEEPALIVE', '15'))  # seconds between keepalive comments on idle streams
+    
     # Real-time Mode Settings
     USE_REALTIME_DATA = os.getenv('USE_REALTIME_DATA', 'True').lower() == 'true'
-    USE_ML_PREDICTIONS = os.getenv('USE_ML_PREDICTIONS', 'False').lower() == 'true'
\ No newline at end of file
+    USE_ML_PREDICTIONS = os.getenv('USE_ML_PREDICTIONS', 'False').lower() == 'true'
+    
+    # Model artifacts
+    MODEL_DIR = os.getenv('MODEL_DIR', os.path.join(PROJECT_ROOT, 'ml_models', 'saved_models', 'core_models'))
+    MODEL_NAME = os.getenv('MODEL_NAME', 'traffic_rf_core')  # artifact names inside MODEL_DIR
+    SCALER_NAME = os.getenv('SCALER_NAME', 'traffic_scaler_core')
+    MODEL_POINTER = os.getenv('MODEL_POINTER', 'current.json')  # names the version to serve; written by the trainer
+    MODEL_RELOAD_INTERVAL = int(os.getenv('MODEL_RELOAD_INTERVAL', '30'))  # seconds between pointer checks, 0 disables
+    PREDICTION_CACHE_MAX_ENTRIES = int(os.getenv('PREDICTION_CACHE_MAX_ENTRIES', '50000'))  # memoized single-row predictions, 0 disables
+    PREDICTION_CACHE_CELL_DEG = float(os.getenv('PREDICTION_CACHE_CELL_DEG', '0.01'))  # lat/lon step of the memo key
+    CONGESTION_TENSOR_PATH = _project_path(os.getenv('CONGESTION_TENSOR_PATH', 'data/processed/congestion_how.npy'))  # cells x 168 hours, built nightly
@@ -26,10 +26,11 @@ class POI(db.Document):
     location = db.PointField(required=True)
     category = db.StringField(required=True)
     metadata = db.DictField()
+    place_key = db.StringField()  # normalized name + rounded coordinates of upstream POIs
     
     meta = {
         'collection': 'pois',
-        'indexes': ['location', 'category']
+        'indexes': ['location', 'category', {'fields': ['place_key'], 'unique': True, 'sparse': True}]
     }
 
 class Route(db.Document):
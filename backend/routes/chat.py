@@ -1,16 +1,31 @@
-from flask import Blueprint, request, jsonify, current_app
-import re
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
+import json
 import requests
 import os
-import time
-
-# Simple in-memory cache for POIs and assistant responses to improve responsiveness
-POI_CACHE = {}
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+from services.upstream import fetch_json, get_executor
+from services.poi_store import get_poi_store, record_from_tomtom, persist_pois
+from services.gazetteer import get_gazetteer
+from services.autocomplete import get_autocomplete_index
+from services.reverse_geocoder import get_reverse_geocoder
+from services.chat_intents import scan, classify, intent_cache_key, intent_ttl
+from utils.cache import get_cache
+from config import Config
+
+# Bounded LRU caches for POIs and assistant responses to improve responsiveness
 POI_CACHE_TTL = 60 * 10  # 10 minutes
+POI_CACHE = get_cache('chat.poi', max_entries=Config.POI_CACHE_MAX_ENTRIES, ttl=POI_CACHE_TTL)
+POI_SEARCH_RADIUS_M = 2000
+POI_SEARCH_DEADLINE = 4  # seconds shared by all keyword searches
+NEARBY_SEARCH_RADIUS_M = 5000
+POI_WARM_LIMIT = 50  # results requested when filling cold POI store cells
+AUTOCOMPLETE_MIN_LOCAL_HITS = 3  # fewer local suggestions than this -> ask TomTom
 
 # Cache assistant replies (message+coords) to avoid repeated LLM calls
-ASSISTANT_CACHE = {}
 ASSISTANT_CACHE_TTL = 60 * 60  # 1 hour
+ASSISTANT_CACHE = get_cache('chat.assistant', max_entries=Config.ASSISTANT_CACHE_MAX_ENTRIES,
+                            max_bytes=Config.ASSISTANT_CACHE_MAX_BYTES or None, ttl=ASSISTANT_CACHE_TTL)
 
 try:
     import openai
@@ -19,6 +34,9 @@ except Exception:
 
 chat_bp = Blueprint('chat', __name__)
 
+_STREAM_EXECUTOR = None
+_STREAM_EXECUTOR_LOCK = threading.Lock()
+
 # key helpers
 
 def _cache_key_for_coords(lat, lng, precision=3):
@@ -28,17 +46,20 @@ def _cache_key_for_coords(lat, lng, precision=3):
 
 def geocode_destination(query, tomtom_key):
     """Geocode a free-form query to lat/lon using TomTom Geocoding API."""
+    place = get_gazetteer().lookup(query)
+    if place:
+        get_autocomplete_index().record_query(place['name'])
+        return {'lat': place['lat'], 'lng': place['lon']}
     try:
         url = f"https://api.tomtom.com/search/2/geocode/{requests.utils.requote_uri(query)}.json"
         # Bias geocoding results to India to avoid US defaults when ambiguous
         params = {'key': tomtom_key, 'limit': 1, 'countrySet': 'IN'}
-        resp = requests.get(url, params=params, timeout=8)
-        if resp.ok:
-            j = resp.json()
-            results = j.get('results') or []
-            if results:
-                pos = results[0].get('position') or {}
-                return {'lat': pos.get('lat'), 'lng': pos.get('lon')}
+        j, _ = fetch_json('tomtom.geocode', url, params, timeout=8, hedge=True)
+        results = j.get('results') or []
+        if results:
+            pos = results[0].get('position') or {}
+            _remember_place(query, results[0])
+            return {'lat': pos.get('lat'), 'lng': pos.get('lon')}
     except Exception:
         current_app.logger.exception('TomTom geocode failed')
     return None
@@ -50,56 +71,79 @@ def tomtom_poi_search(lat, lng, tomtom_key, limit=6):
         return []
     # Cache lookup: quantize coords to reduce cardinality
     cache_key = _cache_key_for_coords(lat, lng, precision=3)
-    now = time.time()
     cached = POI_CACHE.get(cache_key)
-    if cached and now - cached.get('ts', 0) < POI_CACHE_TTL:
-        return cached.get('pois', [])[:limit]
+    if cached is not None:
+        return cached[:limit]
 
     # Use a smaller, focused set of keywords for speed and relevance
     keywords = ['park', 'viewpoint', 'museum', 'landmark']
     pois = []
     seen = set()
-    for kw in keywords:
-        try:
-            url = f"https://api.tomtom.com/search/2/poiSearch/{requests.utils.requote_uri(kw)}.json"
-            # smaller radius and shorter timeout to keep requests snappy
-            # Bias POI search to India (useful when coordinates near border or ambiguous)
-            params = {'key': tomtom_key, 'lat': lat, 'lon': lng, 'limit': limit, 'radius': 2000, 'countrySet': 'IN'}
-            resp = requests.get(url, params=params, timeout=4)
-            if not resp.ok:
+    timed_out = False
+    # Issue every keyword search at once under one shared deadline; merge as they land
+    logger = current_app.logger
+    executor = get_executor()
+    futures = [executor.submit(_keyword_pois, lat, lng, kw, tomtom_key, limit, logger) for kw in keywords]
+    try:
+        for future in as_completed(futures, timeout=POI_SEARCH_DEADLINE):
+            try:
+                records = future.result()
+            except Exception:
+                logger.exception('POI keyword search failed')
                 continue
-            j = resp.json()
-            results = j.get('results') or j.get('pois') or []
-            for r in results:
-                # TomTom returns different shapes; try common keys
-                name = None
-                if isinstance(r.get('poi', {}), dict):
-                    name = r.get('poi', {}).get('name')
-                name = name or r.get('name') or (r.get('address') or {}).get('freeformAddress')
-                pos = r.get('position') or {'lat': r.get('lat'), 'lon': r.get('lon')}
-                if not name or not pos:
-                    continue
-                key = f"{name}|{pos.get('lat')}|{pos.get('lon')}"
+            for record in records:
+                name = record['name']
+                key = f"{name}|{record['latitude']}|{record['longitude']}"
                 if key in seen:
                     continue
                 seen.add(key)
                 pois.append({
                     'name': name,
-                    'category': r.get('poi', {}).get('categories', []) if r.get('poi') else [],
-                    'position': {'lat': pos.get('lat'), 'lng': pos.get('lon')}
+                    'category': record.get('categories', []),
+                    'position': {'lat': record['latitude'], 'lng': record['longitude']}
                 })
                 if len(pois) >= limit:
-                    # cache and return
-                    POI_CACHE[cache_key] = {'ts': now, 'pois': pois}
-                    return pois
-        except Exception:
-            current_app.logger.exception('TomTom POI search failed for keyword %s', kw)
-            continue
-    # cache results before returning
-    POI_CACHE[cache_key] = {'ts': now, 'pois': pois}
+                    break
+            if len(pois) >= limit:
+                break
+    except FuturesTimeout:
+        timed_out = True
+        logger.warning('POI search deadline reached with %d results', len(pois))
+    finally:
+        # Searches that have not started yet are dropped; running ones finish in the background
+        for future in futures:
+            future.cancel()
+    # cache complete results before returning (a partial answer is not worth keeping)
+    if not timed_out:
+        POI_CACHE.set(cache_key, pois)
     return pois
 
-    # store handled below (note: unreachable here if returned earlier)
+
+def _keyword_pois(lat, lng, kw, tomtom_key, limit, logger):
+    """POIs for one tourist keyword, from the local store unless its cells are cold"""
+    store = get_poi_store()
+    cold = store.cold_cells(lat, lng, POI_SEARCH_RADIUS_M, kw)
+    if cold:
+        try:
+            center_lat, center_lon, radius = store.covering_circle(cold)
+            url = f"https://api.tomtom.com/search/2/poiSearch/{requests.utils.requote_uri(kw)}.json"
+            # smaller radius and shorter timeout to keep requests snappy
+            # Bias POI search to India (useful when coordinates near border or ambiguous)
+            # warm the cells with a fuller page than a single answer needs
+            params = {'key': tomtom_key, 'lat': center_lat, 'lon': center_lon, 'limit': max(limit, POI_WARM_LIMIT),
+                      'radius': int(radius) + 1, 'countrySet': 'IN'}
+            j, _ = fetch_json('tomtom.search', url, params, timeout=4)
+            results = j.get('results') or j.get('pois') or []
+            records = [r for r in (record_from_tomtom(res) for res in results)
+                       if r['name'] and r['latitude'] is not None and r['longitude'] is not None]
+            store.add_many(records, tags=[kw])
+            # a page cut off at the limit only covers out to its farthest result
+            truncated = len(results) >= params['limit']
+            store.mark_fetched(store.covered_cells(cold, center_lat, center_lon, records, truncated), kw)
+            persist_pois(records)
+        except Exception:
+            logger.exception('TomTom POI search failed for keyword %s', kw)
+    return store.query(lat, lng, POI_SEARCH_RADIUS_M, kw, limit=limit)
 
 
 def call_openai(system_prompt, user_message, nearby_pois, openai_key):
@@ -139,55 +183,105 @@ def _tomtom_key():
     return current_app.config.get('TOMTOM_API_KEY')
 
 
+def _remember_place(query, result):
+    """Add an upstream search/geocode result to the gazetteer under the query text"""
+    pos = result.get('position') or {}
+    address = (result.get('address') or {}).get('freeformAddress', '')
+    name = (result.get('poi') or {}).get('name') or address
+    get_gazetteer().add(name, pos.get('lat'), pos.get('lon'), address=address,
+                        place_type=result.get('type', ''), aliases=[query], popularity=1, learned=True)
+    get_autocomplete_index().record_query(name)
+
+
 def search_place(query, tomtom_key):
     if not tomtom_key or not query:
         return None
+    place = get_gazetteer().lookup(query)
+    if place:
+        get_autocomplete_index().record_query(place['name'])
+        # Same shape as a TomTom search result
+        return {
+            'type': place['type'],
+            'position': {'lat': place['lat'], 'lon': place['lon']},
+            'address': {'freeformAddress': place['address']}
+        }
     try:
         url = f"https://api.tomtom.com/search/2/search/{requests.utils.requote_uri(query)}.json"
         # Bias search to India to return Indian results for ambiguous place names
         params = {'key': tomtom_key, 'limit': 1, 'countrySet': 'IN'}
-        resp = requests.get(url, params=params, timeout=4)
-        if resp.ok:
-            j = resp.json()
-            results = j.get('results') or []
-            if results:
-                return results[0]
+        j, _ = fetch_json('tomtom.search', url, params, timeout=4, hedge=True)
+        results = j.get('results') or []
+        if results:
+            _remember_place(query, results[0])
+            return results[0]
     except Exception:
         current_app.logger.exception('TomTom search failed for %s', query)
     return None
 
 
+def _local_suggestion(entry):
+    """Shape a local autocomplete entry like a TomTom result"""
+    return {
+        'type': 'local',
+        'poi': {'name': entry['name']},
+        'address': {'freeformAddress': entry['address']},
+        'position': {'lat': entry['lat'], 'lon': entry['lon']}
+    }
+
+
 def autocomplete_place(prefix, tomtom_key, limit=5):
     if not tomtom_key or not prefix:
         return []
+    index = get_autocomplete_index()
+    local = [_local_suggestion(e) for e in index.suggest(prefix, limit)]
+    # Only consult TomTom for prefixes with too few local hits
+    if len(local) >= min(limit, AUTOCOMPLETE_MIN_LOCAL_HITS):
+        return local
     try:
         url = f"https://api.tomtom.com/search/2/autocomplete/{requests.utils.requote_uri(prefix)}.json"
         # Bias autocomplete to India
         params = {'key': tomtom_key, 'limit': limit, 'countrySet': 'IN'}
-        resp = requests.get(url, params=params, timeout=3)
-        if resp.ok:
-            j = resp.json()
-            return j.get('results') or []
+        j, _ = fetch_json('tomtom.autocomplete', url, params, timeout=3, hedge=True)
+        results = j.get('results') or []
+        seen = {(s['address']['freeformAddress'] or '').lower() for s in local}
+        for r in results:
+            address = (r.get('address') or {}).get('freeformAddress') or (r.get('poi') or {}).get('name')
+            if address:
+                pos = r.get('position') or {}
+                index.add(address, pos.get('lat'), pos.get('lon'), address)
+            if len(local) < limit and (address or '').lower() not in seen:
+                seen.add((address or '').lower())
+                local.append(r)
+        return local
     except Exception:
         current_app.logger.exception('TomTom autocomplete failed for %s', prefix)
-    return []
+    return local
 
 
 def reverse_geocode(lat, lng, tomtom_key):
     if not tomtom_key:
         return None
+    geocoder = get_reverse_geocoder()
+    local = geocoder.nearest(lat, lng)
+    if local:
+        return local[0]
     try:
         url = f"https://api.tomtom.com/search/2/reverseGeocode/{lat},{lng}.json"
         params = {'key': tomtom_key, 'limit': 1}
-        resp = requests.get(url, params=params, timeout=4)
-        if resp.ok:
-            j = resp.json()
-            results = j.get('addresses') or j.get('results') or []
-            if results:
-                addr = results[0]
-                # TomTom returns address object in different keys; try common ones
-                freeform = addr.get('address', {}).get('freeformAddress') or addr.get('address', {})
-                return freeform
+        j, _ = fetch_json('tomtom.reverse_geocode', url, params, timeout=4, hedge=True)
+        results = j.get('addresses') or j.get('results') or []
+        if results:
+            addr = results[0]
+            # TomTom returns address object in different keys; try common ones
+            freeform = addr.get('address', {}).get('freeformAddress') or addr.get('address', {})
+            if isinstance(freeform, str):
+                # Learn the answer for the asked coordinate and the address point itself
+                geocoder.add(lat, lng, freeform)
+                point = addr.get('position')
+                if isinstance(point, str) and ',' in point:
+                    plat, plon = point.split(',', 1)
+                    geocoder.add(plat, plon, freeform)
+            return freeform
     except Exception:
         current_app.logger.exception('TomTom reverse geocode failed')
     return None
@@ -199,9 +293,8 @@ def get_route(slat, slon, dlat, dlon, tomtom_key):
     try:
         url = f"https://api.tomtom.com/routing/1/calculateRoute/{slat},{slon}:{dlat},{dlon}/json"
         params = {'key': tomtom_key, 'routeType': 'fast', 'language': 'en-US', 'computeTravelTimeFor': 'all'}
-        resp = requests.get(url, params=params, timeout=6)
-        if resp.ok:
-            return resp.json()
+        route, _ = fetch_json('tomtom.routing', url, params, timeout=6, hedge=True)
+        return route
     except Exception:
         current_app.logger.exception('TomTom routing failed')
     return None
@@ -210,17 +303,27 @@ def get_route(slat, slon, dlat, dlon, tomtom_key):
 def nearby_search(lat, lng, query, tomtom_key, limit=6):
     if not tomtom_key:
         return []
+    store = get_poi_store()
+    cold = store.cold_cells(lat, lng, NEARBY_SEARCH_RADIUS_M, query)
+    if not cold:
+        return store.query(lat, lng, NEARBY_SEARCH_RADIUS_M, query, limit=limit)
     try:
         url = f"https://api.tomtom.com/search/2/nearbySearch/.json"
         # nearby search anchored to provided coords; also restrict to India
-        params = {'key': tomtom_key, 'lat': lat, 'lon': lng, 'query': query, 'limit': limit, 'countrySet': 'IN'}
-        resp = requests.get(url, params=params, timeout=4)
-        if resp.ok:
-            j = resp.json()
-            return j.get('results') or []
+        params = {'key': tomtom_key, 'lat': lat, 'lon': lng, 'query': query, 'limit': max(limit, POI_WARM_LIMIT),
+                  'radius': NEARBY_SEARCH_RADIUS_M, 'countrySet': 'IN'}
+        j, _ = fetch_json('tomtom.search', url, params, timeout=4)
+        results = j.get('results') or []
+        records = [r for r in (record_from_tomtom(res) for res in results)
+                   if r['name'] and r['latitude'] is not None and r['longitude'] is not None]
+        store.add_many(records, tags=[query])
+        truncated = len(results) >= params['limit']
+        store.mark_fetched(store.covered_cells(cold, lat, lng, records, truncated), query)
+        persist_pois(records)
+        return results[:limit]
     except Exception:
         current_app.logger.exception('TomTom nearby search failed')
-    return []
+    return store.query(lat, lng, NEARBY_SEARCH_RADIUS_M, query, limit=limit)
 
 
 def traffic_info(lat, lng, tomtom_key):
@@ -230,11 +333,9 @@ def traffic_info(lat, lng, tomtom_key):
     try:
         url = f"https://api.tomtom.com/traffic/services/4/flowSegmentData/absolute/10/json"
         params = {'point': f"{lat},{lng}", 'unit': 'KMPH', 'key': tomtom_key}
-        resp = requests.get(url, params=params, timeout=4)
-        if resp.ok:
-            j = resp.json()
-            flow = j.get('flowSegmentData') or {}
-            return flow
+        j, _ = fetch_json('tomtom.traffic_flow', url, params, timeout=4, hedge=True)
+        flow = j.get('flowSegmentData') or {}
+        return flow
     except Exception:
         current_app.logger.exception('TomTom traffic call failed')
     return None
@@ -242,7 +343,13 @@ def traffic_info(lat, lng, tomtom_key):
 
 @chat_bp.route('/', methods=['POST'])
 def chat():
-    """Handle chatbot requests. Expects JSON { message: str, destination: {lat, lng} or destination: 'place name' (optional) }"""
+    """
+    Handle chatbot requests. Expects JSON { message: str, destination: {lat, lng} or destination: 'place name' (optional) }
+
+    With "stream": true in the body (or Accept: text/event-stream) the reply is sent as
+    server-sent events: `assistant` as soon as the answer is ready, `route` / `traffic`
+    with it, `nearby_pois` when the POI search finishes, then `done`.
+    """
     data = request.get_json() or {}
     message = (data.get('message') or '').strip()
     destination = data.get('destination')  # could be dict or string
@@ -251,10 +358,7 @@ def chat():
         return jsonify({'error': 'Message is required'}), 400
 
     tomtom_key = current_app.config.get('TOMTOM_API_KEY')
-    openai_key = current_app.config.get('OPENAI_API_KEY')
-    gemini_key = current_app.config.get('GEMINI_API_KEY')
-
-    pois = []
+    stream = bool(data.get('stream')) or request.accept_mimetypes.best == 'text/event-stream'
 
     # Resolve destination to coordinates if provided as string
     coords = None
@@ -266,24 +370,43 @@ def chat():
         if lat is not None and lng is not None:
             coords = {'lat': lat, 'lng': lng}
 
+    if stream:
+        return _stream_chat(message, destination, coords, tomtom_key)
+
     # If we have coordinates, fetch nearby POIs
+    pois = []
     if coords and tomtom_key:
         pois = tomtom_poi_search(coords['lat'], coords['lng'], tomtom_key, limit=6)
 
-    # System prompt guiding behavior — be conversational, ask clarifying questions, and include geography/history
-    system_prompt = (
-        "You are GeoSense Assistant — a friendly, conversational travel and routing assistant. "
-        "Speak kindly and clearly, ask concise clarifying questions when user intent or location is ambiguous, and give practical, actionable advice. "
-        "When recommending places include a brief safety tip, routing considerations (construction, traffic, VIP or ambulance priorities), and a short historical or geographic fact when relevant. "
-        "Occasionally include a short 'Did you know?' fact to make the suggestions engaging. Keep responses helpful, empathetic, and concise (aim for 3-6 sentences unless user asks for more)."
-    )
+    text, extra = _chat_answer(message, destination, coords)
+    payload = {'assistant': text, 'nearby_pois': pois, 'coords': coords}
+    if extra:
+        payload.update(extra)
+    return jsonify(payload), 200
+
 
-    # Lightweight intent detection: if the user asks to reach somewhere or requests safest routes
-    travel_intents = ['reach', 'get to', 'safest', 'safe route', 'route', 'reach here', 'reach there', 'how to get', 'need to reach', 'need to get']
-    safety_keywords = ['safe', 'safety', 'rain', 'flood', 'construction', 'blocked', 'ambulance', 'vip']
-    text_lower = message.lower()
-    wants_travel = any(tok in text_lower for tok in travel_intents)
-    mentions_safety = any(tok in text_lower for tok in safety_keywords)
+def _chat_answer(message, destination, coords):
+    """Assistant text and extra payload (route / traffic) for a message, from cache when possible"""
+    immediate, intent, cache_key = _prepare_answer(message, coords)
+    if immediate is not None:
+        return immediate
+    text, extra = _answer_intent(intent, destination, coords, _tomtom_key())
+    _cache_answer(cache_key, intent, text, extra)
+    return text, extra
+
+
+def _prepare_answer(message, coords):
+    """
+    The part of answering that needs no upstream call
+
+    Returns (immediate, intent, cache key): immediate is (text, extra) for a
+    clarifying question or a cached answer, else None and the intent still
+    has to be answered.
+    """
+    # Lightweight intent detection: one scan finds every keyword class in the message
+    matches = scan(message)
+    wants_travel = 'travel' in matches
+    mentions_safety = 'safety' in matches
 
     # If user clearly wants routing advice but no coordinates/destination provided, ask a clarifying question
     if wants_travel and not coords:
@@ -295,62 +418,59 @@ def chat():
                 "I can help you find the safest route — could you give me the destination (place name or address) and your mode of travel? "
                 "Also tell me if you need ambulance-aware routing or want to avoid flooded/under-construction roads."
             )
-        return jsonify({'assistant': clarifying, 'nearby_pois': pois, 'coords': coords}), 200
+        return (clarifying, None), None, None
+
+    # Check assistant cache: keyed on the canonical intent so rephrasings share an entry
+    intent = classify(message, matches)
+    try:
+        assistant_cache_key = intent_cache_key(intent, coords)
+    except Exception:
+        current_app.logger.exception('Failed to build assistant cache key')
+        assistant_cache_key = None
+    cached_assistant = ASSISTANT_CACHE.get(assistant_cache_key) if assistant_cache_key else None
+    if cached_assistant is not None:
+        return (cached_assistant['text'], cached_assistant.get('extra')), intent, assistant_cache_key
+    return None, intent, assistant_cache_key
 
-    assistant_text = None
 
-    # Check assistant cache to avoid repeated LLM calls for same message+coords
+def _cache_answer(cache_key, intent, text, extra):
     try:
-        cache_coords_part = _cache_key_for_coords(coords['lat'], coords['lng']) if coords else 'no_coords'
+        if cache_key:
+            ASSISTANT_CACHE.set(cache_key, {'text': text, 'extra': extra}, ttl=intent_ttl(intent))
     except Exception:
-        cache_coords_part = 'no_coords'
-    assistant_cache_key = f"{message}|{cache_coords_part}"
-    cached_assistant = ASSISTANT_CACHE.get(assistant_cache_key)
-    if cached_assistant and time.time() - cached_assistant.get('ts', 0) < ASSISTANT_CACHE_TTL:
-        return jsonify({'assistant': cached_assistant.get('text'), 'nearby_pois': pois, 'coords': coords}), 200
-
-    # ----------------------------
-    # TomTom-only intent handling (no LLM)
-    # ----------------------------
-    tomtom_key = _tomtom_key()
-
-    # helper to respond and cache
-    def respond(text, extra=None):
-        try:
-            ASSISTANT_CACHE[assistant_cache_key] = {'ts': time.time(), 'text': text}
-        except Exception:
-            current_app.logger.exception('Failed to write assistant cache')
-        payload = {'assistant': text, 'nearby_pois': pois, 'coords': coords}
-        if extra:
-            payload.update(extra)
-        return jsonify(payload), 200
+        current_app.logger.exception('Failed to write assistant cache')
 
-    text_lower = message.lower()
+
+def _lookup_notice(intent):
+    """Text to send while a route / traffic lookup runs, or None for intents answered in one step"""
+    if intent['type'] == 'route' and intent['slots']:
+        return f"Looking up the route to {intent['slots']['dst']}…"
+    if intent['type'] == 'traffic':
+        return 'Checking the current traffic…'
+    return None
+
+
+def _answer_intent(intent, destination, coords, tomtom_key):
+    """TomTom-only intent handling (no LLM); returns (text, extra payload or None)"""
+    slots = intent['slots']
 
     # 1) Route / Distance intent
-    if any(k in text_lower for k in ['route', 'distance', 'how to go', 'how do i get', 'directions']):
-        # try to parse "from A to B"
+    if intent['type'] == 'route':
+        # "from A to B", or "route to B" with the origin taken from the payload
         try:
-            if ' from ' in text_lower and ' to ' in text_lower:
-                parts = message.split(' from ', 1)[1]
-                src_raw, dst_raw = parts.split(' to ', 1)
-                src, dst = src_raw.strip(), dst_raw.strip()
-            elif text_lower.startswith('route to ') or text_lower.startswith('directions to '):
-                # assume origin is provided in destination payload or ask
-                dst = message.split(' to ', 1)[1].strip()
-                src = None
-            else:
-                return respond("Please ask like: 'Route from Delhi to Agra' or provide a destination and your origin.")
+            if not slots:
+                return "Please ask like: 'Route from Delhi to Agra' or provide a destination and your origin.", None
+            src, dst = slots['src'], slots['dst']
 
             # resolve places
             src_place = search_place(src, tomtom_key) if src else None
             dst_place = search_place(dst, tomtom_key) if dst else None
 
             if not dst_place:
-                return respond("I couldn't find the destination. Please provide a clearer place name or address.")
+                return "I couldn't find the destination. Please provide a clearer place name or address.", None
 
             if src and not src_place:
-                return respond("I couldn't find the source location. Please check the source name.")
+                return "I couldn't find the source location. Please check the source name.", None
 
             # if origin not provided, try coords from payload
             if not src_place and coords:
@@ -362,28 +482,26 @@ def chat():
             dlon = dst_place['position']['lon']
 
             if slat is None or slon is None:
-                return respond("Please provide the starting location or say 'from <place> to <place>'.")
+                return "Please provide the starting location or say 'from <place> to <place>'.", None
 
             route = get_route(slat, slon, dlat, dlon, tomtom_key)
             if not route:
-                return respond("Couldn't compute a route right now. Try again later.")
+                return "Couldn't compute a route right now. Try again later.", None
 
             summary = route.get('routes', [])[0].get('summary', {})
             dist_km = summary.get('lengthInMeters', 0) / 1000.0
             time_min = summary.get('travelTimeInSeconds', 0) / 60.0
             reply = f"Distance from {src or 'your location'} to {dst} is {dist_km:.2f} km, estimated time {time_min:.1f} minutes."
-            return respond(reply, extra={'route': route})
+            return reply, {'route': route}
 
         except Exception:
             current_app.logger.exception('Failed to handle route intent')
-            return respond("Please ask like: 'Route from Delhi to Agra' or include both source and destination.")
+            return "Please ask like: 'Route from Delhi to Agra' or include both source and destination.", None
 
     # 2) Nearby search intent
-    if 'near me' in text_lower or 'nearby' in text_lower or 'near ' in text_lower:
+    if intent['type'] == 'nearby':
         # prefer coords from payload, then destination string, then ask
-        q = text_lower.replace('near me', '').replace('nearby', '').replace('near', '').strip()
-        if not q:
-            q = 'restaurant'
+        q = slots['query']
         center = None
         if coords:
             center = coords
@@ -391,60 +509,57 @@ def chat():
             center = geocode_destination(destination, tomtom_key)
 
         if not center:
-            return respond('Please provide a location or allow sharing coordinates for nearby search.')
+            return 'Please provide a location or allow sharing coordinates for nearby search.', None
 
         results = nearby_search(center['lat'], center['lng'], q, tomtom_key, limit=6)
         if not results:
-            return respond(f'No nearby {q} found.')
+            return f'No nearby {q} found.', None
         names = [r.get('poi', {}).get('name') or r.get('name') for r in results[:6]]
-        return respond(f'Nearby {q}: ' + ', '.join([n for n in names if n]))
+        return f'Nearby {q}: ' + ', '.join([n for n in names if n]), None
 
     # 3) Reverse geocoding / coordinates -> address
-    coord_match = re.search(r'(-?\d+\.\d+)\s*,\s*(-?\d+\.\d+)', message)
-    if 'address' in text_lower or 'what is at' in text_lower or coord_match:
-        if coord_match:
-            lat_s, lon_s = coord_match.groups()
-            addr = reverse_geocode(lat_s, lon_s, tomtom_key)
+    if intent['type'] == 'reverse_geocode':
+        if 'lat' in slots:
+            addr = reverse_geocode(slots['lat'], slots['lng'], tomtom_key)
             if addr:
-                return respond(f'Address: {addr}')
-            return respond('No address found for those coordinates.')
+                return f'Address: {addr}', None
+            return 'No address found for those coordinates.', None
         # if no coords, but destination provided as string
         if isinstance(destination, dict) and destination.get('lat') and destination.get('lng'):
             addr = reverse_geocode(destination['lat'], destination['lng'], tomtom_key)
             if addr:
-                return respond(f'Address: {addr}')
-        return respond('Please provide coordinates like "12.34,56.78" to reverse geocode or specify a place.')
+                return f'Address: {addr}', None
+        return 'Please provide coordinates like "12.34,56.78" to reverse geocode or specify a place.', None
 
     # 4) Autocomplete / city search
-    if any(k in text_lower for k in ['autocomplete', 'suggest', 'search ', 'find ']):
-        # extract a short query
-        q = message.replace('autocomplete', '').replace('suggest', '').replace('search', '').replace('find', '').strip()
+    if intent['type'] == 'autocomplete':
+        q = slots['prefix']
         if not q:
-            return respond('Please provide a search prefix to autocomplete.')
+            return 'Please provide a search prefix to autocomplete.', None
         candidates = autocomplete_place(q, tomtom_key, limit=6)
         names = [c.get('address', {}).get('freeformAddress') or c.get('poi', {}).get('name') or c.get('address') or c.get('type') for c in candidates[:6]]
         names = [n for n in names if n]
         if not names:
-            return respond('No suggestions found.')
-        return respond('Suggestions: ' + ', '.join(names))
+            return 'No suggestions found.', None
+        return 'Suggestions: ' + ', '.join(names), None
 
     # 5) Traffic info
-    if 'traffic' in text_lower:
+    if intent['type'] == 'traffic':
         center = None
         if coords:
             center = coords
         elif isinstance(destination, str) and tomtom_key:
             center = geocode_destination(destination, tomtom_key)
         if not center:
-            return respond('Please provide coordinates or a destination to check traffic.')
+            return 'Please provide coordinates or a destination to check traffic.', None
         flow = traffic_info(center['lat'], center['lng'], tomtom_key)
         if not flow:
-            return respond('No traffic data available for this location.')
+            return 'No traffic data available for this location.', None
         current_speed = flow.get('currentSpeed')
         free_flow = flow.get('freeFlowSpeed')
         confidence = flow.get('confidenceLevel')
         reply = f"Traffic: current speed {current_speed} km/h, free flow {free_flow} km/h, confidence {confidence}."
-        return respond(reply, extra={'traffic': flow})
+        return reply, {'traffic': flow}
 
     # Default help response
     help_text = (
@@ -454,4 +569,83 @@ def chat():
         "Think of me as your traffic navigator and city guide combined — here to make your trips quicker and easier. "
         "Just tell me what you’re looking for, and I’ll point you the right way!"
     )
-    return respond(help_text)
+    return help_text, None
+
+
+# ----------------------------
+# Streaming (server-sent events)
+# ----------------------------
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _stream_executor():
+    """Pool for request-level chat lookups, kept apart from the upstream pool they fan out to"""
+    global _STREAM_EXECUTOR
+    with _STREAM_EXECUTOR_LOCK:
+        if _STREAM_EXECUTOR is None:
+            _STREAM_EXECUTOR = ThreadPoolExecutor(max_workers=Config.CHAT_STREAM_WORKERS,
+                                                  thread_name_prefix='chat-stream')
+        return _STREAM_EXECUTOR
+
+
+def _stream_chat(message, destination, coords, tomtom_key):
+    """
+    Emit the assistant text as soon as it is known and every lookup as it lands
+
+    Clarifying questions and cached answers go out at once. Route and traffic
+    questions first get a notice (final: false); their route / traffic event
+    and the final text follow from their own future, while the POI search
+    runs alongside in another.
+    """
+    app = current_app._get_current_object()
+
+    def in_app(func, *args):
+        with app.app_context():
+            return func(*args)
+
+    executor = _stream_executor()
+    futures = {}
+    if coords and tomtom_key:
+        poi_search = executor.submit(in_app, tomtom_poi_search, coords['lat'], coords['lng'], tomtom_key, 6)
+        futures[poi_search] = 'nearby_pois'
+
+    immediate, intent, cache_key = _prepare_answer(message, coords)
+    notice = None
+    if immediate is None:
+        notice = _lookup_notice(intent)
+        answer = executor.submit(in_app, _answer_intent, intent, destination, coords, _tomtom_key())
+        futures[answer] = 'assistant'
+
+    def answer_events(text, extra):
+        # route / traffic data first, so the final text arrives with what it describes
+        for name, value in (extra or {}).items():
+            yield _sse(name, value)
+        yield _sse('assistant', {'assistant': text, 'coords': coords, 'final': True})
+
+    def generate():
+        if immediate is not None:
+            yield from answer_events(*immediate)
+        elif notice:
+            yield _sse('assistant', {'assistant': notice, 'coords': coords, 'final': False})
+        for future in as_completed(futures):
+            kind = futures[future]
+            try:
+                result = future.result()
+            except Exception:
+                current_app.logger.exception('Chat stream %s lookup failed', kind)
+                yield _sse('error', {'source': kind})
+                continue
+            if kind == 'assistant':
+                text, extra = result
+                _cache_answer(cache_key, intent, text, extra)
+                yield from answer_events(text, extra)
+            else:
+                yield _sse('nearby_pois', result)
+        yield _sse('done', {})
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # keep nginx from buffering the stream
+    return response
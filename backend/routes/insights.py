@@ -3,10 +3,18 @@ Insights API endpoints - FIXED VERSION
 Handles traffic insights, POI analysis, and mobility patterns
 """
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request
 from services.traffic_api import TrafficAPI
 from services.data_processor import DataProcessor
-from utils.helpers import format_api_response, validate_coordinates
+from services.fetch_graph import FetchGraph
+from services.area_grid import get_area_grid, INSIGHTS_POI_RADIUS_M, INSIGHTS_INCIDENT_RADIUS_KM
+from services.traffic_hub import get_traffic_hub
+from services.ml_predictor import get_predictor
+from utils.helpers import format_api_response, validate_coordinates, calculate_bbox
+from config import Config
+import numpy as np
+import json
+from datetime import datetime, timedelta
 import logging
 
 logger = logging.getLogger(__name__)
@@ -36,7 +44,6 @@ def get_traffic_insights():
             return jsonify(format_api_response(False, error="Failed to fetch traffic data")), 500
         
         # Get nearby incidents
-        from utils.helpers import calculate_bbox
         bbox = calculate_bbox(lat, lon, 5)  # 5km radius
         incidents = traffic_api.get_traffic_incidents(bbox)
         
@@ -51,6 +58,59 @@ def get_traffic_insights():
         logger.error(f"Error in get_traffic_insights: {e}")
         return jsonify(format_api_response(False, error=str(e))), 500
 
+@insights_bp.route('/traffic/stream', methods=['GET'])
+def stream_traffic():
+    """
+    Live traffic for area grid cells as server-sent events
+
+    Query: `cells=12,34` and/or `lat` + `lon`. Sends `subscribed`, then a
+    `snapshot` per cell, then `flow` / `incidents` deltas as the shared
+    poller sees changes; a comment line keeps idle connections open.
+    """
+    grid = get_area_grid()
+    try:
+        cells = {int(c) for c in request.args.get('cells', '').split(',') if c.strip()}
+    except ValueError:
+        return jsonify(format_api_response(False, error="'cells' must be comma-separated cell ids")), 400
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    if lat is not None or lon is not None:
+        valid, error = validate_coordinates(lat, lon)
+        if not valid:
+            return jsonify(format_api_response(False, error=error)), 400
+        cell = grid.cell_index(lat, lon)
+        if cell is None:
+            return jsonify(format_api_response(False, error='Location is outside the service area')), 400
+        cells.add(cell)
+    if not cells:
+        return jsonify(format_api_response(False, error="Provide 'cells' or 'lat' and 'lon'")), 400
+    if any(c < 0 or c >= len(grid) for c in cells):
+        return jsonify(format_api_response(False, error='Unknown cell id')), 400
+    if len(cells) > Config.TRAFFIC_HUB_MAX_CELLS:
+        return jsonify(format_api_response(False, error=f"At most {Config.TRAFFIC_HUB_MAX_CELLS} cells per subscription")), 400
+
+    hub = get_traffic_hub()
+    subscription = hub.subscribe(cells)
+
+    def sse(event, data):
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    def generate():
+        try:
+            yield sse('subscribed', {'cells': [{'cell': c, 'center': dict(zip(('lat', 'lon'), grid.cell_center(c)))}
+                                               for c in sorted(cells)]})
+            while True:
+                item = subscription.next(timeout=Config.TRAFFIC_HUB_KEEPALIVE)
+                yield ': keepalive\n\n' if item is None else sse(*item)
+        finally:
+            # client went away: its cells stop being polled once nobody else watches them
+            hub.unsubscribe(subscription)
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @insights_bp.route('/busiest-hours', methods=['GET'])
 def get_busiest_hours():
     """
@@ -66,8 +126,16 @@ def get_busiest_hours():
         if not valid:
             return jsonify(format_api_response(False, error=error)), 400
         
-        # Get busiest hours analysis
-        analysis = traffic_api.get_busiest_hours_analysis(lat, lon, days)
+        days = max(1, min(days, 7))
+        
+        # One entry per upcoming day, sliced from the hour-of-week congestion tensor
+        # (live model inference for locations outside it)
+        predictor = get_predictor()
+        today = datetime.now().date()
+        analysis = [
+            predictor.predict_busiest_hours({'lat': lat, 'lon': lon}, str(today + timedelta(days=offset)))
+            for offset in range(days)
+        ]
         
         return jsonify(format_api_response(True, data={
             'location': {'lat': lat, 'lon': lon},
@@ -113,6 +181,22 @@ def get_poi_analysis():
         logger.error(f"Error in get_poi_analysis: {e}")
         return jsonify(format_api_response(False, error=str(e))), 500
 
+def _gather(graph):
+    """
+    Run a fetch graph and split it into usable results and unavailable sources
+
+    TrafficAPI reports failures as {'success': False, ...} instead of raising,
+    so those count as unavailable too.
+    """
+    results, errors = graph.run()
+    for name, value in list(results.items()):
+        if isinstance(value, dict) and value.get('success') is False:
+            errors[name] = value.get('error', 'unavailable')
+            del results[name]
+    if errors:
+        logger.warning(f"Insights served with partial data, unavailable: {errors}")
+    return results, errors
+
 @insights_bp.route('/mobility-patterns', methods=['GET'])
 def get_mobility_patterns():
     """
@@ -127,11 +211,35 @@ def get_mobility_patterns():
         if not valid:
             return jsonify(format_api_response(False, error=error)), 400
         
-        # Get all data for mobility analysis
-        traffic_flow = traffic_api.get_traffic_flow(lat, lon)
-        bbox = calculate_bbox(lat, lon, 5)
-        incidents = traffic_api.get_traffic_incidents(bbox)
-        pois = traffic_api.search_poi(lat, lon, 2000)
+        # Precomputed grid cell answers without going upstream
+        cell = get_area_grid().lookup(lat, lon)
+        if cell:
+            return jsonify(format_api_response(True, data={
+                'location': {'lat': lat, 'lon': lon},
+                'patterns': cell['patterns'],
+                'data_sources': {
+                    'traffic_flow': cell['patterns']['congestion_status'] != 'unknown',
+                    'incidents': cell['incident_count'],
+                    'pois': cell['classification'].get('poi_count', 0)
+                },
+                'cell': cell['cell'],
+                'source': 'grid',
+                'updated_at': cell['updated_at']
+            })), 200
+        
+        # Get all data for mobility analysis (independent calls run concurrently)
+        bbox = calculate_bbox(lat, lon, INSIGHTS_INCIDENT_RADIUS_KM)
+        graph = FetchGraph(Config.INSIGHTS_FETCH_DEADLINE)
+        graph.add('traffic_flow', traffic_api.get_traffic_flow, lat, lon)
+        graph.add('incidents', traffic_api.get_traffic_incidents, bbox)
+        graph.add('pois', traffic_api.search_nearby_pois, lat, lon, INSIGHTS_POI_RADIUS_M)
+        results, errors = _gather(graph)
+        if len(errors) == 3:
+            return jsonify(format_api_response(False, error="Failed to fetch mobility data")), 502
+        
+        traffic_flow = results.get('traffic_flow', {})
+        incidents = results.get('incidents', {}).get('incidents', [])
+        pois = results.get('pois', {}).get('pois', [])
         
         # Generate mobility insights
         patterns = data_processor.generate_mobility_patterns(
@@ -147,7 +255,10 @@ def get_mobility_patterns():
                 'traffic_flow': bool(traffic_flow),
                 'incidents': len(incidents),
                 'pois': len(pois)
-            }
+            },
+            'source': 'live',
+            'partial': bool(errors),
+            'unavailable': errors
         })), 200
         
     except Exception as e:
@@ -168,22 +279,143 @@ def get_area_classification():
         if not valid:
             return jsonify(format_api_response(False, error=error)), 400
         
-        # Get data for classification
-        pois = traffic_api.search_poi(lat, lon, 2000)
-        traffic_flow = traffic_api.get_traffic_flow(lat, lon)
+        # Precomputed grid cell answers without going upstream
+        cell = get_area_grid().lookup(lat, lon)
+        if cell:
+            return jsonify(format_api_response(True, data={
+                'location': {'lat': lat, 'lon': lon},
+                'classification': cell['classification'],
+                'poi_mix': cell['poi_mix'],
+                'cell': cell['cell'],
+                'source': 'grid',
+                'updated_at': cell['updated_at']
+            })), 200
+        
+        # Get data for classification (both calls run concurrently)
+        graph = FetchGraph(Config.INSIGHTS_FETCH_DEADLINE)
+        graph.add('pois', traffic_api.search_nearby_pois, lat, lon, INSIGHTS_POI_RADIUS_M)
+        graph.add('traffic_flow', traffic_api.get_traffic_flow, lat, lon)
+        results, errors = _gather(graph)
+        if len(errors) == 2:
+            return jsonify(format_api_response(False, error="Failed to fetch area data")), 502
+        
+        pois = results.get('pois', {}).get('pois', [])
+        traffic_flow = results.get('traffic_flow', {})
         
         # Classify the area
         classification = data_processor.classify_area(pois, traffic_flow)
         
         return jsonify(format_api_response(True, data={
             'location': {'lat': lat, 'lon': lon},
-            'classification': classification
+            'classification': classification,
+            'source': 'live',
+            'partial': bool(errors),
+            'unavailable': errors
         })), 200
         
     except Exception as e:
         logger.error(f"Error in get_area_classification: {e}")
         return jsonify(format_api_response(False, error=str(e))), 500
 
+def _batch_points(data):
+    """
+    Point coordinates of a batch request as (lats, lons) arrays
+
+    Either `points` ([lat, lon] pairs or {lat, lon} objects) or `bbox`
+    ([min_lat, min_lon, max_lat, max_lon]) sampled every `resolution` degrees.
+    Raises ValueError with a client-facing message.
+    """
+    if data.get('points') is not None:
+        points = data['points']
+        if not isinstance(points, list) or not points:
+            raise ValueError("'points' must be a non-empty list")
+        try:
+            pairs = np.array([(p.get('lat'), p.get('lon', p.get('lng'))) if isinstance(p, dict) else tuple(p)
+                              for p in points], dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError('Each point needs a numeric lat and lon')
+        if pairs.ndim != 2 or pairs.shape[1] != 2 or np.isnan(pairs).any():
+            raise ValueError('Each point needs a numeric lat and lon')
+        lats, lons = pairs[:, 0], pairs[:, 1]
+    elif data.get('bbox') is not None:
+        try:
+            min_lat, min_lon, max_lat, max_lon = (float(v) for v in data['bbox'])
+            resolution = float(data.get('resolution') or Config.AREA_GRID_CELL_DEG)
+        except (TypeError, ValueError):
+            raise ValueError("'bbox' must be [min_lat, min_lon, max_lat, max_lon] and 'resolution' a number")
+        if min_lat > max_lat or min_lon > max_lon or resolution <= 0:
+            raise ValueError("'bbox' must be [min_lat, min_lon, max_lat, max_lon] with a positive 'resolution'")
+        # samples no coarser than `resolution`, never finer than a grid cell
+        resolution = max(resolution, Config.AREA_GRID_CELL_DEG)
+        n_lat = max(1, int(np.ceil((max_lat - min_lat) / resolution)))
+        n_lon = max(1, int(np.ceil((max_lon - min_lon) / resolution)))
+        if n_lat * n_lon > Config.INSIGHTS_BATCH_MAX_POINTS:
+            raise ValueError(f"bbox at this resolution has {n_lat * n_lon} samples, "
+                             f"limit is {Config.INSIGHTS_BATCH_MAX_POINTS}")
+        lat_axis = min_lat + (np.arange(n_lat) + 0.5) * (max_lat - min_lat) / n_lat
+        lon_axis = min_lon + (np.arange(n_lon) + 0.5) * (max_lon - min_lon) / n_lon
+        lats, lons = (axis.ravel() for axis in np.meshgrid(lat_axis, lon_axis, indexing='ij'))
+    else:
+        raise ValueError("Provide 'points' or 'bbox'")
+
+    if len(lats) > Config.INSIGHTS_BATCH_MAX_POINTS:
+        raise ValueError(f"At most {Config.INSIGHTS_BATCH_MAX_POINTS} points per request")
+    if (np.abs(lats) > 90).any() or (np.abs(lons) > 180).any():
+        raise ValueError('Latitude must be between -90 and 90 and longitude between -180 and 180.')
+    return lats, lons
+
+@insights_bp.route('/batch', methods=['POST'])
+def get_batch_insights():
+    """
+    Area insights for many points at once, as columns
+
+    Points are deduplicated to area grid cells; fresh cells are read from the
+    grid and up to INSIGHTS_BATCH_MAX_FETCH missing ones (busiest first) are
+    fetched concurrently through one fetch graph, which also stores them in
+    the grid for later requests.
+    """
+    try:
+        try:
+            lats, lons = _batch_points(request.get_json(silent=True) or {})
+        except ValueError as e:
+            return jsonify(format_api_response(False, error=str(e))), 400
+
+        grid = get_area_grid()
+        point_cells = grid.cell_indices(lats, lons)
+        inside = point_cells >= 0
+        cells, inverse = np.unique(point_cells[inside], return_inverse=True)
+        point_rows = np.full(len(point_cells), -1, dtype=np.int64)
+        point_rows[inside] = inverse
+
+        fresh = grid.is_fresh(cells)
+        missing = np.flatnonzero(~fresh)
+        # cells covering the most points first
+        missing = missing[np.argsort(-np.bincount(inverse, minlength=len(cells))[missing], kind='stable')]
+        to_fetch = cells[missing[:Config.INSIGHTS_BATCH_MAX_FETCH]]
+        fetched = set(grid.compute_cells(to_fetch, traffic_api)) if len(to_fetch) else set()
+
+        columns = grid.columns(cells)
+        columns['status'] = [
+            'grid' if is_fresh else 'live' if int(idx) in fetched else 'stale' if updated else 'missing'
+            for idx, is_fresh, updated in zip(cells, fresh, columns['updated_at'])
+        ]
+
+        return jsonify(format_api_response(True, data={
+            'resolution_deg': grid.cell_size,
+            'points': {
+                'lat': lats.tolist(),
+                'lon': lons.tolist(),
+                'cell': point_rows.tolist()   # row in `cells`, -1 outside the service area
+            },
+            'cells': columns,
+            'fetched': len(fetched),
+            'not_fetched': int(len(missing) - len(fetched))
+        })), 200
+
+    except Exception as e:
+        logger.error(f"Error in get_batch_insights: {e}")
+        return jsonify(format_api_response(False, error=str(e))), 500
+
 @insights_bp.route('/test', methods=['GET'])
 def test_insights():
     """Test endpoint"""
@@ -191,9 +423,11 @@ def test_insights():
         'message': 'Insights service is operational',
         'endpoints': [
             'GET /api/insights/traffic?lat=X&lon=Y',
+            'GET /api/insights/traffic/stream?cells=A,B',
             'GET /api/insights/busiest-hours?lat=X&lon=Y',
             'GET /api/insights/poi-analysis?lat=X&lon=Y&radius=5000',
             'GET /api/insights/mobility-patterns?lat=X&lon=Y',
-            'GET /api/insights/area-classification?lat=X&lon=Y'
+            'GET /api/insights/area-classification?lat=X&lon=Y',
+            'POST /api/insights/batch'
         ]
     })), 200
\ No newline at end of file
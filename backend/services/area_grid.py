@@ -0,0 +1,349 @@
+"""
+Precomputed area grid
+Area classification, POI mix and mobility score for every cell of a fixed
+grid over the service area, kept in compact numpy arrays and refreshed by a
+background job so insights can be answered with a single cell lookup
+"""
+
+import math
+import os
+import tempfile
+import threading
+import time
+import logging
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+from config import Config
+from services.data_processor import DataProcessor
+from services.fetch_graph import FetchGraph
+from utils.helpers import calculate_bbox
+
+logger = logging.getLogger(__name__)
+
+AREA_TYPES = ['Unknown', 'Mixed-use', 'Commercial Hub', 'Business District',
+              'Residential Zone', 'Entertainment District']
+CONGESTION_LEVELS = ['unknown', 'low', 'moderate', 'high', 'severe']
+
+# POI mix groups, matched against category names like DataProcessor.classify_area does
+POI_MIX_GROUPS = {
+    'commercial': ['shop', 'restaurant', 'store', 'mall', 'retail', 'cafe', 'market'],
+    'business': ['office', 'business', 'corporate', 'bank'],
+    'residential': ['residential', 'housing', 'apartment'],
+    'entertainment': ['entertainment', 'cinema', 'theatre', 'bar', 'nightclub'],
+    'leisure': ['park', 'museum', 'landmark', 'tourist', 'sports'],
+    'transport': ['station', 'metro', 'bus', 'parking', 'petrol', 'fuel']
+}
+POI_MIX_COLUMNS = list(POI_MIX_GROUPS) + ['other']
+TOP_CATEGORIES = 3
+
+# Search extents of the live insights handlers; cells are summarised with the same
+# ones (around the cell centre) so the POI / incident thresholds mean the same thing
+INSIGHTS_POI_RADIUS_M = 2000
+INSIGHTS_INCIDENT_RADIUS_KM = 5
+
+
+def _poi_group(category):
+    text = str(category).lower()
+    for group, keywords in POI_MIX_GROUPS.items():
+        if any(k in text for k in keywords):
+            return group
+    return 'other'
+
+
+class AreaGrid:
+    """Fixed lat/lon grid with one row of summary columns per cell"""
+
+    def __init__(self, bounds, cell_size_deg=0.01, max_age=86400):
+        self.min_lat, self.min_lon, self.max_lat, self.max_lon = bounds
+        self.cell_size = cell_size_deg
+        self.max_age = max_age
+        self.rows = max(1, math.ceil((self.max_lat - self.min_lat) / cell_size_deg))
+        self.cols = max(1, math.ceil((self.max_lon - self.min_lon) / cell_size_deg))
+        n = self.rows * self.cols
+
+        self.area_type = np.zeros(n, dtype=np.uint8)            # index into AREA_TYPES
+        self.congestion = np.zeros(n, dtype=np.uint8)           # index into CONGESTION_LEVELS
+        self.mobility_score = np.zeros(n, dtype=np.uint8)       # 0-100
+        self.poi_count = np.zeros(n, dtype=np.uint16)
+        self.incident_count = np.zeros(n, dtype=np.uint16)
+        self.top_categories = np.full((n, TOP_CATEGORIES), -1, dtype=np.int16)  # index into self.categories
+        self.poi_mix = np.zeros((n, len(POI_MIX_COLUMNS)), dtype=np.float16)    # share of POIs per group
+        self.updated_at = np.zeros(n, dtype=np.float64)         # epoch seconds, 0 = never computed
+
+        self.categories = []                                    # category vocabulary
+        self._category_ids = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return self.rows * self.cols
+
+    # ------------------------------------------------------------------
+    # Cells
+    # ------------------------------------------------------------------
+
+    def cell_index(self, lat, lon):
+        """Cell containing (lat, lon), or None outside the service area"""
+        if not (self.min_lat <= lat < self.max_lat and self.min_lon <= lon < self.max_lon):
+            return None
+        row = int((lat - self.min_lat) / self.cell_size)
+        col = int((lon - self.min_lon) / self.cell_size)
+        return min(row, self.rows - 1) * self.cols + min(col, self.cols - 1)
+
+    def cell_center(self, idx):
+        row, col = divmod(int(idx), self.cols)
+        return (self.min_lat + (row + 0.5) * self.cell_size,
+                self.min_lon + (col + 0.5) * self.cell_size)
+
+    @property
+    def cell_radius_m(self):
+        """Radius of the circle around a cell centre that covers the whole cell"""
+        return int(self.cell_size * 111320 / math.sqrt(2)) + 1
+
+    def cell_indices(self, lats, lons):
+        """Vectorized cell_index; -1 for points outside the service area"""
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        inside = (lats >= self.min_lat) & (lats < self.max_lat) & (lons >= self.min_lon) & (lons < self.max_lon)
+        rows = np.minimum(((lats - self.min_lat) / self.cell_size).astype(np.int64), self.rows - 1)
+        cols = np.minimum(((lons - self.min_lon) / self.cell_size).astype(np.int64), self.cols - 1)
+        return np.where(inside, rows * self.cols + cols, -1)
+
+    def is_fresh(self, ids):
+        """Boolean mask of cells computed within max_age"""
+        with self._lock:
+            updated = self.updated_at[ids]
+        return (updated > 0) & (time.time() - updated <= self.max_age)
+
+    def columns(self, ids):
+        """Summary columns for many cells at once (lists, ready for JSON)"""
+        ids = np.asarray(ids, dtype=np.int64)
+        rows, cols = np.divmod(ids, self.cols)
+        with self._lock:
+            return {
+                'cell': ids.tolist(),
+                'lat': np.round(self.min_lat + (rows + 0.5) * self.cell_size, 6).tolist(),
+                'lon': np.round(self.min_lon + (cols + 0.5) * self.cell_size, 6).tolist(),
+                'area_type': [AREA_TYPES[i] for i in self.area_type[ids]],
+                'congestion': [CONGESTION_LEVELS[i] for i in self.congestion[ids]],
+                'mobility_score': self.mobility_score[ids].tolist(),
+                'poi_count': self.poi_count[ids].tolist(),
+                'incident_count': self.incident_count[ids].tolist(),
+                'poi_mix': {name: np.round(self.poi_mix[ids, j].astype(np.float64), 3).tolist()
+                            for j, name in enumerate(POI_MIX_COLUMNS)},
+                'updated_at': self.updated_at[ids].tolist()
+            }
+
+    def stale_cells(self, limit=None):
+        """Cells never computed or older than max_age, oldest first"""
+        with self._lock:
+            cutoff = time.time() - self.max_age
+            stale = np.flatnonzero(self.updated_at < cutoff)
+            stale = stale[np.argsort(self.updated_at[stale], kind='stable')]
+        return stale[:limit] if limit else stale
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def lookup(self, lat, lon):
+        """Precomputed insights for the cell containing (lat, lon); None if outside or not fresh"""
+        idx = self.cell_index(lat, lon)
+        if idx is None:
+            return None
+        with self._lock:
+            updated = self.updated_at[idx]
+            if not updated or time.time() - updated > self.max_age:
+                return None
+            congestion = CONGESTION_LEVELS[self.congestion[idx]]
+            poi_count = int(self.poi_count[idx])
+            incident_count = int(self.incident_count[idx])
+            top = [self.categories[i] for i in self.top_categories[idx] if i >= 0]
+            mix = {name: round(float(share), 3) for name, share in zip(POI_MIX_COLUMNS, self.poi_mix[idx])}
+
+        center_lat, center_lon = self.cell_center(idx)
+        return {
+            'cell': {'id': int(idx), 'center': {'lat': center_lat, 'lon': center_lon},
+                     'size_deg': self.cell_size},
+            'classification': DataProcessor.classify_from_summary(top, poi_count, congestion),
+            'patterns': DataProcessor.mobility_patterns_from_counts(congestion, incident_count, poi_count),
+            'poi_mix': mix,
+            'incident_count': incident_count,
+            'updated_at': datetime.fromtimestamp(updated).isoformat()
+        }
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def _category_id(self, name):
+        idx = self._category_ids.get(name)
+        if idx is None:
+            idx = len(self.categories)
+            self.categories.append(name)
+            self._category_ids[name] = idx
+        return idx
+
+    def update_cell(self, idx, pois, traffic_flow, incidents):
+        """Summarize fresh upstream data into the cell's columns"""
+        classification = DataProcessor.classify_area(pois, traffic_flow)
+        patterns = DataProcessor.generate_mobility_patterns(traffic_flow, incidents, pois)
+        congestion = traffic_flow.get('congestion_level', 'unknown')
+        groups = Counter(_poi_group(p.get('category', 'Unknown')) for p in pois)
+        top = [c for c, _ in Counter(p.get('category', 'Unknown') for p in pois).most_common(TOP_CATEGORIES)]
+
+        with self._lock:
+            self.area_type[idx] = AREA_TYPES.index(classification['primary_type'])
+            self.congestion[idx] = CONGESTION_LEVELS.index(congestion) if congestion in CONGESTION_LEVELS else 0
+            self.mobility_score[idx] = patterns['mobility_score']
+            self.poi_count[idx] = min(len(pois), np.iinfo(np.uint16).max)
+            self.incident_count[idx] = min(len(incidents), np.iinfo(np.uint16).max)
+            self.top_categories[idx] = -1
+            for i, name in enumerate(top):
+                self.top_categories[idx, i] = self._category_id(name)
+            self.poi_mix[idx] = [groups[g] / len(pois) if pois else 0 for g in POI_MIX_COLUMNS]
+            self.updated_at[idx] = time.time()
+
+    def add_cell_fetches(self, graph, idx, traffic_api):
+        """Register the upstream calls for one cell on a fetch graph (names prefixed by the cell id)"""
+        lat, lon = self.cell_center(idx)
+        graph.add(f"{idx}:pois", traffic_api.search_nearby_pois, lat, lon, INSIGHTS_POI_RADIUS_M)
+        graph.add(f"{idx}:traffic_flow", traffic_api.get_traffic_flow, lat, lon)
+        graph.add(f"{idx}:incidents", traffic_api.get_traffic_incidents,
+                  calculate_bbox(lat, lon, INSIGHTS_INCIDENT_RADIUS_KM))
+
+    def store_cell_results(self, idx, results, errors):
+        """Update a cell from fetch graph output; returns False (cell untouched) if any source failed"""
+        sources = {name: results.get(f"{idx}:{name}") for name in ('pois', 'traffic_flow', 'incidents')}
+        failed = [name for name, value in sources.items()
+                  if f"{idx}:{name}" in errors or not value or not value.get('success')]
+        if failed:
+            # keep the previous summary rather than storing one built from partial data
+            logger.warning(f"Area grid cell {idx} not refreshed, unavailable: {failed}")
+            return False
+        self.update_cell(idx, sources['pois'].get('pois', []), sources['traffic_flow'],
+                         sources['incidents'].get('incidents', []))
+        return True
+
+    def compute_cell(self, idx, traffic_api, deadline=None):
+        """Fetch POIs, flow and incidents around the cell centre and store its summary"""
+        graph = FetchGraph(deadline or Config.INSIGHTS_FETCH_DEADLINE)
+        self.add_cell_fetches(graph, idx, traffic_api)
+        results, errors = graph.run()
+        return self.store_cell_results(idx, results, errors)
+
+    def compute_cells(self, ids, traffic_api, deadline=None):
+        """Fetch many cells through one fetch graph (upstream calls overlap); returns the refreshed ids"""
+        graph = FetchGraph(deadline or Config.INSIGHTS_FETCH_DEADLINE)
+        for idx in ids:
+            self.add_cell_fetches(graph, int(idx), traffic_api)
+        results, errors = graph.run()
+        return [int(idx) for idx in ids if self.store_cell_results(int(idx), results, errors)]
+
+    def refresh(self, traffic_api, limit=None):
+        """Recompute up to `limit` stale cells; returns how many were refreshed"""
+        refreshed = 0
+        for idx in self.stale_cells(limit):
+            if self.compute_cell(int(idx), traffic_api):
+                refreshed += 1
+        return refreshed
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _shape(self):
+        return np.array([self.min_lat, self.min_lon, self.max_lat, self.max_lon, self.cell_size])
+
+    def save(self, path):
+        """
+        Write all columns to a compressed .npz (atomically replaced)
+
+        The temporary file is unique, so workers each running a refresher
+        never write into one another's half-written file.
+        """
+        with self._lock:
+            arrays = {
+                'shape': self._shape(),
+                'area_type': self.area_type,
+                'congestion': self.congestion,
+                'mobility_score': self.mobility_score,
+                'poi_count': self.poi_count,
+                'incident_count': self.incident_count,
+                'top_categories': self.top_categories,
+                'poi_mix': self.poi_mix,
+                'updated_at': self.updated_at,
+                'categories': np.array(self.categories, dtype=str)
+            }
+            fd, tmp_path = tempfile.mkstemp(suffix='.tmp.npz', dir=os.path.dirname(os.path.abspath(path)))
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.savez_compressed(f, **arrays)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+
+    def load(self, path):
+        """Load columns saved for the same bounds and cell size; returns False otherwise"""
+        with np.load(path, allow_pickle=False) as data:
+            if not np.allclose(data['shape'], self._shape()):
+                logger.warning(f"Area grid at {path} was built for a different grid, ignoring it")
+                return False
+            with self._lock:
+                for name in ('area_type', 'congestion', 'mobility_score', 'poi_count', 'incident_count',
+                             'top_categories', 'poi_mix', 'updated_at'):
+                    setattr(self, name, data[name].copy())
+                self.categories = [str(c) for c in data['categories']]
+                self._category_ids = {c: i for i, c in enumerate(self.categories)}
+        return True
+
+
+_grid = None
+_grid_lock = threading.Lock()
+_refresher = None
+
+
+def get_area_grid():
+    """Process-wide grid over SERVICE_AREA_BOUNDS, loaded from AREA_GRID_PATH when present"""
+    global _grid
+    with _grid_lock:
+        if _grid is None:
+            bounds = [float(v) for v in Config.SERVICE_AREA_BOUNDS.split(',')]
+            _grid = AreaGrid(bounds, Config.AREA_GRID_CELL_DEG, Config.AREA_GRID_MAX_AGE)
+            if Config.AREA_GRID_PATH and os.path.exists(Config.AREA_GRID_PATH):
+                try:
+                    _grid.load(Config.AREA_GRID_PATH)
+                except Exception as e:
+                    logger.error(f"Error loading area grid from {Config.AREA_GRID_PATH}: {e}")
+        return _grid
+
+
+def start_area_grid_refresher(traffic_api=None):
+    """
+    Background job: every AREA_GRID_REFRESH_INTERVAL seconds recompute the
+    AREA_GRID_BATCH_SIZE stalest cells and save the grid
+    """
+    global _refresher
+    if _refresher is not None:
+        return _refresher
+    if traffic_api is None:
+        from services.traffic_api import TrafficAPI
+        traffic_api = TrafficAPI()
+    grid = get_area_grid()
+
+    def _run():
+        while True:
+            try:
+                refreshed = grid.refresh(traffic_api, limit=Config.AREA_GRID_BATCH_SIZE)
+                if refreshed and Config.AREA_GRID_PATH:
+                    grid.save(Config.AREA_GRID_PATH)
+                logger.info(f"Area grid refresh: {refreshed} cells updated")
+            except Exception as e:
+                logger.error(f"Area grid refresh failed: {e}")
+            time.sleep(Config.AREA_GRID_REFRESH_INTERVAL)
+
+    _refresher = threading.Thread(target=_run, name='area-grid-refresher', daemon=True)
+    _refresher.start()
+    return _refresher
@@ -0,0 +1,119 @@
+"""
+Local autocomplete index
+Sorted key array with binary search over known place names, ranked by how
+often each place is asked for in our own query log
+"""
+
+import bisect
+import heapq
+import threading
+import time
+import logging
+from collections import Counter
+
+from config import Config
+from services.gazetteer import normalize_name, get_gazetteer
+
+logger = logging.getLogger(__name__)
+
+
+class AutocompleteIndex:
+    """Prefix index over place names; every word start of a name is searchable"""
+
+    # Prefixes matching a large slice of the index have their ranked results
+    # memoized briefly instead of re-ranked on every keystroke
+    BROAD_PREFIX_MATCHES = 256
+    BROAD_PREFIX_TTL = 60
+
+    def __init__(self):
+        self._entries = []           # {'name', 'lat', 'lon', 'address'}
+        self._norms = []             # normalized name per entry
+        self._by_name = {}           # normalized name -> entry id
+        self._keys = []              # sorted (key, entry id) pairs
+        self._popularity = Counter() # normalized name -> query count
+        self._broad_cache = {}       # (prefix, limit) -> (ts, results)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, name, lat=None, lon=None, address=''):
+        """Add a place name; returns its entry id"""
+        norm = normalize_name(name) if name else ''
+        if not norm:
+            return None
+        with self._lock:
+            entry_id = self._by_name.get(norm)
+            if entry_id is not None:
+                return entry_id
+            entry_id = len(self._entries)
+            self._entries.append({'name': name, 'lat': lat, 'lon': lon, 'address': address or name})
+            self._norms.append(norm)
+            self._by_name[norm] = entry_id
+            # "rajiv chowk metro" is found by "raj", "cho" and "met"
+            words = norm.split(' ')
+            for i in range(len(words)):
+                bisect.insort(self._keys, (' '.join(words[i:]), entry_id))
+            self._broad_cache.clear()
+            return entry_id
+
+    def record_query(self, text, count=1):
+        """Count a resolved query towards its place's popularity"""
+        norm = normalize_name(text)
+        if norm:
+            with self._lock:
+                self._popularity[norm] += count
+
+    def load_query_log(self, path):
+        """Seed popularity from a log with one resolved query per line"""
+        loaded = 0
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    self.record_query(line)
+                    loaded += 1
+        logger.info(f"Loaded {loaded} autocomplete queries from {path}")
+        return loaded
+
+    def suggest(self, prefix, limit=5):
+        """Places whose name (or a word in it) starts with prefix, most popular first"""
+        key = normalize_name(prefix)
+        if not key:
+            return []
+        with self._lock:
+            cached = self._broad_cache.get((key, limit))
+            if cached and time.monotonic() - cached[0] < self.BROAD_PREFIX_TTL:
+                return [dict(e) for e in cached[1]]
+            start = bisect.bisect_left(self._keys, (key,))
+            end = bisect.bisect_left(self._keys, (key + '\uffff',))
+            ids = {entry_id for _, entry_id in self._keys[start:end]}
+            ranked = heapq.nsmallest(
+                limit, ids,
+                key=lambda i: (-self._popularity[self._norms[i]], len(self._norms[i]), i)
+            )
+            results = [dict(self._entries[i]) for i in ranked]
+            if end - start > self.BROAD_PREFIX_MATCHES:
+                self._broad_cache[(key, limit)] = (time.monotonic(), results)
+            return [dict(e) for e in results]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_autocomplete_index():
+    """Process-wide index, seeded from the gazetteer and kept in sync with it"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = AutocompleteIndex()
+            gazetteer = get_gazetteer()
+            for place in gazetteer.places():
+                _index.add(place['name'], place['lat'], place['lon'], place['address'])
+            gazetteer.subscribe(lambda place: _index.add(place['name'], place['lat'], place['lon'], place['address']))
+            if Config.AUTOCOMPLETE_QUERY_LOG:
+                try:
+                    _index.load_query_log(Config.AUTOCOMPLETE_QUERY_LOG)
+                except Exception as e:
+                    logger.error(f"Error loading autocomplete query log: {e}")
+        return _index
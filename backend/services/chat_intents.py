@@ -0,0 +1,195 @@
+"""
+Chat intent parsing
+Reduces a chat message to a canonical intent and its slots so that different
+phrasings of the same question share one assistant cache entry
+"""
+
+import re
+import logging
+
+from services.gazetteer import normalize_name, get_gazetteer
+
+logger = logging.getLogger(__name__)
+
+# Cache lifetime per intent (seconds): live conditions expire fast, places barely change
+INTENT_TTLS = {
+    'traffic': 120,
+    'nearby': 60 * 10,
+    'route': 60 * 15,
+    'autocomplete': 60 * 60 * 6,
+    'reverse_geocode': 60 * 60 * 24,
+    'help': 60 * 60 * 24
+}
+
+# Keyword classes recognised in a chat message. Keywords are plain case-insensitive
+# substrings, so they also match inside words ("unsafe" counts as safety, "train"
+# as rain); "from"/"to" need the surrounding spaces. A message can match several
+# classes at once.
+KEYWORDS = {
+    'travel': ['reach', 'get to', 'safest', 'safe route', 'route', 'reach here', 'reach there',
+               'how to get', 'need to reach', 'need to get'],
+    'safety': ['safe', 'safety', 'rain', 'flood', 'construction', 'blocked', 'ambulance', 'vip'],
+    'route': ['route', 'distance', 'how to go', 'how do i get', 'directions'],
+    'nearby': ['near me', 'nearby', 'near '],
+    'address': ['address', 'what is at'],
+    'autocomplete': ['autocomplete', 'suggest', 'search ', 'find '],
+    'traffic': ['traffic'],
+    'from': [' from '],
+    'to': [' to ']
+}
+
+_COORDS = re.compile(r'-?\d+\.\d+\s*,\s*-?\d+\.\d+')
+# cheap prefilter: _COORDS starts with an optional sign, so re cannot skip ahead
+# to a candidate and tries it at every position of a message without decimals
+_DECIMAL = re.compile(r'\d\.\d')
+
+# Classes whose spans feed slot extraction, so every occurrence is recorded;
+# the others only need their first hit
+_SLOT_CLASSES = {'nearby', 'autocomplete', 'from', 'to'}
+_SCAN_TABLE = [(kind, words, kind in _SLOT_CLASSES) for kind, words in KEYWORDS.items()]
+
+
+def scan(message):
+    """
+    Keyword classes in the message with their (start, end) spans, in one pass
+
+    One pass over the keyword table with str.find: slot classes list every
+    occurrence in order, the others stop at their first hit. 'coords' holds
+    the first lat,lng pair.
+    """
+    text = message.lower()
+    if len(text) != len(message):
+        # lowercasing changed the length (rare non-ASCII); spans must index the original
+        text = ''.join(ch.lower() if len(ch.lower()) == 1 else ch for ch in message)
+    matches = {}
+    # plain loops: an any() generator per class costs more than the substring checks
+    for kind, words, every in _SCAN_TABLE:
+        spans = None
+        for word in words:
+            if word not in text:
+                continue
+            start = text.find(word)
+            if not every:
+                spans = [(start, start + len(word))]
+                break
+            if spans is None:
+                spans = []
+            while start >= 0:
+                spans.append((start, start + len(word)))
+                start = text.find(word, start + 1)
+        if spans:
+            matches[kind] = sorted(spans) if every else spans
+    coords = _COORDS.search(message) if _DECIMAL.search(text) else None
+    if coords:
+        matches['coords'] = [coords.span()]
+    return matches
+
+
+def _strip_spans(message, spans):
+    """Message text with the given spans removed"""
+    parts, last = [], 0
+    for start, end in sorted(spans):
+        if start >= last:
+            parts.append(message[last:start])
+            last = end
+        elif end > last:
+            last = end
+    parts.append(message[last:])
+    return ' '.join(p.strip() for p in parts if p.strip())
+
+
+def quantize_coords(lat, lng, precision=3):
+    """Coordinates rounded to `precision` decimals (3 ~ 110 m)"""
+    return f"{round(float(lat), precision)},{round(float(lng), precision)}"
+
+
+def _route_slots(message, matches):
+    """src/dst place text from 'from A to B' or 'route to B' phrasings"""
+    if 'from' in matches and 'to' in matches:
+        start = matches['from'][0][1]
+        split = next((span for span in matches['to'] if span[0] >= start), None)
+        if split is None:
+            return {}
+        return {'src': message[start:split[0]].strip(), 'dst': message[split[1]:].strip()}
+    lowered = message.lower()
+    for phrase in ('route to ', 'directions to '):
+        if lowered.startswith(phrase):
+            return {'src': None, 'dst': message[len(phrase):].strip()}
+    return {}
+
+
+def classify(message, matches=None):
+    """
+    Canonical intent for a chat message
+
+    Returns {'type': ..., 'slots': {...}} where type is one of route, nearby,
+    reverse_geocode, autocomplete, traffic or help, checked in that order.
+    Pass the result of scan() to avoid scanning the message twice.
+    """
+    if matches is None:
+        matches = scan(message)
+
+    if 'route' in matches:
+        return {'type': 'route', 'slots': _route_slots(message, matches)}
+
+    if 'nearby' in matches:
+        query = _strip_spans(message, matches['nearby'])
+        return {'type': 'nearby', 'slots': {'query': normalize_name(query) or 'restaurant'}}
+
+    if 'address' in matches or 'coords' in matches:
+        slots = {}
+        if 'coords' in matches:
+            start, end = matches['coords'][0]
+            lat, lng = message[start:end].split(',')
+            slots['lat'], slots['lng'] = lat.strip(), lng.strip()
+        return {'type': 'reverse_geocode', 'slots': slots}
+
+    if 'autocomplete' in matches:
+        return {'type': 'autocomplete', 'slots': {'prefix': _strip_spans(message, matches['autocomplete'])}}
+
+    if 'traffic' in matches:
+        return {'type': 'traffic', 'slots': {}}
+
+    return {'type': 'help', 'slots': {}}
+
+
+def _place_ref(name):
+    """Stable reference for a place name: gazetteer id when known, else its normalized text"""
+    if not name:
+        return ''
+    try:
+        place = get_gazetteer().lookup(name)
+    except Exception:
+        logger.exception('Gazetteer lookup failed for %s', name)
+        place = None
+    return f"place:{place['id']}" if place else normalize_name(name)
+
+
+def intent_cache_key(intent, coords=None):
+    """
+    Assistant cache key built from the intent, its resolved slots and, only
+    where the answer depends on them, the request coordinates
+    """
+    kind, slots = intent['type'], intent['slots']
+    here = quantize_coords(coords['lat'], coords['lng']) if coords else 'no_coords'
+
+    if kind == 'route':
+        if not slots:
+            return 'route|unparsed'
+        origin = _place_ref(slots['src']) if slots.get('src') else here
+        return f"route|{origin}|{_place_ref(slots['dst'])}"
+    if kind == 'nearby':
+        return f"nearby|{slots['query']}|{here}"
+    if kind == 'reverse_geocode':
+        if 'lat' in slots:
+            return f"reverse_geocode|{quantize_coords(slots['lat'], slots['lng'], precision=4)}"
+        return f"reverse_geocode|{here}"
+    if kind == 'autocomplete':
+        return f"autocomplete|{normalize_name(slots['prefix'])}"
+    if kind == 'traffic':
+        return f"traffic|{here}"
+    return kind
+
+
+def intent_ttl(intent):
+    return INTENT_TTLS.get(intent['type'], INTENT_TTLS['help'])
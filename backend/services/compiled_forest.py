@@ -0,0 +1,158 @@
+"""
+Compiled tree ensembles
+Flattens a trained scikit-learn forest into contiguous NumPy arrays and
+evaluates every tree for a whole batch at once, without sklearn's per-call
+validation and per-tree dispatch
+"""
+
+import os
+import joblib
+import numpy as np
+
+
+class CompiledForest:
+    """
+    Tree ensemble as flat node arrays
+
+    All trees share one node table (feature, threshold, left, right, value);
+    `roots` holds each tree's first node. Leaves point to themselves with an
+    infinite threshold, so every row can take exactly `depth` steps.
+    Prediction is `base + scale * combine(leaf values)` where combine is the
+    mean (forests) or the sum (boosting). Inputs are rounded to float32 first
+    like sklearn's trees do, unless float32_inputs is False (histogram boosting
+    compares float64 values). NaN inputs are not supported.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, depth, n_features,
+                 base=0.0, scale=1.0, combine='mean', float32_inputs=True):
+        self.feature = np.ascontiguousarray(feature, dtype=np.intp)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.left = np.ascontiguousarray(left, dtype=np.intp)
+        self.right = np.ascontiguousarray(right, dtype=np.intp)
+        self.value = np.ascontiguousarray(value, dtype=np.float64)
+        self.roots = np.ascontiguousarray(roots, dtype=np.intp)
+        self.depth = int(depth)
+        self.n_features = int(n_features)
+        self.base = float(base)
+        self.scale = float(scale)
+        self.combine = combine
+        self.float32_inputs = float32_inputs
+        # traversal tables: next node is _children[2 * node + went_left]
+        self._children = np.stack([self.right, self.left], axis=1).ravel().astype(np.int32)
+        self._feature = self.feature.astype(np.int32)
+        self._roots = self.roots.astype(np.int32)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Compile a fitted single-output forest, extra-trees, (histogram) boosting model or single tree"""
+        if hasattr(model, '_predictors'):
+            return cls._from_hist_gradient_boosting(model)
+        if hasattr(model, 'tree_'):
+            trees, base, scale, combine = [model], 0.0, 1.0, 'mean'
+        elif hasattr(model, 'learning_rate') and hasattr(model, 'init_'):
+            # GradientBoostingRegressor: constant init + learning_rate * sum of trees
+            if model.init_ == 'zero':
+                base = 0.0
+            elif hasattr(model.init_, 'constant_'):
+                base = float(np.ravel(model.init_.constant_)[0])
+            else:
+                raise ValueError('Only constant or zero init estimators can be compiled')
+            trees, scale, combine = list(model.estimators_[:, 0]), model.learning_rate, 'sum'
+        elif hasattr(model, 'estimators_'):
+            trees, base, scale, combine = list(model.estimators_), 0.0, 1.0, 'mean'
+        else:
+            raise ValueError(f"Cannot compile {type(model).__name__}")
+
+        tables = []
+        for est in trees:
+            tree = est.tree_
+            if tree.n_outputs != 1 or tree.value.shape[2] != 1:
+                raise ValueError('Only single-output regression trees can be compiled')
+            tables.append((tree.children_left < 0, tree.feature, tree.threshold, tree.children_left,
+                           tree.children_right, tree.value[:, 0, 0], tree.max_depth))
+        return cls._from_tables(tables, model.n_features_in_, base, scale, combine)
+
+    @classmethod
+    def _from_hist_gradient_boosting(cls, model):
+        """HistGradientBoostingRegressor: baseline + sum of trees (leaf values already shrunk)"""
+        if getattr(model, 'loss', None) != 'squared_error':
+            raise ValueError('Only squared_error histogram boosting can be compiled')
+        if getattr(model, 'is_categorical_', None) is not None and np.any(model.is_categorical_):
+            raise ValueError('Histogram boosting with categorical features cannot be compiled')
+        tables = []
+        for (predictor,) in model._predictors:
+            nodes = predictor.nodes
+            tables.append((nodes['is_leaf'].astype(bool), nodes['feature_idx'], nodes['num_threshold'],
+                           nodes['left'], nodes['right'], nodes['value'], int(nodes['depth'].max())))
+        base = float(np.ravel(model._baseline_prediction)[0])
+        return cls._from_tables(tables, model.n_features_in_, base, 1.0, 'sum', float32_inputs=False)
+
+    @classmethod
+    def _from_tables(cls, tables, n_features, base, scale, combine, float32_inputs=True):
+        """Concatenate per-tree (is_leaf, feature, threshold, left, right, value, depth) node arrays"""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset, depth = 0, 0
+        for leaf, feature, threshold, left, right, value, tree_depth in tables:
+            n = len(leaf)
+            own = np.arange(n) + offset
+            features.append(np.where(leaf, 0, feature))
+            thresholds.append(np.where(leaf, np.inf, threshold))
+            lefts.append(np.where(leaf, own, np.asarray(left, dtype=np.intp) + offset))
+            rights.append(np.where(leaf, own, np.asarray(right, dtype=np.intp) + offset))
+            values.append(value)
+            roots.append(offset)
+            depth = max(depth, tree_depth)
+            offset += n
+
+        return cls(np.concatenate(features), np.concatenate(thresholds), np.concatenate(lefts),
+                   np.concatenate(rights), np.concatenate(values), roots, depth,
+                   n_features, base, scale, combine, float32_inputs)
+
+    def save(self, path):
+        """Write an uncompressed joblib file (loadable without sklearn, arrays memory-mappable)"""
+        tmp = f"{path}.tmp"
+        joblib.dump(self, tmp)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        compiled = joblib.load(path, mmap_mode=mmap_mode)
+        if not isinstance(compiled, cls):
+            raise ValueError(f"{path} does not hold a {cls.__name__}")
+        return compiled
+
+    # ------------------------------------------------------------------
+    # Evaluation
+    # ------------------------------------------------------------------
+
+    def predict(self, X):
+        """Predictions for an (n, n_features) matrix, matching the source model's predict"""
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+        if getattr(self, 'float32_inputs', True):   # attribute absent in artifacts saved before it existed
+            # sklearn trees compare float32 inputs against float64 thresholds
+            flat = X.astype(np.float32).astype(np.float64).ravel()
+        else:
+            flat = X.astype(np.float64).ravel()
+
+        n = X.shape[0]
+        row_start = (np.arange(n, dtype=np.int32) * self.n_features)[:, None]
+        node = np.broadcast_to(self._roots, (n, self.n_trees)).copy()   # one cursor per (row, tree)
+        for _ in range(self.depth):
+            go_left = flat.take(row_start + self._feature.take(node)) <= self.threshold.take(node)
+            node = self._children.take(2 * node + go_left)
+
+        leaves = self.value.take(node)
+        combined = leaves.mean(axis=1) if self.combine == 'mean' else leaves.sum(axis=1)
+        return self.base + self.scale * combined
@@ -0,0 +1,140 @@
+"""
+Hour-of-week congestion tensor
+Model predictions for every service-area grid cell x 168 hours of the week,
+built in one vectorized pass by a nightly job and memory-mapped by the API
+so busiest-hours questions are answered by slicing instead of re-running
+the model
+"""
+
+import json
+import os
+import threading
+import time
+import logging
+
+import numpy as np
+from config import Config
+from services.area_grid import AreaGrid
+
+logger = logging.getLogger(__name__)
+
+HOURS_PER_WEEK = 168
+
+
+def _index_path(path):
+    return os.path.splitext(path)[0] + '.json'
+
+
+class CongestionTensor:
+    """(cells, 168) float16 congestion percentages plus the grid they were built on"""
+
+    def __init__(self, values, index):
+        self.values = values
+        self.index = index
+        self.grid = AreaGrid(index['bounds'], index['cell_size_deg'])
+        self.model_version = index.get('model_version')
+
+    @classmethod
+    def load(cls, path):
+        with open(_index_path(path)) as f:
+            index = json.load(f)
+        values = np.load(path, mmap_mode='r')
+        if values.shape != (index['cells'], HOURS_PER_WEEK):
+            raise ValueError(f"{path} has shape {values.shape}, index expects ({index['cells']}, {HOURS_PER_WEEK})")
+        return cls(values, index)
+
+    def week(self, lat, lon):
+        """168 congestion percentages (Monday 00:00 first) for the cell at (lat, lon); None outside the grid"""
+        idx = self.grid.cell_index(lat, lon)
+        if idx is None:
+            return None
+        return np.asarray(self.values[idx], dtype=np.float32)
+
+    def day(self, lat, lon, weekday):
+        """24 hourly congestion percentages for one weekday (0 = Monday)"""
+        week = self.week(lat, lon)
+        return None if week is None else week[weekday * 24:(weekday + 1) * 24]
+
+
+def build_congestion_tensor(predictor, path, bounds=None, cell_size_deg=None, chunk_cells=2048):
+    """
+    Evaluate the predictor over every grid cell x hour of week and write the tensor
+
+    Cells are processed in chunks of one predict call each; the .npy is
+    written to a temporary file and swapped in, then the index, so readers
+    never see a half-built tensor.
+    """
+    if bounds is None:
+        bounds = [float(v) for v in Config.SERVICE_AREA_BOUNDS.split(',')]
+    grid = AreaGrid(bounds, cell_size_deg or Config.AREA_GRID_CELL_DEG)
+    n = len(grid)
+    start = time.perf_counter()
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp.npy"
+    out = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.float16, shape=(n, HOURS_PER_WEEK))
+    hour_of_week = np.arange(HOURS_PER_WEEK)
+    for first in range(0, n, chunk_cells):
+        ids = np.arange(first, min(n, first + chunk_cells))
+        rows, cols = np.divmod(ids, grid.cols)
+        lats = grid.min_lat + (rows + 0.5) * grid.cell_size
+        lons = grid.min_lon + (cols + 0.5) * grid.cell_size
+        columns = {
+            'hour': np.tile(hour_of_week % 24, len(ids)),
+            'day_of_week': np.tile(hour_of_week // 24, len(ids)),
+            'lat': np.repeat(lats, HOURS_PER_WEEK),
+            'lon': np.repeat(lons, HOURS_PER_WEEK)
+        }
+        out[first:first + len(ids)] = predictor.predict_congestion(columns).reshape(len(ids), HOURS_PER_WEEK)
+    out.flush()
+    del out
+    os.replace(tmp, path)
+
+    index = {
+        'bounds': list(bounds),
+        'cell_size_deg': grid.cell_size,
+        'cells': n,
+        'hours': HOURS_PER_WEEK,
+        'dtype': 'float16',
+        'model_version': predictor.version,
+        'built_at': time.time()
+    }
+    index_tmp = f"{_index_path(path)}.tmp"
+    with open(index_tmp, 'w') as f:
+        json.dump(index, f, indent=2)
+    os.replace(index_tmp, _index_path(path))
+    logger.info(f"Congestion tensor: {n} cells x {HOURS_PER_WEEK} hours in {time.perf_counter() - start:.1f}s -> {path}")
+    return index
+
+
+_tensor = None
+_tensor_mtime = None
+_tensor_missing_logged = None
+_tensor_lock = threading.Lock()
+
+
+def get_congestion_tensor():
+    """Tensor at CONGESTION_TENSOR_PATH, reloaded when the nightly build replaces it; None if not built"""
+    global _tensor, _tensor_mtime, _tensor_missing_logged
+    path = Config.CONGESTION_TENSOR_PATH
+    if not path:
+        return None
+    try:
+        mtime = os.stat(_index_path(path)).st_mtime_ns
+    except OSError:
+        if _tensor_missing_logged != path:
+            # once per path: busiest-hours silently runs the model until the nightly build lands
+            logger.warning(f"No congestion tensor at {path}; busiest-hours will run the model")
+            _tensor_missing_logged = path
+        return None
+    if mtime == _tensor_mtime:
+        return _tensor
+    with _tensor_lock:
+        if mtime != _tensor_mtime:
+            try:
+                _tensor = CongestionTensor.load(path)
+            except Exception as e:
+                logger.error(f"Error loading congestion tensor from {path}: {e}")
+                _tensor = None
+            _tensor_mtime = mtime
+        return _tensor
@@ -111,10 +111,17 @@ class DataProcessor:
     @staticmethod
     def generate_mobility_patterns(traffic_flow, incidents, pois):
         """Generate comprehensive mobility patterns from multiple data sources"""
+        return DataProcessor.mobility_patterns_from_counts(
+            traffic_flow.get('congestion_level', 'unknown'), len(incidents), len(pois)
+        )
+    
+    @staticmethod
+    def mobility_patterns_from_counts(congestion, incident_count, poi_count):
+        """Mobility patterns from the summary values they depend on (used by the area grid)"""
         patterns = {
-            'congestion_status': traffic_flow.get('congestion_level', 'unknown'),
-            'incident_impact': 'high' if len(incidents) > 5 else 'low' if len(incidents) > 0 else 'none',
-            'area_activity': 'high' if len(pois) > 50 else 'moderate' if len(pois) > 20 else 'low'
+            'congestion_status': congestion,
+            'incident_impact': 'high' if incident_count > 5 else 'low' if incident_count > 0 else 'none',
+            'area_activity': 'high' if poi_count > 50 else 'moderate' if poi_count > 20 else 'low'
         }
         
         # Generate area description
@@ -137,12 +144,12 @@ class DataProcessor:
         else:
             descriptions.append("Quiet residential or suburban area")
         
-        if len(incidents) > 0:
-            descriptions.append(f"{len(incidents)} active traffic incidents affecting mobility")
+        if incident_count > 0:
+            descriptions.append(f"{incident_count} active traffic incidents affecting mobility")
         
         patterns['description'] = '. '.join(descriptions)
         patterns['mobility_score'] = DataProcessor._calculate_mobility_score(
-            congestion, len(incidents), activity
+            congestion, incident_count, activity
         )
         
         return patterns
@@ -161,6 +168,20 @@ class DataProcessor:
         categories = Counter([poi.get('category', 'Unknown') for poi in pois])
         top_categories = [cat[0] for cat in categories.most_common(3)]
         
+        return DataProcessor.classify_from_summary(
+            top_categories, len(pois), traffic_flow.get('congestion_level', 'unknown')
+        )
+    
+    @staticmethod
+    def classify_from_summary(top_categories, poi_count, congestion):
+        """Area classification from the summary values it depends on (used by the area grid)"""
+        if not poi_count:
+            return {
+                'primary_type': 'Unknown',
+                'characteristics': [],
+                'suitable_for': []
+            }
+        
         # Determine area type
         area_type = 'Mixed-use'
         characteristics = []
@@ -195,7 +216,6 @@ class DataProcessor:
             suitable_for.append('Evening entertainment')
         
         # Add traffic characteristics
-        congestion = traffic_flow.get('congestion_level', 'unknown')
         if congestion in ['low']:
             characteristics.append('Low traffic - quiet area')
             suitable_for.append('Evening walks')
@@ -208,7 +228,7 @@ class DataProcessor:
             'suitable_for': suitable_for,
             'dominant_categories': top_categories,
             'traffic_level': congestion,
-            'poi_count': len(pois)
+            'poi_count': poi_count
         }
     
     @staticmethod
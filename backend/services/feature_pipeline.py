@@ -0,0 +1,142 @@
+"""
+Feature pipeline
+One versioned, vectorized transform from raw input columns to the model's
+feature matrix, shared by training, batch scoring and online prediction
+and saved next to each model artifact
+"""
+
+import json
+import os
+
+import numpy as np
+
+FEATURE_VERSION = 1
+
+# Raw input columns: accepted aliases and the value used when a column is missing
+RAW_COLUMNS = {
+    'hour': (('hour_of_day',), 12),
+    'day_of_week': ((), 0),
+    'lat': (('latitude',), 0.0),
+    'lon': (('longitude', 'lng'), 0.0),
+    'month': ((), 1),
+    'poi_density': ((), 0),
+    'previous_traffic': ((), 50)
+}
+
+
+def _is_weekend(c):
+    return c['day_of_week'] >= 5
+
+
+def _is_peak_hour(c):
+    hour = c['hour']
+    return (((hour >= 7) & (hour <= 9)) | ((hour >= 17) & (hour <= 19))) & ~_is_weekend(c)
+
+
+# Feature name -> function of the raw columns (all arrays of the same length)
+FEATURES = {
+    'hour': lambda c: c['hour'],
+    'day_of_week': lambda c: c['day_of_week'],
+    'lat': lambda c: c['lat'],
+    'lon': lambda c: c['lon'],
+    'is_weekend': _is_weekend,
+    'is_peak_hour': _is_peak_hour,
+    'month': lambda c: c['month'],
+    'poi_density': lambda c: c['poi_density'],
+    'previous_traffic': lambda c: c['previous_traffic']
+}
+
+# Layout of the core model (and its saved scaler)
+DEFAULT_FEATURES = ['hour', 'day_of_week', 'lat', 'lon', 'is_weekend', 'is_peak_hour']
+# The core trainer fits congestion_level in 0-1, so its models (including
+# artifacts saved without a pipeline spec) need scaling to a percentage
+DEFAULT_TARGET_SCALE = 100.0
+
+
+class FeaturePipeline:
+    """
+    Ordered feature list plus a version; transform() turns raw columns into the model matrix
+
+    target_scale converts model output to a 0-100 congestion percentage
+    (100 for models trained on 0-1 congestion levels, 1 for models trained
+    on percentages).
+    """
+
+    def __init__(self, features=None, version=FEATURE_VERSION, target_scale=DEFAULT_TARGET_SCALE):
+        self.features = list(features or DEFAULT_FEATURES)
+        unknown = [f for f in self.features if f not in FEATURES]
+        if unknown:
+            raise ValueError(f"Unknown features: {unknown}")
+        self.version = version
+        self.target_scale = float(target_scale)
+
+    def __len__(self):
+        return len(self.features)
+
+    def __eq__(self, other):
+        return isinstance(other, FeaturePipeline) and self.to_dict() == other.to_dict()
+
+    def columns(self, data):
+        """
+        Raw columns as float arrays of equal length
+
+        data: a DataFrame, a dict of column arrays / scalars, or a list of
+        per-row dicts. Aliases (hour_of_day, latitude, ...) are accepted and
+        missing columns get their defaults.
+        """
+        if isinstance(data, (list, tuple)):
+            rows = data
+            data = {}
+            for name, (aliases, default) in RAW_COLUMNS.items():
+                keys = (name,) + aliases
+                data[name] = [next((row[k] for k in keys if row.get(k) is not None), default) for row in rows]
+            n = len(rows)
+        else:
+            n = None
+
+        columns = {}
+        for name, (aliases, default) in RAW_COLUMNS.items():
+            key = next((k for k in (name,) + aliases if k in data), None)
+            if key is not None:
+                columns[name] = np.asarray(data[key], dtype=np.float64)
+                if columns[name].ndim and n is None:
+                    n = len(columns[name])
+        n = 1 if n is None else n
+        for name, (aliases, default) in RAW_COLUMNS.items():
+            value = columns.get(name, default)
+            columns[name] = np.broadcast_to(np.asarray(value, dtype=np.float64), (n,))
+        return columns
+
+    def transform(self, data):
+        """(n, len(features)) float64 matrix in feature order"""
+        columns = data if _is_column_dict(data) else self.columns(data)
+        return np.column_stack([np.asarray(FEATURES[f](columns), dtype=np.float64) for f in self.features])
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def to_dict(self):
+        return {'version': self.version, 'features': self.features, 'target_scale': self.target_scale}
+
+    @classmethod
+    def from_dict(cls, spec):
+        return cls(spec['features'], spec.get('version', FEATURE_VERSION), spec.get('target_scale', DEFAULT_TARGET_SCALE))
+
+    def save(self, path):
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def _is_column_dict(data):
+    """Already the output of columns(): every raw column present as a 1-D float array"""
+    return isinstance(data, dict) and all(
+        isinstance(data.get(name), np.ndarray) and data[name].dtype == np.float64 and data[name].ndim == 1
+        for name in RAW_COLUMNS)
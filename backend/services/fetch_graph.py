@@ -0,0 +1,77 @@
+"""
+Fetch graph
+Runs a handler's independent upstream calls concurrently under one shared
+deadline; calls that need another call's result start as soon as it lands
+"""
+
+import time
+import logging
+from concurrent.futures import wait, FIRST_COMPLETED
+
+from services.upstream import get_executor
+
+logger = logging.getLogger(__name__)
+
+
+class FetchGraph:
+    """
+    Small dependency-aware set of fetches
+
+    add() registers a named call; names listed in `after` must finish first
+    and their results are passed to the call as keyword arguments. run()
+    never raises for a failed or late call: its name is reported in
+    `errors` and dependents of it are skipped.
+    """
+
+    def __init__(self, deadline, executor=None):
+        self.deadline = deadline
+        self.executor = executor or get_executor()
+        self._nodes = {}
+
+    def add(self, name, func, *args, after=(), **kwargs):
+        for dep in after:
+            if dep not in self._nodes:
+                raise ValueError(f"'{name}' depends on unknown fetch '{dep}'")
+        self._nodes[name] = (func, args, kwargs, tuple(after))
+        return self
+
+    def run(self):
+        """Returns (results, errors): results by name, error message by name for failed/skipped/late calls"""
+        end = time.monotonic() + self.deadline
+        results, errors = {}, {}
+        pending = dict(self._nodes)
+        running = {}
+
+        def start_ready():
+            for name in list(pending):
+                func, args, kwargs, after = pending[name]
+                failed = [d for d in after if d in errors]
+                if failed:
+                    errors[name] = f"skipped: {', '.join(failed)} failed"
+                    del pending[name]
+                elif all(d in results for d in after):
+                    deps = {d: results[d] for d in after}
+                    running[self.executor.submit(func, *args, **kwargs, **deps)] = name
+                    del pending[name]
+
+        start_ready()
+        while running:
+            done, _ = wait(running, timeout=max(0.0, end - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    logger.warning(f"Fetch '{name}' failed: {e}")
+                    errors[name] = str(e)
+            start_ready()
+
+        # deadline reached: drop what has not finished (running calls complete in the background)
+        for future, name in running.items():
+            future.cancel()
+            errors[name] = 'deadline exceeded'
+        for name in pending:
+            errors[name] = 'deadline exceeded'
+        return results, errors
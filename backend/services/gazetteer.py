@@ -0,0 +1,290 @@
+"""
+Offline gazetteer
+Local place-name index (exact, prefix and trigram-filtered fuzzy matching)
+built from cached geocode results and an importable place list
+"""
+
+import bisect
+import csv
+import re
+import threading
+import unicodedata
+import logging
+from collections import defaultdict, OrderedDict
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+_NUMBER = re.compile(r"\d+")
+
+
+def normalize_name(text):
+    """Canonical form used for every index key"""
+    text = unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode('ascii')
+    text = _PUNCTUATION.sub(' ', text.lower())
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _numbers(key):
+    """Digit runs in a key ("sector 18", "gate 2"); fuzzy matches must keep them exactly"""
+    return _NUMBER.findall(key)
+
+
+def bounded_edit_distance(a, b, max_distance):
+    """Levenshtein distance, or max_distance + 1 as soon as it is exceeded"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if len(a) > len(b):
+        a, b = b, a
+    previous = list(range(len(a) + 1))
+    for j, cb in enumerate(b, 1):
+        current = [j] + [0] * len(a)
+        row_min = j
+        for i, ca in enumerate(a, 1):
+            current[i] = min(previous[i] + 1, current[i - 1] + 1, previous[i - 1] + (ca != cb))
+            row_min = min(row_min, current[i])
+        if row_min > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def default_max_distance(query):
+    """Edit budget scaled to query length so short names never fuzz into others"""
+    if len(query) < 4:
+        return 0
+    if len(query) < 8:
+        return 1
+    return 2
+
+
+class Gazetteer:
+    """Place-name index answering lookups without going upstream"""
+
+    def __init__(self, max_learned=None):
+        self._places = {}                    # place id -> record (ids are never reused)
+        self._next_id = 0
+        self._exact = {}                     # normalized name/alias -> place id
+        self._keys = defaultdict(list)       # place id -> its normalized name/alias keys
+        self._names = []                     # sorted normalized keys (prefix search)
+        self._trigram_index = defaultdict(set)
+        self._learned = OrderedDict()        # ids of places learned upstream, least recently used first
+        self.max_learned = max_learned       # None = unbounded; seeded places are never evicted
+        self._listeners = []                 # called with each newly added place
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._places)
+
+    def add(self, name, lat, lon, address='', place_type='', aliases=(), popularity=0, learned=False):
+        """
+        Add a place (or new aliases for an existing one); returns its id
+
+        A name seen again takes the new coordinates, except that an upstream
+        answer (learned=True) never moves a seeded place. Learned places are
+        capped at max_learned, least recently used evicted first.
+        """
+        key = normalize_name(name) if name else ''
+        if not key or lat is None or lon is None:
+            return None
+        with self._lock:
+            idx = self._exact.get(key)
+            if idx is None:
+                idx = self._next_id
+                self._next_id += 1
+                self._places[idx] = {
+                    'name': name,
+                    'lat': float(lat),
+                    'lon': float(lon),
+                    'address': address or name,
+                    'type': place_type or 'unknown',
+                    'popularity': popularity
+                }
+                self._index_key(key, idx)
+                if learned:
+                    self._learned[idx] = True
+                for listener in self._listeners:
+                    listener(dict(self._places[idx]))
+            else:
+                place = self._places[idx]
+                place['popularity'] = max(place['popularity'], popularity)
+                if not learned or idx in self._learned:
+                    place['lat'], place['lon'] = float(lat), float(lon)
+                    if address:
+                        place['address'] = address
+                if idx in self._learned:
+                    if learned:
+                        self._learned.move_to_end(idx)
+                    else:
+                        del self._learned[idx]       # re-seeded: no longer evictable
+            for alias in aliases:
+                alias_key = normalize_name(alias)
+                if alias_key and alias_key not in self._exact:
+                    self._index_key(alias_key, idx)
+            self._evict()
+            return idx
+
+    def places(self):
+        """Snapshot of every known place"""
+        with self._lock:
+            return [dict(p) for p in self._places.values()]
+
+    def subscribe(self, listener):
+        """Register a callback for places added from now on"""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def _index_key(self, key, idx):
+        self._exact[key] = idx
+        self._keys[idx].append(key)
+        bisect.insort(self._names, key)
+        for gram in _trigrams(key):
+            self._trigram_index[gram].add(key)
+
+    def _evict(self):
+        """Drop least recently used learned places beyond max_learned (lock held)"""
+        while self.max_learned and len(self._learned) > self.max_learned:
+            idx, _ = self._learned.popitem(last=False)
+            for key in self._keys.pop(idx, ()):
+                del self._exact[key]
+                del self._names[bisect.bisect_left(self._names, key)]
+                for gram in _trigrams(key):
+                    keys = self._trigram_index[gram]
+                    keys.discard(key)
+                    if not keys:
+                        del self._trigram_index[gram]
+            del self._places[idx]
+
+    def _result(self, key, match, distance=0):
+        idx = self._exact[key]
+        if idx in self._learned:
+            self._learned.move_to_end(idx)
+        place = dict(self._places[idx])
+        place['id'] = idx
+        place['match'] = match
+        place['distance'] = distance
+        return place
+
+    def exact(self, query):
+        key = normalize_name(query)
+        with self._lock:
+            if key in self._exact:
+                return self._result(key, 'exact')
+        return None
+
+    def prefix(self, query, limit=10):
+        """Places whose name or alias starts with the query, most popular first"""
+        key = normalize_name(query)
+        if not key:
+            return []
+        with self._lock:
+            start = bisect.bisect_left(self._names, key)
+            end = bisect.bisect_left(self._names, key + '\uffff')
+            seen, results = set(), []
+            for name_key in self._names[start:end]:
+                idx = self._exact[name_key]
+                if idx not in seen:
+                    seen.add(idx)
+                    results.append(self._result(name_key, 'prefix'))
+        results.sort(key=lambda p: -p['popularity'])
+        return results[:limit]
+
+    def fuzzy(self, query, max_distance=None, limit=5):
+        """
+        Places within max_distance edits, nearest then most popular first
+
+        Edits never change numbers: "Sector 18" does not match "Sector 15".
+        """
+        key = normalize_name(query)
+        if not key:
+            return []
+        if max_distance is None:
+            max_distance = default_max_distance(key)
+        grams = _trigrams(key)
+        # q-gram lemma: each edit destroys at most 3 trigrams
+        min_shared = len(grams) - 3 * max_distance
+        numbers = _numbers(key)
+
+        with self._lock:
+            counts = defaultdict(int)
+            for gram in grams:
+                for candidate in self._trigram_index.get(gram, ()):
+                    counts[candidate] += 1
+            matches = {}
+            for candidate, shared in counts.items():
+                if shared < min_shared or _numbers(candidate) != numbers:
+                    continue
+                distance = bounded_edit_distance(key, candidate, max_distance)
+                if distance <= max_distance:
+                    idx = self._exact[candidate]
+                    if idx not in matches or distance < matches[idx][0]:
+                        matches[idx] = (distance, candidate)
+            results = [self._result(candidate, 'fuzzy', distance)
+                       for distance, candidate in matches.values()]
+        results.sort(key=lambda p: (p['distance'], -p['popularity']))
+        return results[:limit]
+
+    def lookup(self, query):
+        """
+        Best local match for a place name: exact, then an unambiguous fuzzy match
+
+        None when nothing (or more than one place equally) matches, so the
+        caller asks the upstream geocoder. Prefix matches are only offered
+        as suggestions (prefix()), never taken as an answer.
+        """
+        place = self.exact(query)
+        if place:
+            return place
+        matches = self.fuzzy(query, limit=2)
+        if matches and (len(matches) == 1 or matches[0]['distance'] < matches[1]['distance']):
+            return matches[0]
+        return None
+
+    def remember(self, query, lat, lon, address='', place_type=''):
+        """Cache an upstream geocode answer under the query text and its address"""
+        name = address or query
+        with self._lock:
+            idx = self.add(name, lat, lon, address=address, place_type=place_type, aliases=[query], learned=True)
+            if idx is not None:
+                self._places[idx]['popularity'] += 1
+        return idx
+
+    def import_csv(self, path):
+        """Import a place list with name, lat, lon[, address, type, aliases(|-separated), popularity]"""
+        added = 0
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                aliases = [a for a in (row.get('aliases') or '').split('|') if a]
+                idx = self.add(row.get('name'), row.get('lat'), row.get('lon'),
+                               address=row.get('address', ''), place_type=row.get('type', ''),
+                               aliases=aliases, popularity=int(row.get('popularity') or 0))
+                if idx is not None:
+                    added += 1
+        logger.info(f"Imported {added} places from {path}")
+        return added
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer():
+    """Process-wide gazetteer, seeded from GAZETTEER_PATH on first use"""
+    global _gazetteer
+    with _gazetteer_lock:
+        if _gazetteer is None:
+            _gazetteer = Gazetteer(max_learned=Config.GAZETTEER_MAX_LEARNED or None)
+            if Config.GAZETTEER_PATH:
+                try:
+                    _gazetteer.import_csv(Config.GAZETTEER_PATH)
+                except Exception as e:
+                    logger.error(f"Error importing gazetteer from {Config.GAZETTEER_PATH}: {e}")
+        return _gazetteer
@@ -5,20 +5,56 @@ Uses trained models to predict traffic patterns
 
 import pickle
 import os
+import bisect
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
+import threading
+import time
+from collections import namedtuple
 import joblib
+from config import Config
+from services.compiled_forest import CompiledForest
+from services.feature_pipeline import FeaturePipeline, RAW_COLUMNS
+from services.model_registry import get_model_registry
+from services.congestion_tensor import get_congestion_tensor
+from utils.cache import LRUCache, get_cache
+
+TRAFFIC_LEVELS = np.array(['very_light', 'light', 'moderate', 'heavy', 'very_heavy'])
+LEVEL_BOUNDS = [25, 50, 75, 90]                     # prediction < bound -> level below it
+LEVEL_PERCENTAGES = np.array([20, 40, 60, 80, 95])  # per TRAFFIC_LEVELS entry
+
+# Step each raw column is snapped to before single-row prediction and memoization (others: 1)
+PREDICTION_QUANTA = {
+    'lat': Config.PREDICTION_CACHE_CELL_DEG,
+    'lon': Config.PREDICTION_CACHE_CELL_DEG,
+    'poi_density': 5,
+    'previous_traffic': 5
+}
+
+# Everything a prediction needs, swapped in one assignment so a reload never mixes versions
+ServingModel = namedtuple('ServingModel', ['model', 'scaler', 'compiled', 'trained', 'version', 'pipeline'])
 
 class MLPredictor:
     """Machine learning predictions for traffic patterns"""
     
-    def __init__(self, model_path=None):
-        self.model = None
-        self.scaler = StandardScaler()
-        self.is_trained = False
+    def __init__(self, model_path=None, registry=None, tensor_source=None, memo=None):
+        self._serving = ServingModel(None, StandardScaler(), None, False, None, FeaturePipeline())
+        # with a registry, artifacts are memory-mapped on the first prediction instead of here
+        self.registry = registry
+        self._registry_loaded = registry is None
+        self._load_lock = threading.Lock()
+        self._active_spec = None      # registry pointer of the serving version
+        self._rejected_key = None     # pointer that failed validation, not retried until it changes
+        self._watcher = None
+        # callable returning the precomputed hour-of-week CongestionTensor (or None)
+        self.tensor_source = tensor_source
+        # single-row predictions by quantized features; emptied whenever the serving model changes
+        self.memo = memo if memo is not None else LRUCache('ml.predictions', max_entries=Config.PREDICTION_CACHE_MAX_ENTRIES)
+        # (serving model the memo was filled from, generation keying its entries)
+        self._memo_state = (None, 0)
         
         if model_path and os.path.exists(model_path):
             self.load_model(model_path)
@@ -26,25 +62,157 @@ class MLPredictor:
             # Initialize with a simple model if no saved model exists
             self._initialize_default_model()
     
+    @property
+    def model(self):
+        return self._serving.model
+    
+    @model.setter
+    def model(self, value):
+        self._serving = self._serving._replace(model=value)
+    
+    @property
+    def scaler(self):
+        return self._serving.scaler
+    
+    @scaler.setter
+    def scaler(self, value):
+        self._serving = self._serving._replace(scaler=value)
+    
+    @property
+    def compiled(self):
+        return self._serving.compiled
+    
+    @compiled.setter
+    def compiled(self, value):
+        self._serving = self._serving._replace(compiled=value)
+    
+    @property
+    def is_trained(self):
+        return self._serving.trained
+    
+    @property
+    def version(self):
+        return self._serving.version
+    
+    @property
+    def pipeline(self):
+        return self._serving.pipeline
+    
     def load_model(self, model_path):
         """Load a trained ML model"""
         try:
             with open(model_path, 'rb') as f:
                 model_data = pickle.load(f)
-                self.model = model_data['model']
-                self.scaler = model_data['scaler']
-                self.is_trained = True
+            model, scaler = model_data['model'], model_data['scaler']
+            pipeline = FeaturePipeline.from_dict(model_data['pipeline']) if 'pipeline' in model_data else FeaturePipeline()
+            self._serving = ServingModel(model, scaler, self._compile(model, scaler), True, None, pipeline)
             print("Model loaded successfully")
         except Exception as e:
             print(f"Error loading model: {e}")
             self._initialize_default_model()
     
+    def load_from_registry(self):
+        """
+        Load the version the registry currently points to
+        
+        Prefers the compiled forest saved next to the model, whose memory-mapped
+        arrays are used as-is; otherwise the sklearn model is loaded and compiled.
+        """
+        with self._load_lock:
+            if self._registry_loaded:
+                return self.is_trained
+            self._registry_loaded = True
+            spec = self.registry.current()
+            try:
+                self._serving = self._load_version(spec)
+                self._active_spec = spec
+            except Exception as e:
+                print(f"Error loading model from registry: {e}")
+            return self.is_trained
+    
+    def reload_if_changed(self):
+        """
+        Swap in the version the registry pointer names, if it changed
+        
+        The new artifacts are checksummed, loaded and run on a smoke batch
+        before the swap; predictions keep using the old version until then.
+        Returns True if a new version is now serving.
+        """
+        pointer = self.registry.read_pointer()
+        if not pointer:
+            return False
+        key = _pointer_key(pointer)
+        with self._load_lock:
+            if self._active_spec is not None and key == _pointer_key(self._active_spec):
+                return False
+            if key == self._rejected_key:
+                return False
+            try:
+                candidate = self._load_version(pointer)
+            except Exception as e:
+                print(f"Rejected model version {pointer.get('version')}: {e}")
+                self._rejected_key = key
+                return False
+            previous, self._active_spec = self._active_spec, pointer
+            self._serving = candidate
+            self._registry_loaded = True
+        if previous:
+            # in-flight predictions still hold the old arrays; the registry just stops caching them
+            for name in set(_artifact_names(previous)) - set(_artifact_names(pointer)):
+                self.registry.release(name)
+        print(f"Model version {candidate.version} now serving")
+        return True
+    
+    def start_watching(self, interval=None):
+        """Background thread checking the registry pointer every `interval` seconds"""
+        if self._watcher is not None or self.registry is None:
+            return self._watcher
+        interval = interval or Config.MODEL_RELOAD_INTERVAL
+        
+        def _run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.reload_if_changed()
+                except Exception as e:
+                    print(f"Error checking for a new model version: {e}")
+        
+        self._watcher = threading.Thread(target=_run, name='model-watcher', daemon=True)
+        self._watcher.start()
+        return self._watcher
+    
+    def _load_version(self, spec):
+        """Verified, smoke-tested ServingModel for a registry pointer (raises if unusable)"""
+        self.registry.verify(spec)
+        # artifacts saved before feature specs existed use the core layout
+        if spec.get('features') and self.registry.has(spec['features']):
+            pipeline = FeaturePipeline.from_dict(self.registry.get(spec['features']))
+        else:
+            pipeline = FeaturePipeline()
+        scaler = self.registry.get(spec['scaler'])
+        if getattr(scaler, 'n_features_in_', len(pipeline)) != len(pipeline):
+            raise ValueError(f"scaler expects {scaler.n_features_in_} features, pipeline builds {len(pipeline)}")
+        if spec.get('compiled') and self.registry.has(spec['compiled']):
+            model, compiled = None, self.registry.get(spec['compiled'])
+        else:
+            model = self.registry.get(spec['model'])
+            compiled = self._compile(model, scaler)
+        candidate = ServingModel(model, scaler, compiled, True, spec.get('version'), pipeline)
+        
+        # smoke batch: every hour of a default row; also faults the mapped pages in before the swap
+        X = pipeline.transform({'hour': np.arange(24)})
+        predictions = np.asarray(self._raw_predict(candidate, X))
+        if predictions.shape != (24,) or not np.isfinite(predictions).all():
+            raise ValueError(f"smoke batch gave invalid predictions {predictions!r}")
+        return candidate
+    
     def save_model(self, model_path):
         """Save the current model"""
         try:
             model_data = {
                 'model': self.model,
-                'scaler': self.scaler
+                'scaler': self.scaler,
+                'pipeline': self.pipeline.to_dict()
             }
             with open(model_path, 'wb') as f:
                 pickle.dump(model_data, f)
@@ -54,31 +222,117 @@ class MLPredictor:
     
     def predict_traffic(self, features):
         """Predict traffic conditions"""
-        if not self.is_trained:
-            return self._default_prediction(features)
+        return self._level(self._predict_one(features))
+    
+    def _predict_one(self, features):
+        """
+        Congestion for one feature dict, memoized
+        
+        The raw columns are snapped to PREDICTION_QUANTA (about a 1 km cell,
+        whole hours / weekdays / months) and the snapped row is what gets
+        predicted, so a cached answer is exactly what the model would return.
+        """
+        if not self._registry_loaded:
+            self.load_from_registry()
+        serving = self._serving
+        row = self._quantize(features)
+        if Config.PREDICTION_CACHE_MAX_ENTRIES <= 0:
+            return float(self._congestion(serving, [row])[0])
+        # keyed on a generation bumped per serving model rather than its version (None
+        # for an in-process train), so a predict that started before a swap writes
+        # under the old generation and is never read back
+        memo_serving, generation = self._memo_state
+        if serving is not memo_serving:
+            self.memo.clear()
+            generation += 1
+            self._memo_state = (serving, generation)
+        
+        key = (generation,) + tuple(row.values())
+        congestion = self.memo.get(key)
+        if congestion is None:
+            congestion = float(self._congestion(serving, [row])[0])
+            self.memo.set(key, congestion)
+        return congestion
+    
+    @staticmethod
+    def _quantize(features):
+        """Raw columns of a feature dict (aliases resolved, defaults filled) snapped to PREDICTION_QUANTA"""
+        row = {}
+        for name, (aliases, default) in RAW_COLUMNS.items():
+            value = next((features[k] for k in (name,) + aliases if features.get(k) is not None), default)
+            step = PREDICTION_QUANTA.get(name, 1)
+            row[name] = round(round(float(value) / step) * step, 6)
+        return row
+    
+    @staticmethod
+    def _level(congestion):
+        """Traffic level for one congestion value (scalar np.digitize over LEVEL_BOUNDS)"""
+        return str(TRAFFIC_LEVELS[bisect.bisect_right(LEVEL_BOUNDS, congestion)])
+    
+    def cache_stats(self):
+        """Hit / miss counters of the prediction memo"""
+        return self.memo.stats()
+    
+    def predict_batch(self, rows):
+        """
+        Predict traffic for many feature rows with one transform and one predict
+        
+        rows: per-row feature dicts, a dict of column arrays / scalars or a DataFrame
+        (raw columns, see FeaturePipeline.columns), or an already transformed matrix.
+        Returns (levels, congestion percentages) as arrays of length n.
+        """
+        index = np.digitize(self.predict_congestion(rows), LEVEL_BOUNDS)
+        return TRAFFIC_LEVELS[index], LEVEL_PERCENTAGES[index]
+    
+    def predict_congestion(self, rows):
+        """Raw 0-100 congestion prediction per row (rows as for predict_batch)"""
+        if not self._registry_loaded:
+            self.load_from_registry()
+        # read once: a concurrent reload replaces the whole tuple
+        return self._congestion(self._serving, rows)
+    
+    def _congestion(self, serving, rows):
+        """predict_congestion against one ServingModel"""
+        if isinstance(rows, np.ndarray):
+            X = np.atleast_2d(rows.astype(np.float64, copy=False))
+            features = serving.pipeline.features
+            hours = X[:, features.index('hour')] if 'hour' in features else np.full(len(X), 12.0)
+        else:
+            columns = serving.pipeline.columns(rows)
+            X = serving.pipeline.transform(columns)
+            hours = columns['hour']
+        if not serving.trained:
+            return self._default_congestion(hours)
         
         try:
-            # Prepare features for prediction
-            feature_array = self._prepare_features(features)
-            prediction = self.model.predict(feature_array)
-            return self._interpret_prediction(prediction[0])
+            return self._raw_predict(serving, X) * serving.pipeline.target_scale
         except Exception as e:
             print(f"Error in traffic prediction: {e}")
-            return self._default_prediction(features)
+            return self._default_congestion(hours)
+    
+    @staticmethod
+    def _raw_predict(serving, X):
+        """Model output for a feature matrix"""
+        if serving.compiled is not None:
+            # same arithmetic as StandardScaler.transform + model.predict, without sklearn's per-call overhead
+            return serving.compiled.predict((X - serving.scaler.mean_) / serving.scaler.scale_)
+        return serving.model.predict(serving.scaler.transform(X))
     
     def predict_busiest_hours(self, location, date):
-        """Predict busiest hours for a location"""
+        """Predict busiest hours for a location, from the congestion tensor when it covers the location"""
         try:
-            # Generate predictions for each hour of the day
-            hours_predictions = []
-            for hour in range(24):
-                features = self._create_time_features(location, date, hour)
-                traffic_level = self.predict_traffic(features)
-                hours_predictions.append({
-                    'hour': hour,
-                    'traffic_level': traffic_level,
-                    'congestion_percentage': self._traffic_to_percentage(traffic_level)
-                })
+            congestion = self._tensor_day(location, date)
+            source = 'tensor'
+            if congestion is None:
+                # Predict all 24 hours of the day in one batch
+                columns = dict(self._create_time_features(location, date, 0), hour_of_day=np.arange(24))
+                congestion = self.predict_congestion(columns)
+                source = 'model'
+            index = np.digitize(congestion, LEVEL_BOUNDS)
+            hours_predictions = [
+                {'hour': hour, 'traffic_level': str(level), 'congestion_percentage': int(percentage)}
+                for hour, (level, percentage) in enumerate(zip(TRAFFIC_LEVELS[index], LEVEL_PERCENTAGES[index]))
+            ]
             
             # Sort by congestion level
             hours_predictions.sort(key=lambda x: x['congestion_percentage'], reverse=True)
@@ -88,12 +342,24 @@ class MLPredictor:
                 'date': date,
                 'busiest_hours': hours_predictions[:3],  # Top 3 busiest hours
                 'quietest_hours': hours_predictions[-3:][::-1],  # Top 3 quietest hours
-                'daily_pattern': hours_predictions
+                'daily_pattern': hours_predictions,
+                'source': source
             }
         except Exception as e:
             print(f"Error predicting busiest hours: {e}")
             return None
     
+    def _tensor_day(self, location, date):
+        """24 hourly congestion values from the precomputed tensor; None if absent, stale or out of area"""
+        tensor = self.tensor_source() if self.tensor_source else None
+        if tensor is None:
+            return None
+        # built from another model version than the one now serving: trust the live model
+        if tensor.model_version and self.version and tensor.model_version != self.version:
+            return None
+        weekday = datetime.strptime(date, '%Y-%m-%d').weekday()
+        return tensor.day(location['lat'], location['lon'], weekday)
+    
     def predict_route_time(self, route, time):
         """Predict travel time for a route"""
         try:
@@ -120,25 +386,19 @@ class MLPredictor:
     def train_model(self, training_data):
         """Train the ML model with new data"""
         try:
-            X = []
-            y = []
+            # traffic_level is already a 0-100 percentage
+            pipeline = FeaturePipeline(self.pipeline.features, target_scale=1)
+            X_array = pipeline.transform(training_data)
+            y_array = np.array([data_point['traffic_level'] for data_point in training_data])
             
-            for data_point in training_data:
-                features = self._extract_features(data_point)
-                target = data_point['traffic_level']
-                X.append(features)
-                y.append(target)
-            
-            X_array = np.array(X)
-            y_array = np.array(y)
-            
-            # Scale features
-            X_scaled = self.scaler.fit_transform(X_array)
+            # Scale features (fresh objects, so predictions keep using the current model meanwhile)
+            scaler = StandardScaler()
+            X_scaled = scaler.fit_transform(X_array)
             
             # Train model
-            self.model = RandomForestRegressor(n_estimators=100, random_state=42)
-            self.model.fit(X_scaled, y_array)
-            self.is_trained = True
+            model = RandomForestRegressor(n_estimators=100, random_state=42)
+            model.fit(X_scaled, y_array)
+            self._serving = ServingModel(model, scaler, self._compile(model, scaler), True, None, pipeline)
             
             print("Model trained successfully")
             return True
@@ -148,23 +408,19 @@ class MLPredictor:
     
     def _initialize_default_model(self):
         """Initialize with a simple default model"""
-        self.model = RandomForestRegressor(n_estimators=50, random_state=42)
-        self.is_trained = False
-    
-    def _prepare_features(self, features):
-        """Prepare features for prediction"""
-        feature_list = [
-            features.get('hour_of_day', 12),
-            features.get('day_of_week', 0),
-            features.get('is_weekend', 0),
-            features.get('month', 1),
-            features.get('latitude', 0),
-            features.get('longitude', 0),
-            features.get('poi_density', 0),
-            features.get('previous_traffic', 50)
-        ]
-        
-        return self.scaler.transform([feature_list])
+        self._serving = ServingModel(RandomForestRegressor(n_estimators=50, random_state=42),
+                                     StandardScaler(), None, False, None, FeaturePipeline())
+    
+    @staticmethod
+    def _compile(model, scaler):
+        """Flattened forest for fast predictions, or None (sklearn predict is the fallback)"""
+        if getattr(scaler, 'mean_', None) is None or getattr(scaler, 'scale_', None) is None:
+            return None
+        try:
+            return CompiledForest.from_sklearn(model)
+        except Exception as e:
+            print(f"Model not compiled, using sklearn predict: {e}")
+            return None
     
     def _create_time_features(self, location, date, hour):
         """Create features for time-based prediction"""
@@ -205,30 +461,6 @@ class MLPredictor:
         # For now, return a simulated value based on urban/rural assumption
         return 75  # Default medium density
     
-    def _interpret_prediction(self, prediction):
-        """Convert numerical prediction to traffic level"""
-        if prediction < 25:
-            return 'very_light'
-        elif prediction < 50:
-            return 'light'
-        elif prediction < 75:
-            return 'moderate'
-        elif prediction < 90:
-            return 'heavy'
-        else:
-            return 'very_heavy'
-    
-    def _traffic_to_percentage(self, traffic_level):
-        """Convert traffic level to percentage"""
-        levels = {
-            'very_light': 20,
-            'light': 40,
-            'moderate': 60,
-            'heavy': 80,
-            'very_heavy': 95
-        }
-        return levels.get(traffic_level, 50)
-    
     def _traffic_to_time_multiplier(self, traffic_level):
         """Convert traffic level to time multiplier"""
         multipliers = {
@@ -249,27 +481,38 @@ class MLPredictor:
             base_confidence += 0.2  # Rush hours are more predictable
         return min(0.95, base_confidence)
     
-    def _default_prediction(self, features):
-        """Provide default prediction when model is not trained"""
-        hour = features.get('hour_of_day', 12)
-        
-        # Simple rule-based prediction
-        if 7 <= hour <= 9 or 17 <= hour <= 19:
-            return 'heavy'
-        elif 10 <= hour <= 16:
-            return 'moderate'
-        else:
-            return 'light'
-    
-    def _extract_features(self, data_point):
-        """Extract features from training data point"""
-        return [
-            data_point.get('hour_of_day', 12),
-            data_point.get('day_of_week', 0),
-            data_point.get('is_weekend', 0),
-            data_point.get('month', 1),
-            data_point.get('latitude', 0),
-            data_point.get('longitude', 0),
-            data_point.get('poi_density', 0),
-            data_point.get('previous_traffic', 50)
-        ]
\ No newline at end of file
+    def _default_congestion(self, hour):
+        """Rule-based congestion percentages for an array of hours, used while no model is trained"""
+        rush = ((hour >= 7) & (hour <= 9)) | ((hour >= 17) & (hour <= 19))
+        day = (hour >= 10) & (hour <= 16)
+        index = np.select([rush, day], [3, 2], default=1)   # heavy / moderate / light
+        return LEVEL_PERCENTAGES[index].astype(np.float64)
+
+
+def _artifact_names(spec):
+    return [spec[k] for k in ('model', 'scaler', 'compiled', 'features') if spec.get(k)]
+
+
+def _pointer_key(spec):
+    return spec.get('version'), tuple(sorted((spec.get('checksums') or {}).items()))
+
+
+_predictor = None
+_predictor_lock = threading.Lock()
+
+
+def get_predictor():
+    """
+    Process-wide predictor over the model registry
+
+    Call it from the serving process (not before a fork): the pointer
+    watcher is a thread and would not survive into forked workers.
+    """
+    global _predictor
+    with _predictor_lock:
+        if _predictor is None:
+            memo = get_cache('ml.predictions', max_entries=Config.PREDICTION_CACHE_MAX_ENTRIES, shared=False)
+            _predictor = MLPredictor(registry=get_model_registry(), tensor_source=get_congestion_tensor, memo=memo)
+            if Config.MODEL_RELOAD_INTERVAL > 0:
+                _predictor.start_watching()
+        return _predictor
@@ -0,0 +1,214 @@
+"""
+Model registry
+Loads saved model artifacts lazily, memory-mapping their arrays so every
+worker process serves from the same page-cache copy instead of holding its
+own unpickled forest
+"""
+
+import os
+import json
+import hashlib
+import threading
+import time
+import logging
+
+import joblib
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_EXTENSIONS = ('.joblib', '.pkl')
+
+
+def file_checksum(path):
+    """sha256 hex digest of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_pointer(model_dir, version, model, scaler, compiled=None, features=None, pointer_name=None):
+    """
+    Point the registry at a saved version (artifact file names inside model_dir)
+
+    Written last and atomically, so readers never see a pointer to files that
+    are still being written.
+    """
+    files = [name for name in (model, scaler, compiled, features) if name]
+    pointer = {
+        'version': version,
+        'model': model,
+        'scaler': scaler,
+        'compiled': compiled,
+        'features': features,
+        'checksums': {name: file_checksum(os.path.join(model_dir, name)) for name in files}
+    }
+    path = os.path.join(model_dir, pointer_name or Config.MODEL_POINTER)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(pointer, f, indent=2)
+    os.replace(tmp, path)
+    return pointer
+
+
+def _mapping_usage(path):
+    """
+    Resident / shared bytes of this process's mappings of `path` (Linux /proc/self/smaps)
+
+    Returns None where smaps is unavailable.
+    """
+    try:
+        with open('/proc/self/smaps') as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+    target = os.path.realpath(path)
+    usage = {'resident_bytes': 0, 'shared_bytes': 0}
+    current = False
+    for line in lines:
+        fields = line.split()
+        if not fields:
+            continue
+        if '-' in fields[0] and not fields[0].endswith(':'):
+            # mapping header: "start-end perms offset dev inode [path]"
+            current = ' '.join(fields[5:]) == target
+        elif current and fields[0] == 'Rss:':
+            usage['resident_bytes'] += int(fields[1]) * 1024
+        elif current and fields[0] in ('Shared_Clean:', 'Shared_Dirty:'):
+            usage['shared_bytes'] += int(fields[1]) * 1024
+    return usage
+
+
+class ModelRegistry:
+    """
+    Named model artifacts under one directory, loaded on first use
+
+    Artifacts must be written uncompressed (joblib.dump's default) for their
+    NumPy arrays to be memory-mapped; compressed or plain-pickle files still
+    load, just into private memory.
+    """
+
+    def __init__(self, model_dir, mmap_mode='r'):
+        self.model_dir = model_dir
+        self.mmap_mode = mmap_mode
+        self._artifacts = {}    # name -> loaded object
+        self._stats = {}        # name -> load info
+        self._lock = threading.Lock()
+        self._name_locks = {}
+
+    def path(self, name):
+        """File for an artifact name (exact, or with a known extension added); None if missing"""
+        candidates = [name] + [name + ext for ext in ARTIFACT_EXTENSIONS]
+        for candidate in candidates:
+            path = os.path.join(self.model_dir, candidate)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def read_pointer(self):
+        """The pointer file ({version, model, scaler, compiled, features, checksums}), or None without one"""
+        try:
+            with open(os.path.join(self.model_dir, Config.MODEL_POINTER)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def current(self):
+        """Artifacts to serve: the pointer's, else MODEL_NAME / SCALER_NAME"""
+        pointer = self.read_pointer()
+        if pointer:
+            return pointer
+        return {'version': None, 'model': Config.MODEL_NAME, 'scaler': Config.SCALER_NAME,
+                'compiled': f"{Config.MODEL_NAME}.forest", 'features': f"{Config.MODEL_NAME}.features.json",
+                'checksums': {}}
+
+    def verify(self, spec):
+        """Raise ValueError if a pointer's files are missing or do not match their checksums"""
+        for name, expected in (spec.get('checksums') or {}).items():
+            path = self.path(name)
+            if path is None:
+                raise ValueError(f"artifact '{name}' is missing")
+            if file_checksum(path) != expected:
+                raise ValueError(f"checksum mismatch for '{name}'")
+
+    def release(self, name):
+        """Stop caching an artifact (its mappings close once nothing references it)"""
+        self._artifacts.pop(name, None)
+        self._stats.pop(name, None)
+
+    def has(self, name):
+        return name in self._artifacts or self.path(name) is not None
+
+    def get(self, name):
+        """The loaded artifact, loading (memory-mapped) on first request; raises FileNotFoundError"""
+        artifact = self._artifacts.get(name)
+        if artifact is not None:
+            return artifact
+        with self._lock:
+            name_lock = self._name_locks.setdefault(name, threading.Lock())
+        with name_lock:
+            if name not in self._artifacts:
+                self._artifacts[name] = self._load(name)
+            return self._artifacts[name]
+
+    def _load(self, name):
+        path = self.path(name)
+        if path is None:
+            raise FileNotFoundError(f"No model artifact '{name}' in {self.model_dir}")
+        start = time.perf_counter()
+        if path.endswith('.json'):
+            # small specs (feature pipeline) saved next to the model
+            with open(path) as f:
+                artifact = json.load(f)
+        else:
+            artifact = joblib.load(path, mmap_mode=self.mmap_mode)
+        elapsed = time.perf_counter() - start
+        self._stats[name] = {
+            'path': path,
+            'file_bytes': os.path.getsize(path),
+            'load_seconds': round(elapsed, 4),
+            'loaded_at': time.time()
+        }
+        logger.info(f"Loaded model artifact '{name}' from {path} in {elapsed * 1000:.1f} ms")
+        return artifact
+
+    def preload(self, *names):
+        """
+        Load artifacts now, e.g. in the master before workers fork so they share the mappings
+
+        Empty names are skipped: a pointer for a model with no compiled form
+        has compiled None.
+        """
+        for name in names:
+            if not name:
+                continue
+            try:
+                self.get(name)
+            except Exception as e:
+                logger.error(f"Error preloading model artifact '{name}': {e}")
+
+    def stats(self):
+        """Load time, file size and current resident / shared size per loaded artifact"""
+        report = {}
+        for name, info in list(self._stats.items()):
+            entry = dict(info)
+            usage = _mapping_usage(info['path'])
+            if usage is not None:
+                entry.update(usage)
+            report[name] = entry
+        return report
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry():
+    """Process-wide registry over MODEL_DIR"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry(Config.MODEL_DIR)
+        return _registry
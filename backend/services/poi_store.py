@@ -0,0 +1,438 @@
+"""
+Local POI store
+Array-backed grid index plus a category inverted index, filled from upstream
+responses and bulk imports so radius/category queries can be answered locally
+"""
+
+import csv
+import math
+import threading
+import time
+import logging
+from collections import defaultdict
+
+import numpy as np
+from config import Config
+from services.gazetteer import normalize_name
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_M = 6371000.0
+METERS_PER_DEG_LAT = 111320.0
+POI_KEY_PRECISION = 4   # decimals of the coordinates in a POI's database key (~11 m)
+
+
+def _category_tokens(value):
+    """Index keys for a category / tag: the full lowercase string and its words"""
+    text = str(value).strip().lower()
+    if not text:
+        return set()
+    return {text} | set(text.replace('/', ' ').replace(',', ' ').split())
+
+
+class POIStore:
+    """In-memory spatial store of POIs with per-cell freshness tracking"""
+
+    def __init__(self, cell_size_deg=0.01, refresh_horizon=86400, initial_capacity=1024,
+                 max_pois=None, max_fetched=None):
+        self.cell_size = cell_size_deg
+        self.refresh_horizon = refresh_horizon
+        self.max_pois = max_pois                 # None = unbounded
+        self.max_fetched = max_fetched
+
+        self._lat = np.empty(initial_capacity, dtype=np.float64)
+        self._lon = np.empty(initial_capacity, dtype=np.float64)
+        self._count = 0
+        self._records = []
+        self._keys = {}                          # dedup key -> index
+        self._cells = defaultdict(list)          # (row, col) -> indices
+        self._by_category = defaultdict(set)     # category token -> indices
+        self._fetched = {}                       # (cell, category key) -> last upstream fetch
+        self._cell_touched = {}                  # cell -> last time POIs were added to it
+        self.evicted = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return self._count
+
+    # ------------------------------------------------------------------
+    # Grid helpers
+    # ------------------------------------------------------------------
+
+    def _cell_of(self, lat, lon):
+        return (int(math.floor(lat / self.cell_size)), int(math.floor(lon / self.cell_size)))
+
+    def _cell_bounds(self, cell):
+        row, col = cell
+        return (row * self.cell_size, col * self.cell_size,
+                (row + 1) * self.cell_size, (col + 1) * self.cell_size)
+
+    def cells_for(self, lat, lon, radius_m):
+        """Grid cells intersecting the circle around (lat, lon)"""
+        dlat = radius_m / METERS_PER_DEG_LAT
+        dlon = radius_m / (METERS_PER_DEG_LAT * max(math.cos(math.radians(lat)), 1e-6))
+        row_min, col_min = self._cell_of(lat - dlat, lon - dlon)
+        row_max, col_max = self._cell_of(lat + dlat, lon + dlon)
+
+        cells = []
+        for row in range(row_min, row_max + 1):
+            for col in range(col_min, col_max + 1):
+                min_lat, min_lon, max_lat, max_lon = self._cell_bounds((row, col))
+                # nearest point of the cell to the centre
+                near_lat = min(max(lat, min_lat), max_lat)
+                near_lon = min(max(lon, min_lon), max_lon)
+                if _haversine(lat, lon, near_lat, near_lon) <= radius_m:
+                    cells.append((row, col))
+        return cells
+
+    def _farthest(self, cell, lat, lon):
+        """Distance (m) from (lat, lon) to the farthest corner of a cell"""
+        min_lat, min_lon, max_lat, max_lon = self._cell_bounds(cell)
+        return max(_haversine(lat, lon, corner_lat, corner_lon)
+                   for corner_lat in (min_lat, max_lat) for corner_lon in (min_lon, max_lon))
+
+    def covering_circle(self, cells):
+        """Centre and radius (m) of a circle that fully contains the given cells"""
+        bounds = [self._cell_bounds(c) for c in cells]
+        center_lat = (min(b[0] for b in bounds) + max(b[2] for b in bounds)) / 2
+        center_lon = (min(b[1] for b in bounds) + max(b[3] for b in bounds)) / 2
+        radius = 0.0
+        for min_lat, min_lon, max_lat, max_lon in bounds:
+            for corner_lat, corner_lon in ((min_lat, min_lon), (min_lat, max_lon),
+                                           (max_lat, min_lon), (max_lat, max_lon)):
+                radius = max(radius, _haversine(center_lat, center_lon, corner_lat, corner_lon))
+        return center_lat, center_lon, radius
+
+    # ------------------------------------------------------------------
+    # Freshness
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _category_key(category):
+        return str(category).strip().lower() if category else '*'
+
+    def cold_cells(self, lat, lon, radius_m, category=None):
+        """Cells in the query circle never fetched (for this category) or older than the horizon"""
+        key = self._category_key(category)
+        cutoff = time.time() - self.refresh_horizon
+        with self._lock:
+            cold = []
+            for cell in self.cells_for(lat, lon, radius_m):
+                if self._fetched.get((cell, key), 0) < cutoff:
+                    cold.append(cell)
+            return cold
+
+    def covered_cells(self, cells, lat, lon, records, truncated):
+        """
+        The cells an upstream search around (lat, lon) really covered
+
+        A complete response covers all of them. One cut off at its result
+        limit only reaches its farthest result, so just the cells lying
+        entirely within that distance count as fetched; the rest stay cold.
+        """
+        if not truncated:
+            return list(cells)
+        reach = max((_haversine(lat, lon, r['latitude'], r['longitude']) for r in records
+                     if r.get('latitude') is not None and r.get('longitude') is not None), default=0.0)
+        return [cell for cell in cells if self._farthest(cell, lat, lon) <= reach]
+
+    def mark_fetched(self, cells, category=None):
+        key = self._category_key(category)
+        now = time.time()
+        with self._lock:
+            for cell in cells:
+                self._fetched.pop((cell, key), None)
+                self._fetched[(cell, key)] = now    # re-insert: dict order stays oldest first
+            if self.max_fetched and len(self._fetched) > self.max_fetched:
+                self._prune_fetched(now)
+
+    def _prune_fetched(self, now):
+        """Forget expired fetch stamps, then the oldest, down to max_fetched (lock held)"""
+        cutoff = now - self.refresh_horizon
+        self._fetched = {k: t for k, t in self._fetched.items() if t >= cutoff}
+        excess = len(self._fetched) - self.max_fetched
+        if excess > 0:
+            for k in list(self._fetched)[:excess]:
+                del self._fetched[k]
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def _grow(self):
+        capacity = len(self._lat) * 2
+        self._lat = np.resize(self._lat, capacity)
+        self._lon = np.resize(self._lon, capacity)
+
+    def add(self, name, lat, lon, category=None, categories=None, address='', tags=None, metadata=None):
+        """Insert or refresh a POI; returns its index (None if invalid)"""
+        if not name or lat is None or lon is None:
+            return None
+        lat, lon = float(lat), float(lon)
+        categories = list(categories or ([category] if category else []))
+        category = category or (categories[0] if categories else 'Unknown')
+        key = (name.strip().lower(), round(lat, 5), round(lon, 5))
+
+        with self._lock:
+            idx = self._keys.get(key)
+            if idx is None:
+                if self._count == len(self._lat):
+                    self._grow()
+                idx = self._count
+                self._lat[idx] = lat
+                self._lon[idx] = lon
+                self._records.append({
+                    'name': name,
+                    'category': category,
+                    'categories': categories,
+                    'latitude': lat,
+                    'longitude': lon,
+                    'address': address or '',
+                    'tags': [],
+                    'metadata': metadata or {}
+                })
+                self._keys[key] = idx
+                self._cells[self._cell_of(lat, lon)].append(idx)
+                self._count += 1
+            self._cell_touched[self._cell_of(lat, lon)] = time.time()
+            record = self._records[idx]
+
+            for tag in tags or []:
+                if tag and tag not in record['tags']:
+                    record['tags'].append(tag)
+            if address and not record['address']:
+                record['address'] = address
+            for value in [category] + categories + list(tags or []):
+                for token in _category_tokens(value):
+                    self._by_category[token].add(idx)
+            if self.max_pois and self._count > self.max_pois:
+                self._evict()
+                idx = self._keys.get(key)
+            return idx
+
+    def _evict(self):
+        """
+        Drop whole cells, least recently filled first, until under 90% of max_pois (lock held)
+
+        Their fetch stamps go too, so the next query there goes upstream again.
+        New lists / arrays are built rather than edited in place, so a
+        concurrent query() keeps reading the snapshot it took.
+        """
+        target = int(self.max_pois * 0.9)
+        remaining = self._count
+        dropped = set()
+        for cell in sorted(self._cells, key=lambda c: self._cell_touched.get(c, 0)):
+            if remaining <= target:
+                break
+            dropped.add(cell)
+            remaining -= len(self._cells[cell])
+
+        keep = sorted(i for cell, ids in self._cells.items() if cell not in dropped for i in ids)
+        remap = {old: new for new, old in enumerate(keep)}
+        capacity = max(len(keep) * 2, 1024)
+        self._lat = np.resize(self._lat[keep], capacity)
+        self._lon = np.resize(self._lon[keep], capacity)
+        self._records = [self._records[i] for i in keep]
+        self._keys = {k: remap[i] for k, i in self._keys.items() if i in remap}
+        self._cells = defaultdict(list, {c: [remap[i] for i in ids]
+                                         for c, ids in self._cells.items() if c not in dropped})
+        by_category = defaultdict(set)
+        for token, ids in self._by_category.items():
+            kept = {remap[i] for i in ids if i in remap}
+            if kept:
+                by_category[token] = kept
+        self._by_category = by_category
+        self._fetched = {k: t for k, t in self._fetched.items() if k[0] not in dropped}
+        for cell in dropped:
+            self._cell_touched.pop(cell, None)
+        self.evicted += self._count - len(keep)
+        self._count = len(keep)
+
+    def add_many(self, records, tags=None):
+        """Insert records shaped like TrafficAPI POIs (name/category/latitude/longitude/address)"""
+        added = 0
+        for r in records:
+            idx = self.add(
+                r.get('name'),
+                r.get('latitude', r.get('lat')),
+                r.get('longitude', r.get('lon', r.get('lng'))),
+                category=r.get('category') if isinstance(r.get('category'), str) else None,
+                categories=r.get('categories') or (r.get('category') if isinstance(r.get('category'), list) else None),
+                address=r.get('address', ''),
+                tags=tags,
+                metadata=r.get('metadata')
+            )
+            if idx is not None:
+                added += 1
+        return added
+
+    def bulk_import(self, path):
+        """Import a CSV with name, lat, lon, category[, address] columns"""
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        added = self.add_many(rows)
+        logger.info(f"Imported {added} POIs from {path}")
+        return added
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def query(self, lat, lon, radius_m, category=None, limit=None):
+        """POIs within radius_m of (lat, lon), nearest first, optionally filtered by category"""
+        with self._lock:
+            candidates = []
+            for cell in self.cells_for(lat, lon, radius_m):
+                candidates.extend(self._cells.get(cell, ()))
+            if category:
+                allowed = self._by_category.get(self._category_key(category), set())
+                candidates = [i for i in candidates if i in allowed]
+            if not candidates:
+                return []
+            idx = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+            lats = self._lat[idx]
+            lons = self._lon[idx]
+            records = self._records
+
+        dist = _haversine_array(lat, lon, lats, lons)
+        inside = dist <= radius_m
+        idx, dist = idx[inside], dist[inside]
+        order = np.argsort(dist, kind='stable')
+        if limit:
+            order = order[:limit]
+
+        results = []
+        for i in order:
+            r = dict(records[idx[i]])
+            r['distance'] = round(float(dist[i]), 1)
+            results.append(r)
+        return results
+
+    # ------------------------------------------------------------------
+    # MongoDB persistence (POI model)
+    # ------------------------------------------------------------------
+
+    def load_from_db(self):
+        """Seed the store from the POI collection"""
+        from models.models import POI
+        added = 0
+        for doc in POI.objects.only('name', 'location', 'category', 'metadata'):
+            coords = doc.location.get('coordinates') if isinstance(doc.location, dict) else doc.location
+            if not coords:
+                continue
+            metadata = doc.metadata or {}
+            if self.add(doc.name, coords[1], coords[0], category=doc.category,
+                        address=metadata.get('address', ''), metadata=metadata) is not None:
+                added += 1
+        logger.info(f"Loaded {added} POIs from database")
+        return added
+
+    @staticmethod
+    def save_to_db(records):
+        """
+        Upsert upstream POIs into the POI collection
+
+        Keyed on place_key (normalized name plus coordinates rounded to
+        POI_KEY_PRECISION), so refetching a cell updates its POIs instead of
+        adding them again. Returns the number of distinct POIs written.
+        """
+        from pymongo import UpdateOne
+        from pymongo.errors import BulkWriteError
+        from models.models import POI
+        updates = {}
+        for r in records:
+            if not r.get('name') or r.get('latitude') is None or r.get('longitude') is None:
+                continue
+            key = poi_place_key(r['name'], r['latitude'], r['longitude'])
+            updates[key] = UpdateOne({'place_key': key}, {'$set': {
+                'name': r['name'],
+                'location': {'type': 'Point', 'coordinates': [r['longitude'], r['latitude']]},
+                'category': r.get('category') or 'Unknown',
+                'metadata': {'address': r.get('address', '')}
+            }}, upsert=True)
+        if updates:
+            try:
+                POI._get_collection().bulk_write(list(updates.values()), ordered=False)
+            except BulkWriteError as e:
+                # two writers upserting the same new POI: one insert wins, the other is a duplicate
+                if any(err.get('code') != 11000 for err in e.details.get('writeErrors', [])):
+                    raise
+        return len(updates)
+
+
+def poi_place_key(name, lat, lon):
+    """Identity of an upstream POI in the database: normalized name and rounded coordinates"""
+    return f"{normalize_name(name)}|{round(float(lat), POI_KEY_PRECISION)}|{round(float(lon), POI_KEY_PRECISION)}"
+
+
+def record_from_tomtom(result):
+    """Convert a raw TomTom search result into a store record"""
+    poi = result.get('poi') if isinstance(result.get('poi'), dict) else {}
+    pos = result.get('position') or {'lat': result.get('lat'), 'lon': result.get('lon')}
+    name = poi.get('name') or result.get('name') or (result.get('address') or {}).get('freeformAddress')
+    return {
+        'name': name,
+        'categories': poi.get('categories', []),
+        'latitude': pos.get('lat'),
+        'longitude': pos.get('lon'),
+        'address': (result.get('address') or {}).get('freeformAddress', '')
+    }
+
+
+def _haversine(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _haversine_array(lat, lon, lats, lons):
+    p1 = np.radians(lat)
+    p2 = np.radians(lats)
+    dl = np.radians(lons - lon)
+    a = np.sin((p2 - p1) / 2) ** 2 + np.cos(p1) * np.cos(p2) * np.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_poi_store():
+    """Process-wide POI store, seeded from the import file / database on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = POIStore(
+                cell_size_deg=Config.POI_CELL_SIZE_DEG,
+                refresh_horizon=Config.POI_REFRESH_HORIZON,
+                max_pois=Config.POI_STORE_MAX_POIS,
+                max_fetched=Config.POI_STORE_MAX_FETCHED
+            )
+            if Config.POI_IMPORT_PATH:
+                try:
+                    _store.bulk_import(Config.POI_IMPORT_PATH)
+                except Exception as e:
+                    logger.error(f"Error importing POIs from {Config.POI_IMPORT_PATH}: {e}")
+            if Config.POI_STORE_PERSIST:
+                try:
+                    _store.load_from_db()
+                except Exception as e:
+                    logger.error(f"Error loading POIs from database: {e}")
+        return _store
+
+
+def persist_pois(records):
+    """Write upstream POIs to MongoDB off the request path (when enabled)"""
+    if not Config.POI_STORE_PERSIST or not records:
+        return
+    from services.upstream import get_executor
+
+    def _save():
+        try:
+            POIStore.save_to_db(records)
+        except Exception as e:
+            logger.error(f"Error persisting POIs: {e}")
+
+    get_executor().submit(_save)
@@ -0,0 +1,128 @@
+"""
+Local reverse geocoding
+k-d tree over known address points plus a cache of upstream answers keyed
+on coordinates quantized to a few meters
+"""
+
+import csv
+import math
+import threading
+import logging
+
+import numpy as np
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+METERS_PER_DEG_LAT = 110574.0
+METERS_PER_DEG_LON = 111320.0
+
+
+def _project(lats, lons):
+    """Local equirectangular projection to meters (accurate at street scale)"""
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    return np.column_stack((lons * METERS_PER_DEG_LON * np.cos(np.radians(lats)),
+                            lats * METERS_PER_DEG_LAT))
+
+
+class ReverseGeocoder:
+    """Answers nearest-address queries locally, learning from upstream misses"""
+
+    def __init__(self, max_distance_m=25.0, quantum_deg=0.00005, rebuild_threshold=64):
+        self.max_distance_m = max_distance_m
+        self.quantum = quantum_deg            # 0.00005 deg ~ 5.5 m
+        self.rebuild_threshold = rebuild_threshold
+
+        self._answers = {}                    # quantized (lat, lon) -> address
+        self._addresses = []                  # address per indexed point
+        self._points = np.empty((0, 2))       # projected points inside the tree
+        self._tree = None
+        self._pending = []                    # (x, y, address index) not yet in the tree
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._addresses)
+
+    def _quantize(self, lat, lon):
+        return (int(round(float(lat) / self.quantum)), int(round(float(lon) / self.quantum)))
+
+    def add(self, lat, lon, address):
+        """Index an address point and remember it as the answer for its quantized cell"""
+        if lat is None or lon is None or not address:
+            return
+        key = self._quantize(lat, lon)
+        with self._lock:
+            if key in self._answers:
+                return
+            self._answers[key] = address
+            self._addresses.append(address)
+            x, y = _project([float(lat)], [float(lon)])[0]
+            self._pending.append((x, y, len(self._addresses) - 1))
+            if len(self._pending) >= self.rebuild_threshold:
+                self._rebuild()
+
+    def _rebuild(self):
+        """Fold pending points into a fresh k-d tree (lock held)"""
+        from sklearn.neighbors import KDTree
+
+        if self._pending:
+            pending = np.array([(x, y) for x, y, _ in self._pending])
+            self._points = np.vstack((self._points, pending)) if len(self._points) else pending
+            self._pending = []
+        self._tree = KDTree(self._points) if len(self._points) else None
+
+    def nearest(self, lat, lon, max_distance_m=None):
+        """(address, distance_m) of the closest known point within range, else None"""
+        max_distance_m = self.max_distance_m if max_distance_m is None else max_distance_m
+        with self._lock:
+            exact = self._answers.get(self._quantize(lat, lon))
+            if exact is not None:
+                return exact, 0.0
+
+            query = _project([float(lat)], [float(lon)])
+            best_idx, best_dist = None, math.inf
+            if self._tree is not None:
+                dist, idx = self._tree.query(query, k=1)
+                best_idx, best_dist = int(idx[0][0]), float(dist[0][0])
+            if self._pending:
+                pending = np.array([(x, y) for x, y, _ in self._pending])
+                dists = np.hypot(pending[:, 0] - query[0, 0], pending[:, 1] - query[0, 1])
+                i = int(np.argmin(dists))
+                if dists[i] < best_dist:
+                    best_idx, best_dist = self._pending[i][2], float(dists[i])
+
+            if best_idx is None or best_dist > max_distance_m:
+                return None
+            return self._addresses[best_idx], best_dist
+
+    def import_csv(self, path):
+        """Import address points with lat, lon, address columns"""
+        added = 0
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                if row.get('address') and row.get('lat') and row.get('lon'):
+                    self.add(row['lat'], row['lon'], row['address'])
+                    added += 1
+        with self._lock:
+            self._rebuild()
+        logger.info(f"Imported {added} address points from {path}")
+        return added
+
+
+_geocoder = None
+_geocoder_lock = threading.Lock()
+
+
+def get_reverse_geocoder():
+    """Process-wide reverse geocoder, seeded from REVERSE_GEOCODE_PATH on first use"""
+    global _geocoder
+    with _geocoder_lock:
+        if _geocoder is None:
+            _geocoder = ReverseGeocoder(max_distance_m=Config.REVERSE_GEOCODE_MAX_DISTANCE)
+            if Config.REVERSE_GEOCODE_PATH:
+                try:
+                    _geocoder.import_csv(Config.REVERSE_GEOCODE_PATH)
+                except Exception as e:
+                    logger.error(f"Error importing address points from {Config.REVERSE_GEOCODE_PATH}: {e}")
+        return _geocoder
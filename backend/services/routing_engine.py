@@ -6,6 +6,7 @@ Calculates fastest, cheapest, and eco-friendly routes using TomTom API
 import requests
 from config import Config
 from services.traffic_api import TrafficAPI
+from services.upstream import fetch_json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -74,13 +75,13 @@ class RoutingEngine:
         }
         
         try:
-            response = requests.get(url, params=params, timeout=15)
-            response.raise_for_status()
-            data = response.json()
+            data, stale = fetch_json('tomtom.routing', url, params, timeout=15, hedge=True)
             
             if 'routes' in data and len(data['routes']) > 0:
                 route = data['routes'][0]
-                return self._format_route_response(route, 'fastest')
+                result = self._format_route_response(route, 'fastest')
+                result['stale'] = stale
+                return result
             
             return {'success': False, 'error': 'No route found'}
             
@@ -111,13 +112,12 @@ class RoutingEngine:
         }
         
         try:
-            response = requests.get(url, params=params, timeout=15)
-            response.raise_for_status()
-            data = response.json()
+            data, stale = fetch_json('tomtom.routing', url, params, timeout=15, hedge=True)
             
             if 'routes' in data and len(data['routes']) > 0:
                 route = data['routes'][0]
                 result = self._format_route_response(route, 'cheapest')
+                result['stale'] = stale
                 result['savings_note'] = 'Avoids toll roads and uses shortest distance'
                 return result
             
@@ -151,13 +151,12 @@ class RoutingEngine:
         }
         
         try:
-            response = requests.get(url, params=params, timeout=15)
-            response.raise_for_status()
-            data = response.json()
+            data, stale = fetch_json('tomtom.routing', url, params, timeout=15, hedge=True)
             
             if 'routes' in data and len(data['routes']) > 0:
                 route = data['routes'][0]
                 result = self._format_route_response(route, 'eco')
+                result['stale'] = stale
                 result['eco_note'] = 'Optimized for fuel efficiency and lower emissions'
                 return result
             
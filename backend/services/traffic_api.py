@@ -5,10 +5,15 @@ Integrates with TomTom Traffic APIs - FIXED VERSION
 
 import requests
 from config import Config
+from services.upstream import fetch_json
+from services.poi_store import get_poi_store, persist_pois
+from services.gazetteer import get_gazetteer
 import logging
 
 logger = logging.getLogger(__name__)
 
+NEARBY_SEARCH_LIMIT = 100   # TomTom results per nearby search
+
 class TrafficAPI:
     """Interface for TomTom traffic APIs"""
     
@@ -33,9 +38,7 @@ class TrafficAPI:
         }
         
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data, stale = fetch_json('tomtom.traffic_flow', url, params, timeout=10, hedge=True)
             
             if 'flowSegmentData' in data:
                 segment = data['flowSegmentData']
@@ -50,7 +53,8 @@ class TrafficAPI:
                     'free_flow_travel_time': segment.get('freeFlowTravelTime', 0),
                     'confidence': segment.get('confidence', 0),
                     'congestion_level': self._calculate_congestion_level(current_speed, free_flow_speed),
-                    'coordinates': segment.get('coordinates', {}).get('coordinate', [])
+                    'coordinates': segment.get('coordinates', {}).get('coordinate', []),
+                    'stale': stale
                 }
             
             return {'success': False, 'error': 'No flow data available'}
@@ -76,9 +80,7 @@ class TrafficAPI:
         }
         
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data, stale = fetch_json('tomtom.incidents', url, params, timeout=10)
             
             incidents = []
             if 'incidents' in data:
@@ -99,7 +101,8 @@ class TrafficAPI:
             return {
                 'success': True,
                 'incident_count': len(incidents),
-                'incidents': incidents
+                'incidents': incidents,
+                'stale': stale
             }
             
         except requests.exceptions.HTTPError as e:
@@ -138,9 +141,7 @@ class TrafficAPI:
         }
         
         try:
-            response = requests.get(url, params=params, timeout=15)
-            response.raise_for_status()
-            data = response.json()
+            data, stale = fetch_json('tomtom.routing', url, params, timeout=15, hedge=True)
             
             if 'routes' in data and len(data['routes']) > 0:
                 route = data['routes'][0]
@@ -152,7 +153,8 @@ class TrafficAPI:
                     'travel_time_seconds': summary['travelTimeInSeconds'],
                     'traffic_delay_seconds': summary.get('trafficDelayInSeconds', 0),
                     'departure_time': summary.get('departureTime'),
-                    'arrival_time': summary.get('arrivalTime')
+                    'arrival_time': summary.get('arrivalTime'),
+                    'stale': stale
                 }
             
             return {'success': False, 'error': 'No route data available'}
@@ -166,7 +168,40 @@ class TrafficAPI:
         Search for Points of Interest near a location
         radius: in meters (default 5km)
         category: POI category (e.g., 'restaurant', 'parking', 'gas station')
+        
+        Answered from the local POI store; TomTom is only queried for grid
+        cells that are cold or older than the refresh horizon.
         """
+        store = get_poi_store()
+        cold = store.cold_cells(lat, lon, radius, category)
+        stale = False
+        
+        if cold:
+            # One upstream call covering just the cold cells
+            center_lat, center_lon, cover_radius = store.covering_circle(cold)
+            upstream = self._fetch_nearby_pois(center_lat, center_lon, int(cover_radius) + 1, category)
+            if upstream.get('success'):
+                store.add_many(upstream['pois'], tags=[category] if category else None)
+                truncated = len(upstream['pois']) >= NEARBY_SEARCH_LIMIT
+                store.mark_fetched(store.covered_cells(cold, center_lat, center_lon, upstream['pois'], truncated),
+                                   category)
+                persist_pois(upstream['pois'])
+                stale = upstream.get('stale', False)
+            elif len(cold) == len(store.cells_for(lat, lon, radius)):
+                # Nothing cached locally for this area either
+                return upstream
+        
+        pois = store.query(lat, lon, radius, category, limit=100)
+        return {
+            'success': True,
+            'poi_count': len(pois),
+            'pois': pois,
+            'stale': stale,
+            'source': 'upstream' if cold else 'local'
+        }
+    
+    def _fetch_nearby_pois(self, lat, lon, radius, category=None):
+        """Query TomTom nearby search directly"""
         url = f"{self.base_url}/search/2/nearbySearch/.json"
         
         params = {
@@ -174,16 +209,14 @@ class TrafficAPI:
             'lat': lat,
             'lon': lon,
             'radius': radius,
-            'limit': 100
+            'limit': NEARBY_SEARCH_LIMIT
         }
         
         if category:
             params['categorySet'] = category
         
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data, stale = fetch_json('tomtom.search', url, params, timeout=10)
             
             pois = []
             if 'results' in data:
@@ -193,6 +226,7 @@ class TrafficAPI:
                     pois.append({
                         'name': poi_data.get('name', 'Unknown'),
                         'category': poi_data.get('categories', ['Unknown'])[0] if poi_data.get('categories') else 'Unknown',
+                        'categories': poi_data.get('categories', []),
                         'latitude': pos.get('lat'),
                         'longitude': pos.get('lon'),
                         'distance': result.get('dist', 0),
@@ -202,7 +236,8 @@ class TrafficAPI:
             return {
                 'success': True,
                 'poi_count': len(pois),
-                'pois': pois
+                'pois': pois,
+                'stale': stale
             }
             
         except requests.exceptions.RequestException as e:
@@ -219,7 +254,24 @@ class TrafficAPI:
             
         Returns:
             dict with 'success', 'lat', 'lon', and 'address' keys
+        
+        Known place names are resolved from the local gazetteer; TomTom is
+        only called on a miss and its answer is added to the gazetteer.
         """
+        gazetteer = get_gazetteer()
+        place = gazetteer.lookup(location_name)
+        if place:
+            return {
+                'success': True,
+                'lat': place['lat'],
+                'lon': place['lon'],
+                'address': place['address'],
+                'full_address': {'freeformAddress': place['address']},
+                'type': place['type'],
+                'stale': False,
+                'source': 'gazetteer'
+            }
+        
         url = f"{self.base_url}/search/2/geocode/{location_name}.json"
         
         params = {
@@ -229,14 +281,16 @@ class TrafficAPI:
         }
         
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data, stale = fetch_json('tomtom.geocode', url, params, timeout=10, hedge=True)
             
             if 'results' in data and len(data['results']) > 0:
                 result = data['results'][0]
                 position = result.get('position', {})
                 address = result.get('address', {})
+                gazetteer.remember(
+                    location_name, position.get('lat'), position.get('lon'),
+                    address=address.get('freeformAddress', ''), place_type=result.get('type', '')
+                )
                 
                 return {
                     'success': True,
@@ -244,7 +298,8 @@ class TrafficAPI:
                     'lon': position.get('lon'),
                     'address': address.get('freeformAddress', location_name),
                     'full_address': address,
-                    'type': result.get('type', 'unknown')
+                    'type': result.get('type', 'unknown'),
+                    'stale': stale
                 }
             
             return {
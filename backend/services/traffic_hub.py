@@ -0,0 +1,212 @@
+"""
+Live traffic subscription hub
+Clients subscribe to area grid cells; one background poller refreshes each
+subscribed cell once per interval and pushes only what changed, so upstream
+cost follows the number of cells, not the number of clients
+"""
+
+import hashlib
+import json
+import queue
+import threading
+import logging
+
+from config import Config
+from services.area_grid import get_area_grid
+from services.fetch_graph import FetchGraph
+from utils.helpers import calculate_bbox
+
+logger = logging.getLogger(__name__)
+
+FLOW_FIELDS = ('current_speed', 'free_flow_speed', 'current_travel_time',
+               'free_flow_travel_time', 'confidence', 'congestion_level')
+
+
+def _incident_id(incident):
+    """Stable id for an incident across polls (TomTom incident details carry none)"""
+    key = json.dumps([incident.get('category'), incident.get('start_time'),
+                      incident.get('description'), incident.get('coordinates')[:1] if incident.get('coordinates') else None],
+                     sort_keys=True, default=str)
+    return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+
+def flow_delta(old, new):
+    """Flow fields whose value changed ({} when nothing did)"""
+    return {k: new.get(k) for k in FLOW_FIELDS if old is None or old.get(k) != new.get(k)}
+
+
+def incident_delta(old, new):
+    """(added incidents, removed ids) between two {id: incident} maps"""
+    added = [new[i] for i in new if i not in old]
+    removed = sorted(i for i in old if i not in new)
+    return added, removed
+
+
+class Subscription:
+    """One client's interest in a set of cells, with its own event queue"""
+
+    def __init__(self, cells, max_queue=100):
+        self.cells = frozenset(int(c) for c in cells)
+        self._queue = queue.Queue(maxsize=max_queue)
+
+    def push(self, event, data):
+        # a slow client loses its oldest events rather than holding up the poller
+        while True:
+            try:
+                self._queue.put_nowait((event, data))
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def next(self, timeout=None):
+        """Next (event, data), or None after `timeout` seconds without one"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class TrafficHub:
+    """Polls subscribed cells and fans deltas out to their subscribers"""
+
+    def __init__(self, traffic_api, grid, interval=60):
+        self.traffic_api = traffic_api
+        self.grid = grid
+        self.interval = interval
+        self._subscribers = {}      # cell -> set of Subscription
+        self._state = {}            # cell -> {'flow': {...}, 'incidents': {id: incident}}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.polls = 0
+        self.upstream_calls = 0
+
+    def subscribe(self, cells):
+        """Register interest in cells; known cells get a snapshot right away"""
+        sub = Subscription(cells, Config.TRAFFIC_HUB_QUEUE_SIZE)
+        with self._lock:
+            new_cells = False
+            for cell in sub.cells:
+                self._subscribers.setdefault(cell, set()).add(sub)
+                if cell in self._state:
+                    sub.push('snapshot', self._snapshot(cell))
+                else:
+                    new_cells = True
+        if new_cells:
+            self._wake.set()   # poll now instead of waiting out the interval
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            for cell in sub.cells:
+                subs = self._subscribers.get(cell)
+                if subs is None:
+                    continue
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[cell]
+                    self._state.pop(cell, None)
+
+    def _snapshot(self, cell):
+        state = self._state[cell]
+        return {'cell': cell, 'flow': state['flow'], 'incidents': list(state['incidents'].values())}
+
+    def poll_once(self):
+        """Fetch flow and incidents for every subscribed cell and push the changes"""
+        with self._lock:
+            cells = list(self._subscribers)
+        if not cells:
+            return 0
+
+        graph = FetchGraph(Config.INSIGHTS_FETCH_DEADLINE)
+        radius_km = self.grid.cell_radius_m / 1000
+        for cell in cells:
+            lat, lon = self.grid.cell_center(cell)
+            graph.add(f"{cell}:flow", self.traffic_api.get_traffic_flow, lat, lon)
+            graph.add(f"{cell}:incidents", self.traffic_api.get_traffic_incidents,
+                      calculate_bbox(lat, lon, radius_km))
+        results, errors = graph.run()
+        self.polls += 1
+        self.upstream_calls += 2 * len(cells)
+
+        for cell in cells:
+            flow = results.get(f"{cell}:flow")
+            incidents = results.get(f"{cell}:incidents")
+            flow = {k: flow.get(k) for k in FLOW_FIELDS} if flow and flow.get('success') else None
+            if incidents and incidents.get('success'):
+                incidents = {_incident_id(i): dict(i, id=_incident_id(i)) for i in incidents.get('incidents', [])}
+            else:
+                incidents = None
+            self._apply(cell, flow, incidents)
+        if errors:
+            logger.warning(f"Traffic hub poll incomplete: {errors}")
+        return len(cells)
+
+    def _apply(self, cell, flow, incidents):
+        """Store a cell's new readings and push the difference; None means the source failed"""
+        with self._lock:
+            subs = list(self._subscribers.get(cell, ()))
+            if not subs:
+                return
+            previous = self._state.get(cell)
+            if previous is None:
+                if flow is None and incidents is None:
+                    return
+                self._state[cell] = {'flow': flow or {}, 'incidents': incidents or {}}
+                events = [('snapshot', self._snapshot(cell))]
+            else:
+                events = []
+                if flow is not None:
+                    changes = flow_delta(previous['flow'], flow)
+                    if changes:
+                        previous['flow'] = flow
+                        events.append(('flow', {'cell': cell, 'changes': changes}))
+                if incidents is not None:
+                    added, removed = incident_delta(previous['incidents'], incidents)
+                    if added or removed:
+                        previous['incidents'] = incidents
+                        events.append(('incidents', {'cell': cell, 'added': added, 'removed': removed}))
+        for event, data in events:
+            for sub in subs:
+                sub.push(event, data)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='traffic-hub', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error(f"Traffic hub poll failed: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'cells': len(self._subscribers),
+                'subscriptions': len({s for subs in self._subscribers.values() for s in subs}),
+                'polls': self.polls,
+                'upstream_calls': self.upstream_calls
+            }
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_traffic_hub():
+    """Process-wide hub over the area grid, poller started on first use"""
+    global _hub
+    with _hub_lock:
+        if _hub is None:
+            from services.traffic_api import TrafficAPI
+            _hub = TrafficHub(TrafficAPI(), get_area_grid(), Config.TRAFFIC_HUB_INTERVAL).start()
+        return _hub
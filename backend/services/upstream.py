@@ -0,0 +1,291 @@
+"""
+Upstream HTTP access for TomTom endpoints
+Wraps requests with a per-endpoint circuit breaker, stale-cache fallback,
+rate limiting, adaptive timeouts and optional hedged requests
+"""
+
+import threading
+import time
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+from config import Config
+from utils.circuit_breaker import get_circuit_breaker, CircuitOpenError
+from utils.cache import get_cache
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamUnavailable(requests.exceptions.RequestException):
+    """Upstream circuit is open and there is no cached value to fall back to"""
+
+
+class RateLimited(requests.exceptions.RequestException):
+    """No request budget left for the endpoint within the allowed wait"""
+
+
+def _is_upstream_failure(exc):
+    """Only timeouts, connection problems, 5xx and 429 say the upstream is unhealthy"""
+    if isinstance(exc, requests.exceptions.HTTPError) and exc.response is not None:
+        status = exc.response.status_code
+        return status >= 500 or status == 429
+    return isinstance(exc, requests.exceptions.RequestException)
+
+
+stale_cache = get_cache(
+    'upstream.stale',
+    max_entries=Config.STALE_CACHE_MAX_ENTRIES,
+    max_bytes=Config.STALE_CACHE_MAX_BYTES or None,
+    ttl=Config.STALE_CACHE_TTL
+)
+
+
+class LatencyTracker:
+    """Rolling window of observed call latencies (seconds) for one endpoint"""
+
+    def __init__(self, window=256):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, q):
+        """q-th percentile (0-100) of the window, None when empty"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        idx = min(len(samples) - 1, int(round(q / 100.0 * (len(samples) - 1))))
+        return samples[idx]
+
+    def stats(self):
+        return {
+            'samples': len(self),
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99)
+        }
+
+
+class RateLimiter:
+    """Token bucket shared by every call (primary or hedge) to one endpoint"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self):
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self, max_wait):
+        """Block up to max_wait seconds for a token"""
+        deadline = time.monotonic() + max_wait
+        while True:
+            if self.try_acquire():
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(remaining, 1.0 / self.rate if self.rate else remaining))
+
+
+_trackers = {}
+_limiters = {}
+_registry_lock = threading.Lock()
+_executor = None
+_hedge_executor = None
+
+
+def latency_for(endpoint):
+    with _registry_lock:
+        tracker = _trackers.get(endpoint)
+        if tracker is None:
+            tracker = _trackers[endpoint] = LatencyTracker(Config.UPSTREAM_LATENCY_WINDOW)
+        return tracker
+
+
+def rate_limiter_for(endpoint):
+    with _registry_lock:
+        limiter = _limiters.get(endpoint)
+        if limiter is None:
+            limiter = _limiters[endpoint] = RateLimiter(
+                Config.UPSTREAM_RATE_LIMIT, Config.UPSTREAM_RATE_BURST
+            )
+        return limiter
+
+
+def get_executor():
+    """Thread pool shared by all concurrent upstream work"""
+    global _executor
+    with _registry_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=Config.UPSTREAM_MAX_WORKERS,
+                thread_name_prefix='upstream'
+            )
+        return _executor
+
+
+def _get_hedge_executor():
+    """Separate pool for hedged calls so fan-out work on the shared pool cannot starve them"""
+    global _hedge_executor
+    with _registry_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(
+                max_workers=Config.UPSTREAM_MAX_WORKERS,
+                thread_name_prefix='upstream-hedge'
+            )
+        return _hedge_executor
+
+
+def latency_stats():
+    """Per-endpoint latency percentiles for monitoring"""
+    with _registry_lock:
+        trackers = dict(_trackers)
+    return {name: tracker.stats() for name, tracker in trackers.items()}
+
+
+def adaptive_timeout(endpoint, ceiling):
+    """
+    Timeout derived from the endpoint's observed p99 latency
+
+    The caller's constant is kept as a ceiling and as the cold-start value
+    until enough samples have been collected.
+    """
+    tracker = latency_for(endpoint)
+    if len(tracker) < Config.UPSTREAM_MIN_SAMPLES:
+        return ceiling
+    p99 = tracker.percentile(99)
+    return max(Config.UPSTREAM_MIN_TIMEOUT, min(ceiling, p99 * Config.UPSTREAM_TIMEOUT_MULTIPLIER))
+
+
+def circuit_for(endpoint):
+    """Shared circuit breaker for a named upstream endpoint"""
+    return get_circuit_breaker(
+        endpoint,
+        failure_threshold=Config.CIRCUIT_FAILURE_THRESHOLD,
+        recovery_timeout=Config.CIRCUIT_RECOVERY_TIMEOUT,
+        latency_threshold=Config.CIRCUIT_LATENCY_THRESHOLD,
+        is_failure=_is_upstream_failure
+    )
+
+
+def _cache_key(url, params):
+    # API key is not part of the identity of a request
+    items = sorted((k, str(v)) for k, v in (params or {}).items() if k != 'key')
+    return url + '?' + '&'.join(f"{k}={v}" for k, v in items)
+
+
+def _get_json(endpoint, url, params, timeout):
+    start = time.monotonic()
+    try:
+        response = requests.get(url, params=params, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+    finally:
+        # Failed and timed-out calls are recorded too so timeouts can grow back
+        latency_for(endpoint).record(time.monotonic() - start)
+
+
+def _hedged_get_json(endpoint, url, params, timeout):
+    """
+    Send the request, and a duplicate once the endpoint's p95 has passed
+
+    The first successful response wins and the other call is cancelled (or
+    abandoned if already running). Every copy sent takes a rate-limit token,
+    so duplicates that lose still count against the endpoint's budget.
+    """
+    tracker = latency_for(endpoint)
+    hedge_after = tracker.percentile(95) if len(tracker) >= Config.UPSTREAM_MIN_SAMPLES else None
+    executor = _get_hedge_executor()
+    deadline = time.monotonic() + timeout
+
+    pending = {executor.submit(_get_json, endpoint, url, params, timeout)}
+    if hedge_after is not None:
+        done, pending = wait(pending, timeout=hedge_after)
+        if done:
+            return done.pop().result()
+        if rate_limiter_for(endpoint).try_acquire():
+            logger.debug(f"Hedging '{endpoint}' after {hedge_after:.3f}s")
+            pending.add(executor.submit(_get_json, endpoint, url, params, timeout))
+
+    error = None
+    while pending:
+        done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()),
+                             return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            if future.exception() is None:
+                for other in pending:
+                    other.cancel()
+                return future.result()
+            error = future.exception()
+
+    for other in pending:
+        other.cancel()
+    raise error or requests.exceptions.Timeout(f"'{endpoint}' did not answer within {timeout:.2f}s")
+
+
+def fetch_json(endpoint, url, params=None, timeout=10, hedge=False):
+    """
+    GET a JSON document through the endpoint's circuit breaker
+
+    `timeout` is the ceiling; the effective timeout adapts to the endpoint's
+    observed latency. With hedge=True (latency-critical calls) a duplicate
+    request is sent once the endpoint's p95 has passed.
+
+    Returns (data, stale). When the circuit is open, or the call fails with
+    an upstream-health error, the last good response for the same request is
+    returned with stale=True. Without a cached value the error is raised;
+    it is always a requests RequestException so callers' existing handlers
+    keep working.
+    """
+    breaker = circuit_for(endpoint)
+    key = _cache_key(url, params)
+    timeout = adaptive_timeout(endpoint, timeout)
+    send = _hedged_get_json if hedge and Config.UPSTREAM_HEDGING_ENABLED else _get_json
+
+    try:
+        # an open circuit fails fast without spending (or waiting for) a rate-limit token
+        if not breaker.accepting():
+            raise CircuitOpenError(endpoint, breaker.retry_after())
+        if not rate_limiter_for(endpoint).acquire(Config.UPSTREAM_RATE_MAX_WAIT):
+            raise RateLimited(f"Rate limit reached for '{endpoint}'")
+        data = breaker.call(send, endpoint, url, params, timeout)
+    except CircuitOpenError as e:
+        cached = stale_cache.get(key)
+        if cached is not None:
+            logger.info(f"Serving stale response for '{endpoint}' (circuit open)")
+            return cached, True
+        raise UpstreamUnavailable(str(e))
+    except requests.exceptions.RequestException as e:
+        if _is_upstream_failure(e):
+            cached = stale_cache.get(key)
+            if cached is not None:
+                logger.warning(f"Serving stale response for '{endpoint}' after error: {e}")
+                return cached, True
+        raise
+
+    stale_cache.set(key, data)
+    return data, False
@@ -0,0 +1,80 @@
+"""
+Unit tests for the precomputed area grid
+"""
+
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock
+from services.area_grid import AreaGrid, INSIGHTS_POI_RADIUS_M
+from utils.helpers import calculate_bbox
+from services.data_processor import DataProcessor
+
+POIS = [{'name': f'Shop {i}', 'category': 'shop'} for i in range(25)] + \
+       [{'name': 'Office Tower', 'category': 'office'}]
+FLOW = {'success': True, 'congestion_level': 'high'}
+INCIDENTS = [{'type': 'Feature'}] * 2
+
+
+class TestAreaGrid(unittest.TestCase):
+    """Test cell lookups, refresh selection and persistence"""
+
+    def setUp(self):
+        self.grid = AreaGrid((28.40, 76.84, 28.88, 77.35), cell_size_deg=0.01, max_age=3600)
+
+    def test_lookup_matches_data_processor(self):
+        idx = self.grid.cell_index(28.6315, 77.2167)
+        self.assertIsNone(self.grid.lookup(28.6315, 77.2167))   # not computed yet
+        self.grid.update_cell(idx, POIS, FLOW, INCIDENTS)
+
+        cell = self.grid.lookup(28.6301, 77.2199)                # same cell
+        self.assertEqual(cell['cell']['id'], idx)
+        self.assertEqual(cell['classification'], DataProcessor.classify_area(POIS, FLOW))
+        self.assertEqual(cell['patterns'], DataProcessor.generate_mobility_patterns(FLOW, INCIDENTS, POIS))
+        self.assertAlmostEqual(cell['poi_mix']['commercial'], 25 / 26, places=2)
+        self.assertIsNone(self.grid.cell_index(19.07, 72.87))   # outside the service area
+
+    def test_stale_cells_oldest_first(self):
+        self.grid.updated_at[:] = time.time()
+        self.grid.updated_at[7] = time.time() - 7200
+        self.grid.updated_at[3] = 0
+        self.assertEqual(list(self.grid.stale_cells()), [3, 7])
+
+    def test_failed_fetch_keeps_previous_summary(self):
+        idx = self.grid.cell_index(28.6315, 77.2167)
+        self.grid.update_cell(idx, POIS, FLOW, INCIDENTS)
+        api = MagicMock()
+        api.search_nearby_pois.return_value = {'success': True, 'pois': []}
+        api.get_traffic_flow.return_value = {'success': False, 'error': 'timeout'}
+        api.get_traffic_incidents.return_value = {'success': True, 'incidents': []}
+        self.assertFalse(self.grid.compute_cell(idx, api, deadline=2))
+        self.assertEqual(self.grid.lookup(28.6315, 77.2167)['classification']['poi_count'], 26)
+
+    def test_cells_fetch_with_live_handler_extents(self):
+        idx = self.grid.cell_index(28.6315, 77.2167)
+        lat, lon = self.grid.cell_center(idx)
+        api = MagicMock()
+        api.search_nearby_pois.return_value = {'success': True, 'pois': POIS}
+        api.get_traffic_flow.return_value = FLOW
+        api.get_traffic_incidents.return_value = {'success': True, 'incidents': INCIDENTS}
+        self.assertTrue(self.grid.compute_cell(idx, api, deadline=2))
+        api.search_nearby_pois.assert_called_once_with(lat, lon, INSIGHTS_POI_RADIUS_M)
+        api.get_traffic_incidents.assert_called_once_with(calculate_bbox(lat, lon, 5))
+
+    def test_save_and_load(self):
+        idx = self.grid.cell_index(28.6315, 77.2167)
+        self.grid.update_cell(idx, POIS, FLOW, INCIDENTS)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'grid.npz')
+            self.grid.save(path)
+            self.grid.save(path)
+            self.assertEqual(os.listdir(tmp), ['grid.npz'])
+            loaded = AreaGrid((28.40, 76.84, 28.88, 77.35), cell_size_deg=0.01, max_age=3600)
+            self.assertTrue(loaded.load(path))
+            other = AreaGrid((28.40, 76.84, 28.88, 77.35), cell_size_deg=0.02)
+            self.assertFalse(other.load(path))
+        self.assertEqual(loaded.lookup(28.6315, 77.2167), self.grid.lookup(28.6315, 77.2167))
+
+if __name__ == '__main__':
+    unittest.main()
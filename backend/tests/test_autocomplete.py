@@ -0,0 +1,37 @@
+"""
+Unit tests for the local autocomplete index
+"""
+
+import time
+import unittest
+from services.autocomplete import AutocompleteIndex
+
+
+class TestAutocompleteIndex(unittest.TestCase):
+    """Test prefix suggestions and popularity ranking"""
+
+    def setUp(self):
+        self.index = AutocompleteIndex()
+        for name in ['Rajiv Chowk Metro Station', 'Rajouri Garden', 'Rajpath', 'Chandni Chowk', 'Saket']:
+            self.index.add(name, 28.6, 77.2)
+
+    def test_prefix_matches_any_word_start(self):
+        names = [s['name'] for s in self.index.suggest('chowk', limit=5)]
+        self.assertEqual(sorted(names), ['Chandni Chowk', 'Rajiv Chowk Metro Station'])
+        self.assertEqual(self.index.suggest('xyz'), [])
+
+    def test_popularity_ranking(self):
+        self.assertEqual(self.index.suggest('raj', limit=1)[0]['name'], 'Rajpath')
+        self.index.record_query('Rajouri Garden', count=3)
+        self.assertEqual(self.index.suggest('raj', limit=1)[0]['name'], 'Rajouri Garden')
+
+    def test_suggest_is_sub_millisecond(self):
+        for i in range(5000):
+            self.index.add(f'Sector {i} Market', 28.5, 77.3)
+        start = time.perf_counter()
+        for _ in range(100):
+            self.index.suggest('sector 12', limit=5)
+        self.assertLess((time.perf_counter() - start) / 100, 0.001)
+
+if __name__ == '__main__':
+    unittest.main()
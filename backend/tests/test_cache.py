@@ -0,0 +1,87 @@
+"""
+Unit tests for the bounded LRU cache
+"""
+
+import time
+import unittest
+from utils.cache import LRUCache
+
+
+class DictBackend:
+    """Stand-in shared backend keyed like the Redis one"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, cache_name, key):
+        value, expires_at = self.data.get((cache_name, key), (None, None))
+        return value, None if expires_at is None else expires_at - time.time()
+
+    def set(self, cache_name, key, value, ttl=None):
+        self.data[(cache_name, key)] = (value, time.time() + ttl if ttl else None)
+
+    def delete(self, cache_name, key):
+        self.data.pop((cache_name, key), None)
+
+
+class TestLRUCache(unittest.TestCase):
+    """Test eviction, expiry, counters and the shared backend"""
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache('test', max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        stats = cache.stats()
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 1)
+
+    def test_byte_limit(self):
+        cache = LRUCache('test', max_entries=100, max_bytes=300)
+        for i in range(10):
+            cache.set(i, 'x' * 100)
+        self.assertLessEqual(cache.stats()['bytes'], 300)
+        self.assertLess(len(cache), 10)
+        self.assertEqual(cache.get(9), 'x' * 100)
+
+    def test_ttl_expiry(self):
+        cache = LRUCache('test', ttl=60)
+        cache.set('short', 1, ttl=0.01)
+        cache.set('long', 2)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get('short'))
+        self.assertEqual(cache.get('long'), 2)
+        self.assertEqual(cache.stats()['expirations'], 1)
+
+    def test_shared_backend(self):
+        backend = DictBackend()
+        writer = LRUCache('shared', backend=backend)
+        reader = LRUCache('shared', backend=backend)
+        writer.set('k', {'v': 1})
+        self.assertEqual(reader.get('k'), {'v': 1})
+        self.assertEqual(reader.stats()['shared_hits'], 1)
+        self.assertIn('k', reader)
+
+    def test_shared_hit_keeps_remaining_ttl(self):
+        backend = DictBackend()
+        writer = LRUCache('shared', ttl=3600, backend=backend)
+        reader = LRUCache('shared', ttl=3600, backend=backend)
+        writer.set('traffic', 1, ttl=120)
+        self.assertEqual(reader.get('traffic'), 1)
+        expires_at = reader._data['traffic'][0]
+        self.assertLessEqual(expires_at - time.time(), 120)
+
+    def test_contains_leaves_counters_alone(self):
+        cache = LRUCache('test')
+        cache.set('a', 1)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (0, 0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Unit tests for chat helpers
+"""
+
+import json
+import time
+import unittest
+from unittest.mock import patch
+from app import create_app
+from routes import chat
+
+
+def _fake_keyword_pois(lat, lng, kw, tomtom_key, limit, logger):
+    if kw == 'museum':
+        time.sleep(2)  # one slow upstream keyword
+    return [{'name': f'{kw} {i}', 'categories': [kw], 'latitude': lat + i, 'longitude': lng}
+            for i in range(2)]
+
+
+class TestPOIFanOut(unittest.TestCase):
+    """Test parallel keyword searches in tomtom_poi_search"""
+
+    def setUp(self):
+        self.app = create_app()
+        chat.POI_CACHE.clear()
+
+    @patch('routes.chat._keyword_pois', side_effect=_fake_keyword_pois)
+    def test_returns_once_limit_reached(self, mock_search):
+        with self.app.app_context():
+            start = time.monotonic()
+            pois = chat.tomtom_poi_search(28.61, 77.21, 'key', limit=4)
+            elapsed = time.monotonic() - start
+
+        self.assertEqual(len(pois), 4)
+        self.assertLess(elapsed, 1.5)
+        self.assertNotIn('museum 0', [p['name'] for p in pois])
+
+    @patch('routes.chat.POI_SEARCH_DEADLINE', 0.5)
+    @patch('routes.chat._keyword_pois', side_effect=_fake_keyword_pois)
+    def test_deadline_returns_partial_results(self, mock_search):
+        with self.app.app_context():
+            start = time.monotonic()
+            pois = chat.tomtom_poi_search(28.61, 77.21, 'key', limit=10)
+            elapsed = time.monotonic() - start
+
+        self.assertEqual(len(pois), 6)
+        self.assertLess(elapsed, 1.5)
+
+
+class TestChatStream(unittest.TestCase):
+    """Test the server-sent-event mode of the chat endpoint"""
+
+    def setUp(self):
+        self.app = create_app()
+        self.client = self.app.test_client()
+        chat.ASSISTANT_CACHE.clear()
+
+    @patch('routes.chat.traffic_info', return_value={'currentSpeed': 30, 'freeFlowSpeed': 50, 'confidenceLevel': 0.9})
+    @patch('routes.chat.tomtom_poi_search')
+    def test_answer_is_sent_before_slow_poi_search(self, mock_pois, mock_traffic):
+        def slow_pois(*args):
+            time.sleep(0.5)
+            return [{'name': 'Lodhi Garden'}]
+        mock_pois.side_effect = slow_pois
+
+        response = self.client.post('/api/chat/', json={
+            'message': 'How is the traffic?', 'destination': {'lat': 28.61, 'lng': 77.21}, 'stream': True
+        })
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        events = [line.split(': ', 1)[1] for line in response.get_data(as_text=True).splitlines()
+                  if line.startswith('event: ')]
+        self.assertEqual(events, ['assistant', 'traffic', 'assistant', 'nearby_pois', 'done'])
+
+    @patch('routes.chat.tomtom_poi_search', return_value=[{'name': 'Lodhi Garden'}])
+    @patch('routes.chat.traffic_info')
+    def test_notice_is_sent_before_slow_traffic_lookup(self, mock_traffic, mock_pois):
+        def slow_traffic(*args):
+            time.sleep(0.5)
+            return {'currentSpeed': 30, 'freeFlowSpeed': 50, 'confidenceLevel': 0.9}
+        mock_traffic.side_effect = slow_traffic
+
+        response = self.client.post('/api/chat/', json={
+            'message': 'How is the traffic?', 'destination': {'lat': 28.61, 'lng': 77.21}, 'stream': True
+        })
+        lines = response.get_data(as_text=True).splitlines()
+        events = [line.split(': ', 1)[1] for line in lines if line.startswith('event: ')]
+        finals = [json.loads(line.split(': ', 1)[1])['final'] for line, prev in zip(lines[1:], lines)
+                  if prev == 'event: assistant']
+        self.assertEqual(events, ['assistant', 'nearby_pois', 'traffic', 'assistant', 'done'])
+        self.assertEqual(finals, [False, True])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Unit tests for chat intent parsing and cache keys
+"""
+
+import unittest
+from unittest.mock import patch
+from services.chat_intents import scan, classify, intent_cache_key, intent_ttl
+from services.gazetteer import Gazetteer
+
+
+class TestChatIntents(unittest.TestCase):
+    """Test canonical intents and the assistant cache keys built from them"""
+
+    def setUp(self):
+        self.gazetteer = Gazetteer()
+        self.gazetteer.add('Connaught Place', 28.6315, 77.2167, aliases=['CP'])
+        self.gazetteer.add('India Gate', 28.6129, 77.2295)
+        patcher = patch('services.chat_intents.get_gazetteer', return_value=self.gazetteer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.here = {'lat': 28.61234, 'lng': 77.20987}
+
+    def key(self, message, coords=None):
+        return intent_cache_key(classify(message), coords or self.here)
+
+    def test_phrasings_share_a_key(self):
+        self.assertEqual(self.key('Cafes near me'), self.key('cafes near me?'))
+        self.assertEqual(self.key('Cafes near me'), self.key('  cafes nearby '))
+        self.assertEqual(self.key('Route from CP to India Gate'),
+                         self.key('route from Connaught Place to india gate?'))
+        self.assertEqual(self.key('What is at 28.61291, 77.22951'), self.key('28.61289,77.22949'))
+
+    def test_coords_only_where_they_matter(self):
+        elsewhere = {'lat': 19.07, 'lng': 72.87}
+        self.assertEqual(self.key('route from CP to India Gate'),
+                         self.key('route from CP to India Gate', elsewhere))
+        self.assertNotEqual(self.key('Cafes near me'), self.key('Cafes near me', elsewhere))
+        self.assertNotEqual(self.key('How is traffic?'), self.key('How is traffic?', elsewhere))
+
+    def test_slots_and_ttls(self):
+        route = classify('How to go from Delhi to Agra')
+        self.assertEqual(route, {'type': 'route', 'slots': {'src': 'Delhi', 'dst': 'Agra'}})
+        self.assertEqual(classify('Search Lodhi')['slots'], {'prefix': 'Lodhi'})
+        self.assertLess(intent_ttl(classify('traffic please')), intent_ttl(classify('address of 28.6,77.2')))
+
+    def test_scan_matches_substrings(self):
+        message = 'Need to get to Saket, safest way? Anything near Saket near Lodhi'
+        matches = scan(message)
+        self.assertIn('travel', matches)
+        self.assertIn('safety', matches)   # "safe" inside "safest"
+        # slot classes carry every span from the same pass
+        self.assertEqual([message[s:e] for s, e in matches['to']], [' to ', ' to '])
+        self.assertEqual([message[s:e] for s, e in matches['nearby']], ['near ', 'near '])
+        self.assertEqual(scan('what is at 28.61, 77.2')['coords'], [(11, 22)])
+        # keywords match inside words, and from/to only between spaces
+        self.assertIn('safety', scan('Is this road unsafe?'))
+        self.assertIn('safety', scan('train to Agra'))
+        self.assertEqual(classify('From Delhi to Agra by route 44')['slots'], {})
+        self.assertEqual(classify('Route from Delhi to Agra to Jaipur')['slots'],
+                         {'src': 'Delhi', 'dst': 'Agra to Jaipur'})
+
+if __name__ == '__main__':
+    unittest.main()
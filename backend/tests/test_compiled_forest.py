@@ -0,0 +1,51 @@
+"""
+Unit tests for the compiled tree ensemble evaluator
+"""
+
+import os
+import tempfile
+import unittest
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor, RandomForestRegressor
+from services.compiled_forest import CompiledForest
+
+
+class TestCompiledForest(unittest.TestCase):
+    """Test compiled predictions against sklearn"""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.X = rng.normal(size=(500, 6))
+        self.y = 2 * self.X[:, 0] + np.sin(self.X[:, 1]) + rng.normal(scale=0.1, size=500)
+        self.X_test = rng.normal(size=(200, 6))
+
+    def test_random_forest_matches_sklearn(self):
+        model = RandomForestRegressor(n_estimators=20, max_depth=8, random_state=0).fit(self.X, self.y)
+        compiled = CompiledForest.from_sklearn(model)
+        np.testing.assert_allclose(compiled.predict(self.X_test), model.predict(self.X_test), rtol=1e-12, atol=1e-12)
+        np.testing.assert_allclose(compiled.predict(self.X_test[0]), model.predict(self.X_test[:1]))
+
+    def test_gradient_boosting_matches_sklearn(self):
+        model = GradientBoostingRegressor(n_estimators=30, random_state=0).fit(self.X, self.y)
+        compiled = CompiledForest.from_sklearn(model)
+        np.testing.assert_allclose(compiled.predict(self.X_test), model.predict(self.X_test), rtol=1e-12, atol=1e-12)
+
+    def test_hist_gradient_boosting_matches_sklearn(self):
+        model = HistGradientBoostingRegressor(max_iter=30, random_state=0).fit(self.X, self.y)
+        compiled = CompiledForest.from_sklearn(model)
+        self.assertFalse(compiled.float32_inputs)
+        np.testing.assert_allclose(compiled.predict(self.X_test), model.predict(self.X_test), rtol=1e-12, atol=1e-12)
+
+    def test_save_and_load(self):
+        model = RandomForestRegressor(n_estimators=5, random_state=0).fit(self.X, self.y)
+        compiled = CompiledForest.from_sklearn(model)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'forest.joblib')
+            compiled.save(path)
+            loaded = CompiledForest.load(path)
+        np.testing.assert_array_equal(loaded.predict(self.X_test), compiled.predict(self.X_test))
+        with self.assertRaises(ValueError):
+            loaded.predict(self.X_test[:, :3])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Unit tests for the hour-of-week congestion tensor
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from config import Config, PROJECT_ROOT, _project_path
+from services import congestion_tensor
+from services.congestion_tensor import CongestionTensor, build_congestion_tensor
+from services.ml_predictor import MLPredictor
+
+BOUNDS = [28.5, 77.1, 28.7, 77.3]
+
+
+class TestCongestionTensor(unittest.TestCase):
+    """Test building and slicing the tensor"""
+
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(0)
+        training = [{'hour_of_day': h, 'day_of_week': d, 'latitude': lat, 'longitude': 77.2,
+                     'traffic_level': float(rng.uniform(0, 100))}
+                    for h in range(24) for d in range(7) for lat in (28.55, 28.65)]
+        cls.predictor = MLPredictor()
+        assert cls.predictor.train_model(training)
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.tmpdir, 'congestion_how.npy')
+        cls.index = build_congestion_tensor(cls.predictor, cls.path, bounds=BOUNDS, cell_size_deg=0.05, chunk_cells=5)
+        cls.tensor = CongestionTensor.load(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpdir)
+
+    def test_layout(self):
+        """Test one float16 row of 168 hours per grid cell"""
+        self.assertEqual(self.index['cells'], len(self.tensor.grid))
+        self.assertEqual(self.tensor.values.shape, (len(self.tensor.grid), 168))
+        self.assertEqual(self.tensor.values.dtype, np.float16)
+        self.assertIsInstance(self.tensor.values, np.memmap)
+
+    def test_matches_live_predictions(self):
+        """Test a cell's week equals the model at the cell centre"""
+        lat, lon = self.tensor.grid.cell_center(self.tensor.grid.cell_index(28.62, 77.23))
+        how = np.arange(168)
+        live = self.predictor.predict_congestion({'hour': how % 24, 'day_of_week': how // 24, 'lat': lat, 'lon': lon})
+        np.testing.assert_allclose(self.tensor.week(28.62, 77.23), live, rtol=1e-2, atol=0.1)
+        np.testing.assert_array_equal(self.tensor.day(28.62, 77.23, 2), self.tensor.week(28.62, 77.23)[48:72])
+        self.assertIsNone(self.tensor.week(10.0, 10.0))
+
+    def test_busiest_hours_slices_tensor(self):
+        """Test the predictor answers from the tensor and falls back outside it"""
+        self.predictor.tensor_source = lambda: self.tensor
+        try:
+            with patch.object(self.predictor, 'predict_congestion') as predict:
+                result = self.predictor.predict_busiest_hours({'lat': 28.62, 'lon': 77.23}, '2024-01-03')
+            predict.assert_not_called()
+            self.assertEqual(result['source'], 'tensor')
+            self.assertEqual(len(result['daily_pattern']), 24)
+
+            outside = self.predictor.predict_busiest_hours({'lat': 12.0, 'lon': 77.0}, '2024-01-03')
+            self.assertEqual(outside['source'], 'model')
+
+            self.tensor.model_version = 'other'
+            self.predictor._serving = self.predictor._serving._replace(version='current')
+            stale = self.predictor.predict_busiest_hours({'lat': 28.62, 'lon': 77.23}, '2024-01-03')
+            self.assertEqual(stale['source'], 'model')
+        finally:
+            self.predictor.tensor_source = None
+            self.tensor.model_version = self.index['model_version']
+            self.predictor._serving = self.predictor._serving._replace(version=None)
+
+
+class TestTensorPath(unittest.TestCase):
+    """Test the API and the nightly script resolve the tensor to one file"""
+
+    def test_relative_paths_are_anchored_to_project_root(self):
+        self.assertEqual(_project_path('data/processed/congestion_how.npy'),
+                         os.path.join(PROJECT_ROOT, 'data', 'processed', 'congestion_how.npy'))
+        self.assertEqual(_project_path('/srv/congestion_how.npy'), '/srv/congestion_how.npy')
+        self.assertEqual(_project_path(''), '')
+        self.assertTrue(os.path.isabs(Config.CONGESTION_TENSOR_PATH))
+
+    def test_missing_tensor_is_reported_once(self):
+        path = os.path.join(tempfile.gettempdir(), 'no_such_tensor.npy')
+        with patch.object(Config, 'CONGESTION_TENSOR_PATH', path), \
+                self.assertLogs('services.congestion_tensor', level='WARNING') as logs:
+            self.assertIsNone(congestion_tensor.get_congestion_tensor())
+            self.assertIsNone(congestion_tensor.get_congestion_tensor())
+        self.assertEqual(len(logs.output), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+"""
+Unit tests for the shared feature pipeline
+"""
+
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from services.feature_pipeline import FeaturePipeline
+
+
+class TestFeaturePipeline(unittest.TestCase):
+    """Test that every input shape gives the same feature matrix"""
+
+    def setUp(self):
+        self.pipeline = FeaturePipeline()
+        self.frame = pd.DataFrame({'hour': [8, 14, 8], 'day_of_week': [1, 1, 6],
+                                   'lat': [28.61, 28.62, 28.63], 'lon': [77.2, 77.21, 77.22]})
+
+    def test_derived_features(self):
+        X = self.pipeline.transform(self.frame)
+        self.assertEqual(X.shape, (3, 6))
+        np.testing.assert_array_equal(X[:, 4], [0, 0, 1])    # is_weekend
+        np.testing.assert_array_equal(X[:, 5], [1, 0, 0])    # is_peak_hour (weekdays only)
+
+    def test_rows_columns_and_frames_agree(self):
+        rows = [{'hour_of_day': r.hour, 'day_of_week': r.day_of_week, 'latitude': r.lat, 'longitude': r.lon}
+                for r in self.frame.itertuples()]
+        columns = {name: self.frame[name].to_numpy() for name in self.frame}
+        expected = self.pipeline.transform(self.frame)
+        np.testing.assert_array_equal(self.pipeline.transform(rows), expected)
+        np.testing.assert_array_equal(self.pipeline.transform(columns), expected)
+
+    def test_scalars_broadcast_and_defaults_fill(self):
+        X = self.pipeline.transform({'hour': np.arange(24), 'lat': 28.6})
+        self.assertEqual(X.shape, (24, 6))
+        np.testing.assert_array_equal(X[:, 2], 28.6)
+        np.testing.assert_array_equal(X[:, 3], 0.0)
+
+    def test_spec_round_trip(self):
+        pipeline = FeaturePipeline(['hour', 'is_peak_hour', 'month'], target_scale=100)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'features.json')
+            pipeline.save(path)
+            self.assertEqual(FeaturePipeline.load(path), pipeline)
+        with self.assertRaises(ValueError):
+            FeaturePipeline(['hour', 'weather'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Unit tests for the fetch graph and the insights handlers built on it
+"""
+
+import time
+import unittest
+from unittest.mock import patch
+from app import create_app
+from services.fetch_graph import FetchGraph
+
+
+def _slow(value, delay=0.2):
+    time.sleep(delay)
+    return value
+
+
+def _fail():
+    raise RuntimeError('upstream down')
+
+
+class TestFetchGraph(unittest.TestCase):
+    """Test concurrency, dependencies, failures and the shared deadline"""
+
+    def test_independent_fetches_run_concurrently(self):
+        graph = FetchGraph(deadline=2)
+        for name in ('a', 'b', 'c'):
+            graph.add(name, _slow, name)
+        start = time.monotonic()
+        results, errors = graph.run()
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(results, {'a': 'a', 'b': 'b', 'c': 'c'})
+        self.assertEqual(errors, {})
+
+    def test_dependencies_receive_results_and_failures_propagate(self):
+        graph = FetchGraph(deadline=2)
+        graph.add('base', _slow, 2, delay=0.05)
+        graph.add('double', lambda base: base * 2, after=['base'])
+        graph.add('broken', _fail)
+        graph.add('needs_broken', lambda broken: broken, after=['broken'])
+        results, errors = graph.run()
+        self.assertEqual(results, {'base': 2, 'double': 4})
+        self.assertEqual(errors['broken'], 'upstream down')
+        self.assertIn('skipped', errors['needs_broken'])
+
+    def test_deadline_returns_partial_results(self):
+        graph = FetchGraph(deadline=0.3)
+        graph.add('fast', _slow, 'fast', delay=0.01)
+        graph.add('slow', _slow, 'slow', delay=1)
+        start = time.monotonic()
+        results, errors = graph.run()
+        self.assertLess(time.monotonic() - start, 0.8)
+        self.assertEqual(results, {'fast': 'fast'})
+        self.assertEqual(errors, {'slow': 'deadline exceeded'})
+
+
+class TestMobilityPatterns(unittest.TestCase):
+    """Test graceful degradation of /api/insights/mobility-patterns"""
+
+    def setUp(self):
+        self.app = create_app()
+        self.client = self.app.test_client()
+
+    @patch('routes.insights.traffic_api')
+    def test_failed_source_gives_partial_data(self, mock_api):
+        mock_api.get_traffic_flow.return_value = {'success': True, 'congestion_level': 'moderate'}
+        mock_api.get_traffic_incidents.return_value = {'success': False, 'error': 'timeout'}
+        mock_api.search_nearby_pois.return_value = {'success': True, 'pois': [{'name': 'Cafe'}]}
+
+        response = self.client.get('/api/insights/mobility-patterns?lat=28.61&lon=77.21')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()['data']
+        self.assertTrue(data['partial'])
+        self.assertEqual(data['unavailable'], {'incidents': 'timeout'})
+        self.assertEqual(data['data_sources'], {'traffic_flow': True, 'incidents': 0, 'pois': 1})
+
+if __name__ == '__main__':
+    unittest.main()
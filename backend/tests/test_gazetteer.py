@@ -0,0 +1,97 @@
+"""
+Unit tests for the offline gazetteer
+"""
+
+import unittest
+from unittest.mock import patch
+from services.gazetteer import Gazetteer, bounded_edit_distance
+from services.traffic_api import TrafficAPI
+
+
+class TestGazetteer(unittest.TestCase):
+    """Test exact, prefix and fuzzy place-name matching"""
+
+    def setUp(self):
+        self.gazetteer = Gazetteer()
+        self.gazetteer.add('Connaught Place', 28.6315, 77.2167, aliases=['CP', 'Rajiv Chowk'], popularity=10)
+        self.gazetteer.add('India Gate', 28.6129, 77.2295, popularity=8)
+        self.gazetteer.add('Indira Gandhi International Airport', 28.5562, 77.1000, popularity=5)
+
+    def test_exact_and_alias(self):
+        self.assertEqual(self.gazetteer.lookup('connaught place!')['name'], 'Connaught Place')
+        self.assertEqual(self.gazetteer.lookup('cp')['name'], 'Connaught Place')
+
+    def test_fuzzy_within_edit_budget(self):
+        place = self.gazetteer.lookup('Conaught Plce')
+        self.assertEqual(place['name'], 'Connaught Place')
+        self.assertEqual(place['match'], 'fuzzy')
+        self.assertIsNone(self.gazetteer.lookup('Gurgaon'))
+
+    def test_numbers_must_match(self):
+        """Test names differing only by a number are not fuzzed into each other"""
+        self.gazetteer.add('Sector 15, Noida', 28.5850, 77.3116)
+        self.gazetteer.add('Gate 1', 28.6000, 77.2000)
+        self.assertIsNone(self.gazetteer.lookup('sector 18 noida'))
+        self.assertIsNone(self.gazetteer.lookup('Gate 2'))
+        self.assertEqual(self.gazetteer.lookup('Sectr 15 Noida')['name'], 'Sector 15, Noida')
+
+    def test_prefix_is_not_an_answer(self):
+        """Test a bare prefix is left to upstream by lookup but still suggested"""
+        self.gazetteer.add('Noida Sector 18 Metro Station', 28.5708, 77.3261)
+        self.assertIsNone(self.gazetteer.lookup('Noida'))
+        self.assertEqual(self.gazetteer.prefix('Noida')[0]['name'], 'Noida Sector 18 Metro Station')
+
+    def test_prefix_ranked_by_popularity(self):
+        names = [p['name'] for p in self.gazetteer.prefix('ind')]
+        self.assertEqual(names, ['India Gate', 'Indira Gandhi International Airport'])
+
+    def test_relearned_place_takes_new_coordinates(self):
+        self.gazetteer.remember('Saket Mall', 28.52, 77.21, address='Select Citywalk, Saket')
+        self.gazetteer.remember('Saket Mall', 28.5286, 77.2190, address='Select Citywalk, Saket')
+        place = self.gazetteer.lookup('Saket Mall')
+        self.assertEqual((place['lat'], place['lon']), (28.5286, 77.2190))
+        # an upstream answer never moves a seeded place
+        self.gazetteer.add('India Gate', 28.70, 77.30, learned=True)
+        self.assertEqual(self.gazetteer.lookup('India Gate')['lat'], 28.6129)
+
+    def test_learned_places_are_capped_least_recently_used_first(self):
+        gazetteer = Gazetteer(max_learned=2)
+        gazetteer.add('Connaught Place', 28.6315, 77.2167)                 # seeded, never evicted
+        first = gazetteer.remember('Hauz Khas Village', 28.5535, 77.1942)
+        gazetteer.remember('Khan Market', 28.6003, 77.2270)
+        self.assertEqual(gazetteer.lookup('Hauz Khas Village')['id'], first)   # used: now most recent
+        gazetteer.remember('Lajpat Nagar', 28.5677, 77.2433)
+        self.assertEqual(len(gazetteer), 3)
+        self.assertIsNone(gazetteer.lookup('Khan Market'))
+        self.assertEqual(gazetteer.prefix('khan'), [])
+        self.assertEqual(gazetteer.lookup('Hauz Khas Village')['id'], first)
+        self.assertIsNotNone(gazetteer.lookup('Connaught Place'))
+
+    def test_bounded_edit_distance(self):
+        self.assertEqual(bounded_edit_distance('kitten', 'sitting', 3), 3)
+        self.assertEqual(bounded_edit_distance('kitten', 'sitting', 1), 2)
+
+    @patch('services.traffic_api.fetch_json')
+    @patch('services.traffic_api.get_gazetteer')
+    def test_geocode_goes_upstream_only_on_miss(self, mock_gazetteer, mock_fetch):
+        mock_gazetteer.return_value = self.gazetteer
+        mock_fetch.return_value = ({'results': [{
+            'position': {'lat': 28.4595, 'lon': 77.0266},
+            'address': {'freeformAddress': 'Gurugram, Haryana'},
+            'type': 'Geography'
+        }]}, False)
+        api = TrafficAPI()
+
+        self.assertEqual(api.geocode_location('India Gate')['source'], 'gazetteer')
+        self.assertEqual(mock_fetch.call_count, 0)
+        api.geocode_location('Gurgaon')
+        again = api.geocode_location('gurgaon')
+        self.assertEqual(mock_fetch.call_count, 1)
+        self.assertEqual(again['address'], 'Gurugram, Haryana')
+
+        self.gazetteer.add('Sector 15, Noida', 28.5850, 77.3116)
+        self.assertNotEqual(api.geocode_location('sector 18 noida').get('source'), 'gazetteer')
+        self.assertEqual(mock_fetch.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
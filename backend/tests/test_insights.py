@@ -5,6 +5,7 @@ Unit tests for insights endpoints
 import unittest
 from app import create_app
 from unittest.mock import patch, MagicMock
+from services.area_grid import AreaGrid
 
 class TestInsights(unittest.TestCase):
     """Test insights API endpoints"""
@@ -46,5 +47,49 @@ class TestInsights(unittest.TestCase):
         data = response.get_json()
         self.assertIn('busiest_hours', data)
 
+class TestBatchInsights(unittest.TestCase):
+    """Test the columnar batch endpoint"""
+
+    def setUp(self):
+        self.app = create_app()
+        self.client = self.app.test_client()
+        self.grid = AreaGrid((28.40, 76.84, 28.88, 77.35), cell_size_deg=0.01, max_age=3600)
+        self.grid.update_cell(self.grid.cell_index(28.6315, 77.2167),
+                              [{'name': 'Shop', 'category': 'shop'}], {'success': True, 'congestion_level': 'low'}, [])
+
+    @patch('routes.insights.traffic_api')
+    def test_points_share_cells_and_missing_cells_are_fetched(self, mock_api):
+        mock_api.search_nearby_pois.return_value = {'success': True, 'pois': []}
+        mock_api.get_traffic_flow.return_value = {'success': True, 'congestion_level': 'moderate'}
+        mock_api.get_traffic_incidents.return_value = {'success': True, 'incidents': []}
+
+        with patch('routes.insights.get_area_grid', return_value=self.grid):
+            response = self.client.post('/api/insights/batch', json={'points': [
+                [28.6315, 77.2167], {'lat': 28.6301, 'lon': 77.2199},   # same precomputed cell
+                [28.5501, 77.2501], [19.07, 72.87]                       # missing cell, outside the area
+            ]})
+        data = response.get_json()['data']
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['points']['cell'][0], data['points']['cell'][1])
+        self.assertEqual(data['points']['cell'][3], -1)
+        self.assertEqual(sorted(data['cells']['status']), ['grid', 'live'])
+        self.assertEqual(mock_api.get_traffic_flow.call_count, 1)   # only the missing cell went upstream
+
+    def test_bbox_is_sampled_per_cell(self):
+        with patch('routes.insights.get_area_grid', return_value=self.grid), \
+             patch('routes.insights.Config.INSIGHTS_BATCH_MAX_FETCH', 0):
+            response = self.client.post('/api/insights/batch', json={
+                'bbox': [28.60, 77.20, 28.64, 77.23], 'resolution': 0.01
+            })
+        data = response.get_json()['data']
+        self.assertEqual(len(data['cells']['cell']), 12)
+        self.assertEqual(data['cells']['status'].count('grid'), 1)
+        self.assertEqual(data['not_fetched'], 11)
+
+    def test_rejects_missing_points(self):
+        response = self.client.post('/api/insights/batch', json={})
+        self.assertEqual(response.status_code, 400)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -3,8 +3,9 @@ Unit tests for ML prediction service
 """
 
 import unittest
-from services.ml_predictor import MLPredictor
+from services.ml_predictor import MLPredictor, TRAFFIC_LEVELS, LEVEL_PERCENTAGES
 import numpy as np
+from unittest.mock import patch
 
 class TestMLPredictor(unittest.TestCase):
     """Test ML prediction service"""
@@ -53,5 +54,83 @@ class TestMLPredictor(unittest.TestCase):
         self.assertIn('predicted_travel_time', result)
         self.assertIn('traffic_impact', result)
 
+    def test_batch_matches_single_predictions(self):
+        """Test one batched predict gives the per-row results"""
+        rng = np.random.default_rng(0)
+        training = [{'hour_of_day': h, 'day_of_week': d, 'latitude': 28.6, 'longitude': 77.2,
+                     'traffic_level': float(rng.uniform(0, 100))}
+                    for h in range(24) for d in range(7)]
+        self.assertTrue(self.predictor.train_model(training))
+
+        rows = [{'hour_of_day': h, 'day_of_week': h % 7, 'latitude': 28.6, 'longitude': 77.2} for h in range(24)]
+        levels, percentages = self.predictor.predict_batch(rows)
+        self.assertEqual(list(levels), [self.predictor.predict_traffic(r) for r in rows])
+        self.assertEqual(list(percentages), [dict(zip(TRAFFIC_LEVELS, LEVEL_PERCENTAGES))[l] for l in levels])
+
+        compiled = self.predictor.compiled
+        with patch.object(compiled, 'predict', wraps=compiled.predict) as predict:
+            result = self.predictor.predict_busiest_hours({'lat': 28.6, 'lon': 77.2}, '2024-01-01')
+        self.assertEqual(predict.call_count, 1)
+        self.assertEqual(len(result['daily_pattern']), 24)
+
+        self.predictor.compiled = None                # sklearn path gives the same levels
+        self.assertEqual(list(self.predictor.predict_batch(rows)[0]), list(levels))
+
+    def test_untrained_batch_uses_rules(self):
+        """Test the rule-based fallback over a matrix"""
+        levels, _ = self.predictor.predict_batch([{'hour_of_day': h} for h in (8, 12, 22)])
+        self.assertEqual(list(levels), ['heavy', 'moderate', 'light'])
+
+    def test_memoized_predictions(self):
+        """Test repeated predictions hit the memo and a new model invalidates it"""
+        rng = np.random.default_rng(1)
+        training = [{'hour_of_day': h, 'day_of_week': d, 'latitude': 28.6, 'longitude': 77.2,
+                     'traffic_level': float(rng.uniform(0, 100))}
+                    for h in range(24) for d in range(7)]
+        self.assertTrue(self.predictor.train_model(training))
+        route = {'travel_time': 600, 'start_lat': 28.6012, 'start_lon': 77.2031, 'historical_congestion': 40}
+
+        with patch.object(self.predictor.compiled, 'predict', wraps=self.predictor.compiled.predict) as predict:
+            first = self.predictor.predict_route_time(route, '2024-01-01 08:10:00')
+            # same cell, hour and weekday: answered from the memo
+            again = self.predictor.predict_route_time(dict(route, start_lat=28.6004), '2024-01-01 08:45:00')
+        self.assertEqual(predict.call_count, 1)
+        self.assertEqual(first['predicted_travel_time'], again['predicted_travel_time'])
+        stats = self.predictor.cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+        # the memoized answer is the model's prediction for the snapped features
+        features = self.predictor._create_route_features(route, '2024-01-01 08:10:00')
+        levels, _ = self.predictor.predict_batch([self.predictor._quantize(features)])
+        self.assertEqual(self.predictor.predict_traffic(features), levels[0])
+
+        self.assertTrue(self.predictor.train_model([dict(row, traffic_level=95.0) for row in training]))
+        self.assertEqual(self.predictor.predict_traffic(features), 'very_heavy')
+        self.assertEqual(len(self.predictor.memo), 1)
+
+    def test_memo_ignores_prediction_from_replaced_model(self):
+        """Test a predict that overlaps a model swap does not poison the memo"""
+        training = [{'hour_of_day': h, 'day_of_week': d, 'latitude': 28.6, 'longitude': 77.2, 'traffic_level': 10.0}
+                    for h in range(24) for d in range(7)]
+        self.assertTrue(self.predictor.train_model(training))
+        features = {'hour_of_day': 8, 'day_of_week': 0, 'latitude': 28.6, 'longitude': 77.2}
+        congestion = self.predictor._congestion
+
+        swapped = []
+
+        def swap_midway(serving, rows):
+            result = congestion(serving, rows)
+            if not swapped:
+                # while this prediction still runs on the old model, another thread
+                # retrains and serves a request of its own (which resets the memo)
+                swapped.append(True)
+                self.assertTrue(self.predictor.train_model([dict(row, traffic_level=95.0) for row in training]))
+                self.predictor.predict_traffic(dict(features, hour_of_day=20))
+            return result
+
+        with patch.object(self.predictor, '_congestion', side_effect=swap_midway):
+            self.assertEqual(self.predictor.predict_traffic(features), 'very_light')
+        self.assertEqual(self.predictor.predict_traffic(features), 'very_heavy')
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""
+Unit tests for the model registry
+"""
+
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+from services.compiled_forest import CompiledForest
+from services.feature_pipeline import FeaturePipeline
+from services.ml_predictor import MLPredictor
+from services.model_registry import ModelRegistry, write_pointer
+
+
+def training_matrix(n=500):
+    rng = np.random.default_rng(0)
+    return FeaturePipeline().transform({'hour': np.arange(n) % 24, 'day_of_week': np.arange(n) % 7,
+                                        'lat': rng.uniform(28.4, 28.7, n), 'lon': rng.uniform(77.0, 77.4, n)})
+
+
+class TestModelRegistry(unittest.TestCase):
+    """Test lazy memory-mapped loading"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        X = training_matrix()
+        self.scaler = StandardScaler().fit(X)
+        self.model = RandomForestRegressor(n_estimators=10, random_state=0).fit(
+            self.scaler.transform(X), X[:, 0] * 4 / 100)    # 0-1 congestion, like the core trainer
+        joblib.dump(self.scaler, f"{self.dir}/traffic_scaler_core.pkl")
+        joblib.dump(self.model, f"{self.dir}/traffic_rf_core.pkl")
+        CompiledForest.from_sklearn(self.model).save(f"{self.dir}/traffic_rf_core.forest.joblib")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_artifacts_load_once_and_are_memory_mapped(self):
+        registry = ModelRegistry(self.dir)
+        self.assertEqual(registry.stats(), {})
+        compiled = registry.get('traffic_rf_core.forest')
+        self.assertIs(registry.get('traffic_rf_core.forest'), compiled)
+        self.assertIsInstance(compiled.value, np.memmap)
+        stats = registry.stats()['traffic_rf_core.forest']
+        self.assertGreater(stats['file_bytes'], 0)
+        self.assertIn('load_seconds', stats)
+        with self.assertRaises(FileNotFoundError):
+            registry.get('missing_model')
+
+    def test_preload_skips_missing_names(self):
+        registry = ModelRegistry(self.dir)
+        with self.assertNoLogs('services.model_registry', level='ERROR'):
+            registry.preload('traffic_scaler_core', None)
+        self.assertEqual(list(registry.stats()), ['traffic_scaler_core'])
+
+    def test_predictor_loads_on_first_prediction(self):
+        registry = ModelRegistry(self.dir)
+        predictor = MLPredictor(registry=registry)
+        self.assertEqual(registry.stats(), {})            # nothing loaded at construction
+
+        levels, _ = predictor.predict_batch([{'hour_of_day': h} for h in range(24)])
+        self.assertTrue(predictor.is_trained)
+        self.assertIsInstance(predictor.compiled.value, np.memmap)
+        self.assertNotIn('traffic_rf_core', registry.stats())   # compiled arrays used, sklearn model not loaded
+        self.assertEqual(len(levels), 24)
+
+    def test_artifact_without_pipeline_serves_percentages(self):
+        """Test core artifacts saved before feature specs keep the trainer's 0-1 target scaled to 0-100"""
+        predictor = MLPredictor(registry=ModelRegistry(self.dir))
+        congestion = predictor.predict_congestion({'hour': [2, 23]})
+        self.assertEqual(predictor.pipeline.target_scale, 100)
+        self.assertEqual(predictor.predict_traffic({'hour_of_day': 2}), 'very_light')     # ~8%
+        self.assertEqual(predictor.predict_traffic({'hour_of_day': 23}), 'very_heavy')    # ~92%
+        self.assertGreater(congestion[1], 80)
+
+
+class TestHotReload(unittest.TestCase):
+    """Test pointer-driven model swaps"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.X = training_matrix()
+        self.publish('v1', target_scale=1)
+        self.predictor = MLPredictor(registry=ModelRegistry(self.dir))
+        self.predictor.load_from_registry()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def publish(self, version, target_scale):
+        scaler = StandardScaler().fit(self.X)
+        model = RandomForestRegressor(n_estimators=5, random_state=0).fit(
+            scaler.transform(self.X), self.X[:, 0] * target_scale)
+        joblib.dump(scaler, f"{self.dir}/scaler_{version}.pkl")
+        joblib.dump(model, f"{self.dir}/model_{version}.pkl")
+        CompiledForest.from_sklearn(model).save(f"{self.dir}/model_{version}.forest.joblib")
+        FeaturePipeline(target_scale=1).save(f"{self.dir}/model_{version}.features.json")
+        return write_pointer(self.dir, version, f"model_{version}.pkl", f"scaler_{version}.pkl",
+                             f"model_{version}.forest.joblib", f"model_{version}.features.json")
+
+    def test_new_version_is_swapped_in(self):
+        self.assertEqual(self.predictor.version, 'v1')
+        self.assertFalse(self.predictor.reload_if_changed())       # pointer unchanged
+        night = [{'hour_of_day': 23}]
+        self.assertEqual(self.predictor.predict_traffic(night[0]), 'very_light')   # 23 -> ~23
+
+        self.publish('v2', target_scale=4)                          # 23 -> ~92
+        self.assertTrue(self.predictor.reload_if_changed())
+        self.assertEqual(self.predictor.version, 'v2')
+        self.assertEqual(self.predictor.predict_traffic(night[0]), 'very_heavy')
+
+    def test_corrupt_version_is_rejected(self):
+        pointer = self.publish('v2', target_scale=4)
+        pointer['checksums'][pointer['compiled']] = '0' * 64
+        with open(f"{self.dir}/current.json", 'w') as f:
+            json.dump(pointer, f)
+        self.assertFalse(self.predictor.reload_if_changed())
+        self.assertEqual(self.predictor.version, 'v1')
+        with patch.object(self.predictor, '_load_version') as load:
+            self.assertFalse(self.predictor.reload_if_changed())    # not retried until the pointer changes
+            load.assert_not_called()
+
+    def test_predictions_flow_during_reload(self):
+        errors, stop = [], threading.Event()
+
+        def hammer():
+            while not stop.is_set():
+                levels, _ = self.predictor.predict_batch(self.X[:24])
+                if len(levels) != 24:
+                    errors.append(levels)
+
+        thread = threading.Thread(target=hammer)
+        thread.start()
+        try:
+            for i in range(2, 5):
+                self.publish(f"v{i}", target_scale=i)
+                self.assertTrue(self.predictor.reload_if_changed())
+        finally:
+            stop.set()
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(self.predictor.version, 'v4')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Unit tests for the local POI store
+"""
+
+import unittest
+from unittest.mock import patch
+from services.poi_store import POIStore, poi_place_key
+from services.traffic_api import TrafficAPI
+
+
+class TestPOIStore(unittest.TestCase):
+    """Test radius / category queries and cell freshness"""
+
+    def setUp(self):
+        self.store = POIStore(cell_size_deg=0.01, refresh_horizon=3600)
+        self.store.add('India Gate', 28.6129, 77.2295, category='important tourist attraction')
+        self.store.add('Cafe One', 28.6135, 77.2300, category='restaurant')
+        self.store.add('Far Cafe', 28.7000, 77.1000, category='restaurant')
+
+    def test_radius_and_category_query(self):
+        results = self.store.query(28.6130, 77.2296, 1000)
+        self.assertEqual([r['name'] for r in results], ['India Gate', 'Cafe One'])
+        restaurants = self.store.query(28.6130, 77.2296, 1000, category='restaurant')
+        self.assertEqual([r['name'] for r in restaurants], ['Cafe One'])
+
+    def test_duplicates_are_merged(self):
+        self.store.add('Cafe One', 28.6135, 77.2300, category='restaurant', tags=['coffee'])
+        self.assertEqual(len(self.store), 3)
+        self.assertEqual(len(self.store.query(28.6135, 77.2300, 50, category='coffee')), 1)
+
+    def test_cells_become_warm_after_fetch(self):
+        cold = self.store.cold_cells(28.6130, 77.2296, 2000, 'restaurant')
+        self.assertTrue(cold)
+        self.store.mark_fetched(cold, 'restaurant')
+        self.assertEqual(self.store.cold_cells(28.6130, 77.2296, 2000, 'restaurant'), [])
+        self.assertTrue(self.store.cold_cells(28.6130, 77.2296, 2000, 'parking'))
+
+    def test_truncated_fetch_only_warms_covered_cells(self):
+        cold = self.store.cold_cells(28.6130, 77.2296, 3000, 'restaurant')
+        records = [{'latitude': 28.6135, 'longitude': 77.2300}]   # farthest result ~60 m away
+        self.assertEqual(self.store.covered_cells(cold, 28.6130, 77.2296, records, truncated=False), cold)
+        covered = self.store.covered_cells(cold, 28.6130, 77.2296, records, truncated=True)
+        self.assertEqual(covered, [])
+        records.append({'latitude': 28.6400, 'longitude': 77.2296})   # ~3 km out
+        covered = self.store.covered_cells(cold, 28.6130, 77.2296, records, truncated=True)
+        self.assertTrue(0 < len(covered) < len(cold))
+
+    def test_growth_is_bounded(self):
+        store = POIStore(cell_size_deg=0.01, max_pois=10, max_fetched=5)
+        for i in range(30):
+            store.add(f'poi {i}', 28.0 + 0.01 * i + 0.005, 77.005, category='restaurant')
+        self.assertLessEqual(len(store), 10)
+        self.assertGreater(store.evicted, 0)
+        names = [r['name'] for r in store.query(28.295, 77.005, 100)]
+        self.assertEqual(names, ['poi 29'])           # most recently filled cells are kept
+        self.assertEqual(store.query(28.005, 77.005, 100), [])
+        self.assertEqual(len(store.query(28.295, 77.005, 100, category='restaurant')), 1)
+
+        store.mark_fetched([(i, 0) for i in range(20)], 'restaurant')
+        self.assertLessEqual(len(store._fetched), 5)
+
+
+class TestNearbyPOIs(unittest.TestCase):
+    """Test TrafficAPI.search_nearby_pois goes upstream only for cold cells"""
+
+    @patch('services.traffic_api.get_poi_store')
+    @patch('services.traffic_api.TrafficAPI._fetch_nearby_pois')
+    def test_second_query_is_local(self, mock_fetch, mock_store):
+        mock_store.return_value = POIStore()
+        mock_fetch.return_value = {'success': True, 'stale': False, 'pois': [
+            {'name': 'Cafe One', 'category': 'restaurant', 'latitude': 28.6135, 'longitude': 77.2300}
+        ]}
+        api = TrafficAPI()
+        first = api.search_nearby_pois(28.6130, 77.2296, 1000, 'restaurant')
+        second = api.search_nearby_pois(28.6130, 77.2296, 1000, 'restaurant')
+
+        self.assertEqual(mock_fetch.call_count, 1)
+        self.assertEqual(first['source'], 'upstream')
+        self.assertEqual(second['source'], 'local')
+        self.assertEqual(second['pois'][0]['name'], 'Cafe One')
+
+class TestPOIPersistence(unittest.TestCase):
+    """Test upstream POIs are upserted, not appended"""
+
+    @patch('models.models.POI._get_collection')
+    def test_refetched_pois_are_upserted_by_place_key(self, get_collection):
+        records = [
+            {'name': 'India Gate', 'latitude': 28.61291, 'longitude': 77.22951, 'address': 'Rajpath'},
+            {'name': 'india  gate', 'latitude': 28.61293, 'longitude': 77.22949},   # same place, refetched
+            {'name': 'Lodhi Garden', 'latitude': 28.5931, 'longitude': 77.2197},
+            {'name': None, 'latitude': 28.6, 'longitude': 77.2}
+        ]
+        self.assertEqual(POIStore.save_to_db(records), 2)
+        ops = get_collection.return_value.bulk_write.call_args.args[0]
+        self.assertEqual(sorted(op._filter['place_key'] for op in ops),
+                         sorted([poi_place_key('India Gate', 28.6129, 77.2295),
+                                 poi_place_key('Lodhi Garden', 28.5931, 77.2197)]))
+        self.assertTrue(all(op._upsert for op in ops))
+        self.assertFalse(get_collection.return_value.bulk_write.call_args.kwargs['ordered'])
+
+
+if __name__ == '__main__':
+    unittest.main()
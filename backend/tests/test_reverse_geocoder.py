@@ -0,0 +1,33 @@
+"""
+Unit tests for the local reverse geocoder
+"""
+
+import unittest
+from services.reverse_geocoder import ReverseGeocoder
+
+
+class TestReverseGeocoder(unittest.TestCase):
+    """Test nearest-address lookups"""
+
+    def setUp(self):
+        self.geocoder = ReverseGeocoder(max_distance_m=25, rebuild_threshold=2)
+        self.geocoder.add(28.61290, 77.22950, 'Rajpath, India Gate, New Delhi')
+        self.geocoder.add(28.63150, 77.21670, 'Connaught Place, New Delhi')
+        self.geocoder.add(28.55620, 77.10000, 'IGI Airport, New Delhi')
+
+    def test_exact_quantized_hit(self):
+        self.assertEqual(self.geocoder.nearest(28.612901, 77.229501), ('Rajpath, India Gate, New Delhi', 0.0))
+
+    def test_nearest_within_range(self):
+        address, distance = self.geocoder.nearest(28.63160, 77.21675)
+        self.assertEqual(address, 'Connaught Place, New Delhi')
+        self.assertLess(distance, 25)
+        # ~15 m from a point that is still pending (not yet in the tree)
+        address, _ = self.geocoder.nearest(28.55632, 77.10005)
+        self.assertEqual(address, 'IGI Airport, New Delhi')
+
+    def test_miss_when_too_far(self):
+        self.assertIsNone(self.geocoder.nearest(28.70, 77.10))
+
+if __name__ == '__main__':
+    unittest.main()
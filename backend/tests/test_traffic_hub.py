@@ -0,0 +1,68 @@
+"""
+Unit tests for the live traffic subscription hub
+"""
+
+import unittest
+from unittest.mock import MagicMock
+from services.area_grid import AreaGrid
+from services.traffic_hub import TrafficHub
+
+FLOW = {'success': True, 'current_speed': 30, 'free_flow_speed': 50, 'current_travel_time': 120,
+        'free_flow_travel_time': 80, 'confidence': 0.9, 'congestion_level': 'moderate'}
+INCIDENT = {'type': 'Feature', 'category': 6, 'start_time': '2024-01-01T08:00:00Z',
+            'description': 'Stationary traffic', 'coordinates': [[77.21, 28.63]]}
+
+
+class TestTrafficHub(unittest.TestCase):
+    """Test shared polling and delta fan-out"""
+
+    def setUp(self):
+        self.api = MagicMock()
+        self.api.get_traffic_flow.return_value = FLOW
+        self.api.get_traffic_incidents.return_value = {'success': True, 'incidents': [INCIDENT]}
+        self.grid = AreaGrid((28.40, 76.84, 28.88, 77.35), cell_size_deg=0.01)
+        self.hub = TrafficHub(self.api, self.grid, interval=60)
+        self.cell = self.grid.cell_index(28.6315, 77.2167)
+
+    def drain(self, sub):
+        events = []
+        while (item := sub.next(timeout=0)) is not None:
+            events.append(item)
+        return events
+
+    def test_upstream_calls_follow_cells_not_clients(self):
+        subs = [self.hub.subscribe([self.cell]) for _ in range(5)]
+        self.hub.poll_once()
+        self.assertEqual(self.api.get_traffic_flow.call_count, 1)
+        for sub in subs:
+            self.assertEqual([e for e, _ in self.drain(sub)], ['snapshot'])
+
+    def test_only_changes_are_pushed(self):
+        sub = self.hub.subscribe([self.cell])
+        self.hub.poll_once()
+        self.drain(sub)
+
+        self.hub.poll_once()                       # nothing changed
+        self.assertEqual(self.drain(sub), [])
+
+        self.api.get_traffic_flow.return_value = dict(FLOW, current_speed=12, congestion_level='high')
+        self.api.get_traffic_incidents.return_value = {'success': True, 'incidents': []}
+        self.hub.poll_once()
+        events = dict(self.drain(sub))
+        self.assertEqual(events['flow']['changes'], {'current_speed': 12, 'congestion_level': 'high'})
+        self.assertEqual(events['incidents']['added'], [])
+        self.assertEqual(len(events['incidents']['removed']), 1)
+
+    def test_late_subscriber_gets_snapshot_and_unsubscribe_stops_polling(self):
+        first = self.hub.subscribe([self.cell])
+        self.hub.poll_once()
+        late = self.hub.subscribe([self.cell])
+        self.assertEqual(self.drain(late)[0][0], 'snapshot')
+
+        self.hub.unsubscribe(first)
+        self.hub.unsubscribe(late)
+        self.assertEqual(self.hub.poll_once(), 0)
+        self.assertEqual(self.hub.stats()['cells'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
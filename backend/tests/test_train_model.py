@@ -0,0 +1,142 @@
+"""
+Unit tests for the model training pipeline
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from ml_models.training.train_model import TrafficModelTrainer, DATA_DTYPES, iter_synthetic_chunks, peak_rss_mb
+from services.ml_predictor import MLPredictor
+from services.model_registry import ModelRegistry
+
+
+class TestSyntheticData(unittest.TestCase):
+    """Test the vectorized synthetic data generator"""
+
+    def setUp(self):
+        self.trainer = TrafficModelTrainer()
+
+    def test_columns_and_patterns(self):
+        """Test compact dtypes and the traffic rules the data encodes"""
+        df = self.trainer.generate_synthetic_data(50000, seed=1)
+        self.assertEqual(len(df), 50000)
+        self.assertEqual({c: df[c].dtype for c in df}, {c: np.dtype(t) for c, t in DATA_DTYPES.items()})
+        np.testing.assert_array_equal(df['is_weekend'], df['day_of_week'] >= 5)
+        self.assertTrue(df['congestion_level'].between(0, 1).all())
+
+        peak = df[df['is_peak_hour'] == 1]['congestion_level'].mean()
+        night = df[(df['hour'] <= 5) & (df['is_weekend'] == 1)]['congestion_level'].mean()
+        self.assertAlmostEqual(peak, 0.9, delta=0.03)
+        self.assertAlmostEqual(night, 0.1, delta=0.03)
+
+    def test_seeded_and_chunked(self):
+        """Test the same seed reproduces the data and chunks add up to n_samples"""
+        a = self.trainer.generate_synthetic_data(1000, seed=7, chunk_size=300)
+        b = self.trainer.generate_synthetic_data(1000, seed=7, chunk_size=300)
+        self.assertTrue(a.equals(b))
+        self.assertEqual([len(c['hour']) for c in iter_synthetic_chunks(1000, 7, 300)], [300, 300, 300, 100])
+
+    def test_writes_chunks_to_disk(self):
+        """Test chunked columnar output"""
+        tmpdir = tempfile.mkdtemp()
+        try:
+            paths = self.trainer.generate_synthetic_data(2500, chunk_size=1000, output_dir=tmpdir)
+            self.assertEqual([os.path.basename(p) for p in paths],
+                             ['part-00000.npz', 'part-00001.npz', 'part-00002.npz'])
+            with np.load(paths[-1]) as last:
+                self.assertEqual(len(last['congestion_level']), 500)
+                self.assertEqual(last['hour'].dtype, np.int8)
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+    def test_trainer_uses_requested_rows_and_seed(self):
+        """Test synthetic_rows / seed reach the generated data set, defaults included"""
+        trainer = TrafficModelTrainer(synthetic_rows=1200, seed=7)
+        self.assertEqual(len(trainer.data), 1200)
+        self.assertTrue(trainer.data.equals(trainer.generate_synthetic_data(1200, seed=7)))
+
+    def test_peak_rss_without_resource_module(self):
+        """Test the trainer still reports on platforms without `resource`"""
+        with patch.dict(sys.modules, {'resource': None}):
+            self.assertIsNone(peak_rss_mb())
+
+
+class TestEngines(unittest.TestCase):
+    """Test the training engines"""
+
+    def test_hist_gradient_boosting_is_served_compiled(self):
+        """Test the histogram boosting engine saves a compiled artifact the API serves"""
+        trainer = TrafficModelTrainer()
+        metrics = trainer.train(model_type='hist_gradient_boosting')
+        self.assertGreater(metrics['test_r2'], 0.8)
+        self.assertLess(trainer.model.n_iter_, 500)   # early stopping
+
+        tmpdir = tempfile.mkdtemp()
+        try:
+            trainer.save_model(output_dir=tmpdir)
+            predictor = MLPredictor(registry=ModelRegistry(tmpdir))
+            row = {'hour': 8, 'day_of_week': 1, 'lat': 28.6, 'lon': 77.2}
+            congestion = predictor.predict_congestion(row)
+            self.assertIsNotNone(predictor.compiled)
+            self.assertAlmostEqual(congestion[0], trainer.predict_sample(8, 1, 28.6, 77.2) * 100, places=6)
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+class TestStreamingTraining(unittest.TestCase):
+    """Test out-of-core training"""
+
+    def setUp(self):
+        self.trainer = TrafficModelTrainer(generate=False)
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_csv_and_chunk_directory_agree(self):
+        """Test the same rows give the same model from a CSV and from npz chunks"""
+        chunks_dir = os.path.join(self.tmpdir, 'chunks')
+        self.trainer.generate_synthetic_data(20000, chunk_size=7000, output_dir=chunks_dir)
+        csv_path = os.path.join(self.tmpdir, 'history.csv')
+        self.trainer.generate_synthetic_data(20000, chunk_size=7000).to_csv(csv_path, index=False)
+
+        from_csv = self.trainer.train_streaming(csv_path, chunk_size=7000, epochs=1)
+        coef = self.trainer.model.coef_.copy()
+        from_chunks = self.trainer.train_streaming(chunks_dir, chunk_size=7000, epochs=1)
+        np.testing.assert_allclose(self.trainer.model.coef_, coef, rtol=1e-4)
+
+        self.assertEqual(from_csv['rows'], 20000)
+        self.assertGreater(from_chunks['test_r2'], 0.6)
+        self.assertGreater(from_chunks['rows_per_second'], 0)
+        self.assertGreater(from_chunks['peak_rss_mb'], 0)
+
+    def test_streaming_trainer_generates_nothing_up_front(self):
+        """Test generate=False skips the in-memory synthetic data set"""
+        with patch.object(TrafficModelTrainer, 'generate_synthetic_data') as generate:
+            trainer = TrafficModelTrainer(generate=False)
+        generate.assert_not_called()
+        self.assertIsNone(trainer.data)
+
+    def test_streamed_model_is_served(self):
+        """Test a non-tree model saves without a compiled forest and serves through sklearn"""
+        csv_path = os.path.join(self.tmpdir, 'history.csv')
+        self.trainer.generate_synthetic_data(5000).to_csv(csv_path, index=False)
+        self.trainer.train_streaming(csv_path, chunk_size=2000, epochs=1)
+        self.trainer.save_model(output_dir=self.tmpdir)
+
+        predictor = MLPredictor(registry=ModelRegistry(self.tmpdir))
+        congestion = predictor.predict_congestion({'hour': [8, 3], 'day_of_week': [1, 6], 'lat': 28.6, 'lon': 77.2})
+        self.assertIsNone(predictor.compiled)
+        self.assertGreater(congestion[0], congestion[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+Unit tests for upstream circuit breaker and stale-cache fallback
+"""
+
+import threading
+import unittest
+from unittest.mock import patch, MagicMock
+import requests
+from config import Config
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError, OPEN, HALF_OPEN, CLOSED
+from services import upstream
+
+
+def _failing():
+    raise requests.exceptions.Timeout('timed out')
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test circuit breaker state transitions"""
+
+    def test_opens_after_threshold_and_fails_fast(self):
+        breaker = CircuitBreaker('test', failure_threshold=2, recovery_timeout=60)
+        for _ in range(2):
+            with self.assertRaises(requests.exceptions.Timeout):
+                breaker.call(_failing)
+        self.assertEqual(breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.call(lambda: 'ok')
+
+    def test_half_open_probe_recovers(self):
+        breaker = CircuitBreaker('test', failure_threshold=1, recovery_timeout=0)
+        with self.assertRaises(requests.exceptions.Timeout):
+            breaker.call(_failing)
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertEqual(breaker.call(lambda: 'ok'), 'ok')
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_slow_calls_count_as_failures(self):
+        breaker = CircuitBreaker('test', failure_threshold=1, recovery_timeout=60, latency_threshold=0.0001)
+        breaker.call(lambda: sum(range(100000)))
+        self.assertEqual(breaker.state, OPEN)
+
+
+class TestFetchJson(unittest.TestCase):
+    """Test stale-cache fallback in fetch_json"""
+
+    @patch('services.upstream.requests.get')
+    def test_serves_stale_when_upstream_fails(self, mock_get):
+        ok = MagicMock()
+        ok.json.return_value = {'flowSegmentData': {'currentSpeed': 30}}
+        mock_get.return_value = ok
+
+        data, stale = upstream.fetch_json('test.stale', 'https://example.test/flow', {'point': '1,2'})
+        self.assertFalse(stale)
+
+        mock_get.side_effect = requests.exceptions.ConnectionError('down')
+        data, stale = upstream.fetch_json('test.stale', 'https://example.test/flow', {'point': '1,2'})
+        self.assertTrue(stale)
+        self.assertEqual(data['flowSegmentData']['currentSpeed'], 30)
+
+    @patch('services.upstream.requests.get')
+    def test_raises_request_exception_without_cache(self, mock_get):
+        mock_get.side_effect = requests.exceptions.ConnectionError('down')
+        with self.assertRaises(requests.exceptions.RequestException):
+            upstream.fetch_json('test.nocache', 'https://example.test/none', {'point': '3,4'})
+
+    @patch('services.upstream.requests.get')
+    def test_open_circuit_does_not_spend_rate_budget(self, mock_get):
+        breaker = upstream.circuit_for('test.open')
+        for _ in range(Config.CIRCUIT_FAILURE_THRESHOLD):
+            breaker.record_failure()
+        limiter = upstream.rate_limiter_for('test.open')
+        with patch.object(limiter, 'acquire') as acquire:
+            with self.assertRaises(upstream.UpstreamUnavailable):
+                upstream.fetch_json('test.open', 'https://example.test/open', {'point': '5,6'})
+        acquire.assert_not_called()
+        mock_get.assert_not_called()
+
+class TestHedging(unittest.TestCase):
+    """Test adaptive timeouts and hedged requests"""
+
+    def _warm(self, endpoint, seconds, n=Config.UPSTREAM_MIN_SAMPLES):
+        tracker = upstream.latency_for(endpoint)
+        for _ in range(n):
+            tracker.record(seconds)
+
+    def test_adaptive_timeout_follows_observed_latency(self):
+        self.assertEqual(upstream.adaptive_timeout('test.timeout', 10), 10)
+        self._warm('test.timeout', 1.0)
+        self.assertAlmostEqual(upstream.adaptive_timeout('test.timeout', 10), 1.0 * Config.UPSTREAM_TIMEOUT_MULTIPLIER)
+        self.assertEqual(upstream.adaptive_timeout('test.timeout', 2), 2)
+
+    @patch('services.upstream.requests.get')
+    def test_hedge_wins_when_primary_is_slow(self, mock_get):
+        self._warm('test.hedge', 0.01)
+        release = threading.Event()
+        calls = []
+
+        def fake_get(url, params=None, timeout=None):
+            calls.append(url)
+            if len(calls) == 1:
+                release.wait(2)  # primary hangs
+            resp = MagicMock()
+            resp.json.return_value = {'call': len(calls)}
+            return resp
+
+        mock_get.side_effect = fake_get
+        limiter = upstream.rate_limiter_for('test.hedge')
+        tokens_before = limiter._tokens
+        data, stale = upstream.fetch_json('test.hedge', 'https://example.test/hedge', {}, timeout=5, hedge=True)
+        release.set()
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(data, {'call': 2})
+        # primary and hedge both consumed a token
+        self.assertLessEqual(limiter._tokens, tokens_before - 2 + 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,232 @@
+"""
+Bounded caching utilities
+LRU cache with TTL expiry, entry/byte limits, hit/miss/eviction counters and
+an optional shared backend so several workers can reuse each other's entries
+"""
+
+import pickle
+import threading
+import time
+import logging
+from collections import OrderedDict
+
+from config import Config
+
+try:
+    import redis
+except Exception:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class RedisBackend:
+    """Shared second-level store; Redis handles expiry and its own eviction"""
+
+    def __init__(self, url, namespace='geosense'):
+        if redis is None:
+            raise RuntimeError('redis package is not installed')
+        self.client = redis.Redis.from_url(url)
+        self.namespace = namespace
+
+    def _key(self, cache_name, key):
+        return f"{self.namespace}:{cache_name}:{key}"
+
+    def get(self, cache_name, key):
+        """(value, seconds left or None if it never expires); (None, None) on a miss"""
+        pipe = self.client.pipeline()
+        pipe.get(self._key(cache_name, key))
+        pipe.pttl(self._key(cache_name, key))
+        raw, pttl = pipe.execute()
+        if raw is None:
+            return None, None
+        return pickle.loads(raw), (pttl / 1000 if pttl and pttl > 0 else None)
+
+    def set(self, cache_name, key, value, ttl=None):
+        raw = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if ttl:
+            self.client.setex(self._key(cache_name, key), int(max(1, ttl)), raw)
+        else:
+            self.client.set(self._key(cache_name, key), raw)
+
+    def delete(self, cache_name, key):
+        self.client.delete(self._key(cache_name, key))
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache
+
+    Entries expire after `ttl` seconds (per-entry override allowed). When
+    `max_entries` or `max_bytes` is exceeded the least recently used entries
+    are evicted. With a shared backend, local misses fall through to it and
+    writes are mirrored to it.
+    """
+
+    def __init__(self, name, max_entries=1024, max_bytes=None, ttl=None, backend=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.backend = backend
+
+        self._data = OrderedDict()   # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        """Whether a live entry exists, locally or shared; leaves counters and LRU order alone"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > time.time()):
+                return True
+        if self.backend is not None:
+            try:
+                return self.backend.get(self.name, key)[0] is not None
+            except Exception:
+                return False
+        return False
+
+    @staticmethod
+    def _sizeof(value):
+        try:
+            return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            return 0
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, size, value = entry
+                if expires_at is None or expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._remove(key)
+                self.expirations += 1
+
+        if self.backend is not None:
+            try:
+                value, remaining = self.backend.get(self.name, key)
+            except Exception as e:
+                logger.warning(f"Shared cache read failed for '{self.name}': {e}")
+                value = None
+            if value is not None:
+                with self._lock:
+                    self.shared_hits += 1
+                    self.hits += 1
+                # keep the writer's expiry (e.g. a 120 s traffic answer), not this cache's default
+                self._store(key, value, remaining if remaining is not None else self.ttl)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        self._store(key, value, ttl)
+        if self.backend is not None:
+            try:
+                self.backend.set(self.name, key, value, ttl)
+            except Exception as e:
+                logger.warning(f"Shared cache write failed for '{self.name}': {e}")
+
+    def _store(self, key, value, ttl):
+        size = self._sizeof(value) if self.max_bytes else 0
+        if self.max_bytes and size > self.max_bytes:
+            return
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (expires_at, size, value)
+            self._bytes += size
+            while self._data and (len(self._data) > self.max_entries or
+                                  (self.max_bytes and self._bytes > self.max_bytes)):
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key):
+        """Drop a key (lock held)"""
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+        if self.backend is not None:
+            try:
+                self.backend.delete(self.name, key)
+            except Exception as e:
+                logger.warning(f"Shared cache delete failed for '{self.name}': {e}")
+
+    def clear(self):
+        """Drop every local entry (shared entries expire on their own)"""
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'name': self.name,
+                'entries': len(self._data),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'shared_backend': self.backend is not None
+            }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+_shared_backend = None
+_shared_backend_checked = False
+
+
+def shared_backend():
+    """Backend configured by CACHE_BACKEND_URL, or None for process-local caches"""
+    global _shared_backend, _shared_backend_checked
+    if not _shared_backend_checked:
+        _shared_backend_checked = True
+        if Config.CACHE_BACKEND_URL:
+            try:
+                _shared_backend = RedisBackend(Config.CACHE_BACKEND_URL)
+            except Exception as e:
+                logger.warning(f"Shared cache backend unavailable, using local caches only: {e}")
+    return _shared_backend
+
+
+def get_cache(name, max_entries=1024, max_bytes=None, ttl=None, shared=True):
+    """Named cache shared across the process, created on first use"""
+    with _caches_lock:
+        cache = _caches.get(name)
+        if cache is None:
+            cache = LRUCache(name, max_entries=max_entries, max_bytes=max_bytes, ttl=ttl,
+                             backend=shared_backend() if shared else None)
+            _caches[name] = cache
+        return cache
+
+
+def all_cache_stats():
+    """Counters for every named cache"""
+    with _caches_lock:
+        return [c.stats() for c in _caches.values()]
@@ -0,0 +1,158 @@
+"""
+Circuit breaker utilities
+Stops hammering an upstream endpoint once it is failing or too slow
+"""
+
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open"""
+
+    def __init__(self, name, retry_after=0):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"Circuit '{name}' is open - upstream temporarily unavailable")
+
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker
+
+    closed    -> calls go through, consecutive failures are counted
+    open      -> calls fail fast until recovery_timeout has elapsed
+    half_open -> a single probe call is let through; success closes the
+                 circuit again, failure re-opens it
+
+    A call counts as a failure when it raises an exception accepted by
+    `is_failure` (all exceptions by default) or when it takes longer than
+    `latency_threshold` seconds.
+    """
+
+    def __init__(self, name, failure_threshold=5, recovery_timeout=30,
+                 latency_threshold=None, is_failure=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.latency_threshold = latency_threshold
+        self.is_failure = is_failure or (lambda exc: True)
+
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        """Resolve open -> half_open once the recovery timeout has passed (lock held)"""
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow_request(self):
+        """Return True if a call may be attempted right now"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def accepting(self):
+        """True if a call would be let through now; unlike allow_request it does not claim the probe"""
+        with self._lock:
+            state = self._current_state()
+            return state == CLOSED or (state == HALF_OPEN and not self._probe_in_flight)
+
+    def retry_after(self):
+        """Seconds until the next probe is allowed"""
+        with self._lock:
+            if self._state != OPEN:
+                return 0
+            return max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+
+    def record_success(self):
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info(f"Circuit '{self.name}' closed after successful probe")
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning(f"Circuit '{self.name}' opened after {self._failures} failure(s)")
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def call(self, func, *args, **kwargs):
+        """Run func through the breaker, raising CircuitOpenError when open"""
+        if not self.allow_request():
+            raise CircuitOpenError(self.name, self.retry_after())
+
+        start = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if self.is_failure(e):
+                self.record_failure()
+            else:
+                # Not an upstream health problem (e.g. a 4xx) - upstream is reachable
+                self.record_success()
+            raise
+
+        elapsed = time.monotonic() - start
+        if self.latency_threshold and elapsed > self.latency_threshold:
+            logger.warning(f"Slow call on '{self.name}': {elapsed:.2f}s")
+            self.record_failure()
+        else:
+            self.record_success()
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'name': self.name,
+                'state': self._current_state(),
+                'consecutive_failures': self._failures
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name, **kwargs):
+    """Return the shared breaker for an endpoint, creating it on first use"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, **kwargs)
+            _breakers[name] = breaker
+        return breaker
+
+
+def all_circuit_breakers():
+    """Snapshot of every registered breaker's state"""
+    with _breakers_lock:
+        return [b.stats() for b in _breakers.values()]
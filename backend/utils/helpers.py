@@ -6,6 +6,7 @@ Common helper functions used across the application
 from datetime import datetime, timedelta
 from geopy.distance import distance as geopy_distance
 import json
+import math
 import re
 
 def format_coordinates(lat, lon):
@@ -106,7 +107,7 @@ def calculate_bbox(lat, lon, radius_km):
     """
     # Approximate degrees per km (rough estimate)
     lat_degree = radius_km / 111.0
-    lon_degree = radius_km / (111.0 * abs(geopy_distance.cosine(lat)))
+    lon_degree = radius_km / (111.0 * max(abs(math.cos(math.radians(lat))), 1e-6))
     
     min_lat = lat - lat_degree
     max_lat = lat + lat_degree
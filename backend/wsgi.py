@@ -4,9 +4,18 @@ Used by Gunicorn or other WSGI servers
 """
 
 from app import create_app
+from config import Config
 
 app = create_app()
 
+if Config.USE_ML_PREDICTIONS:
+    # With `gunicorn --preload` this runs once in the master; forked workers
+    # inherit the memory-mapped model pages instead of loading their own copy
+    from services.model_registry import get_model_registry
+    registry = get_model_registry()
+    current = registry.current()
+    # models with no compiled form are served from the model artifact itself
+    registry.preload(current['scaler'], current.get('compiled') or current['model'])
+
 if __name__ == "__main__":
     app.run()
-
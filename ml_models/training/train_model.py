@@ -6,30 +6,185 @@ Trains ML model to predict traffic congestion levels
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor, HistGradientBoostingRegressor
+from sklearn.linear_model import SGDRegressor
+from sklearn.neural_network import MLPRegressor
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
 import joblib
 import os
+import glob
+import time
+import argparse
 from datetime import datetime
 import sys
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'backend'))
+
+from services.compiled_forest import CompiledForest
+from services.feature_pipeline import FeaturePipeline
+from services.model_registry import write_pointer
+
+
+def export_compiled_model(model, path):
+    """Flatten a trained forest into contiguous arrays (see services/compiled_forest.py)"""
+    compiled = CompiledForest.from_sklearn(model)
+    compiled.save(path)
+    return compiled
+
+# Compact column types for generated / streamed data (16 bytes per row)
+DATA_DTYPES = {
+    'hour': np.int8,
+    'day_of_week': np.int8,
+    'lat': np.float32,
+    'lon': np.float32,
+    'is_weekend': np.int8,
+    'is_peak_hour': np.int8,
+    'congestion_level': np.float32
+}
+SYNTHETIC_CHUNK_ROWS = 1_000_000
+
+
+def synthetic_chunk(rng, n):
+    """
+    n synthetic rows as a dict of column arrays
+    
+    Base congestion 0.3, +0.4 at weekday peak hours, +0.2 on weekdays,
+    -0.2 late at night, plus N(0, 0.1) noise, clipped to [0, 1].
+    """
+    hour = rng.integers(0, 24, n, dtype=np.int8)
+    day_of_week = rng.integers(0, 7, n, dtype=np.int8)
+    lat = rng.uniform(28.4, 28.7, n).astype(np.float32)   # Delhi area
+    lon = rng.uniform(77.0, 77.4, n).astype(np.float32)
+    
+    is_weekend = day_of_week >= 5
+    is_peak_hour = (((hour >= 7) & (hour <= 9)) | ((hour >= 17) & (hour <= 19))) & ~is_weekend
+    late_night = (hour >= 22) | (hour <= 5)
+    
+    congestion = rng.normal(0.3, 0.1, n).astype(np.float32)
+    congestion += 0.4 * is_peak_hour + 0.2 * ~is_weekend - 0.2 * late_night
+    np.clip(congestion, 0, 1, out=congestion)
+    
+    return {
+        'hour': hour,
+        'day_of_week': day_of_week,
+        'lat': lat,
+        'lon': lon,
+        'is_weekend': is_weekend.astype(np.int8),
+        'is_peak_hour': is_peak_hour.astype(np.int8),
+        'congestion_level': congestion
+    }
+
+
+def iter_synthetic_chunks(n_samples, seed=42, chunk_size=SYNTHETIC_CHUNK_ROWS):
+    """Yield synthetic_chunk dicts totalling n_samples rows"""
+    rng = np.random.default_rng(seed)
+    for first in range(0, n_samples, chunk_size):
+        yield synthetic_chunk(rng, min(chunk_size, n_samples - first))
+
+
+def write_columnar_chunks(chunks, output_dir, output_format='npz'):
+    """Write each column-dict chunk as part-NNNNN.npz / .parquet under output_dir; returns the paths"""
+    if output_format not in ('npz', 'parquet'):
+        raise ValueError(f"Unknown output format: {output_format}")
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for i, chunk in enumerate(chunks):
+        path = os.path.join(output_dir, f"part-{i:05d}.{output_format}")
+        if output_format == 'npz':
+            np.savez(path, **chunk)
+        else:
+            pd.DataFrame(chunk).to_parquet(path, index=False)   # needs pyarrow or fastparquet
+        paths.append(path)
+    return paths
+
+
+def iter_data_chunks(data_path, chunk_size=SYNTHETIC_CHUNK_ROWS, columns=None):
+    """
+    DataFrames of at most chunk_size rows, read with DATA_DTYPES
+    
+    data_path: a CSV file, or a directory of part-*.npz / part-*.parquet
+    chunks (see write_columnar_chunks). columns limits what is read.
+    """
+    if os.path.isdir(data_path):
+        for path in sorted(glob.glob(os.path.join(data_path, 'part-*'))):
+            if path.endswith('.npz'):
+                with np.load(path) as part:
+                    df = pd.DataFrame({k: part[k] for k in part.files if columns is None or k in columns})
+            else:
+                df = pd.read_parquet(path, columns=columns)
+            for first in range(0, len(df), chunk_size):
+                yield df.iloc[first:first + chunk_size]
+        return
+    
+    usecols = None if columns is None else (lambda c: c in columns)
+    yield from pd.read_csv(data_path, chunksize=chunk_size, usecols=usecols, dtype=DATA_DTYPES)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB; None where `resource` is missing (Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _peak_rss_text():
+    peak = peak_rss_mb()
+    return 'n/a' if peak is None else f"{peak:.0f} MB"
+
+
+class StreamingMetrics:
+    """MSE / MAE / R² accumulated over batches without keeping predictions"""
+    
+    def __init__(self):
+        self.n = 0
+        self.sse = self.sae = self.sum_y = self.sum_y2 = 0.0
+    
+    def update(self, y, predictions):
+        y = np.asarray(y, dtype=np.float64)
+        error = y - predictions
+        self.n += len(y)
+        self.sse += float(error @ error)
+        self.sae += float(np.abs(error).sum())
+        self.sum_y += float(y.sum())
+        self.sum_y2 += float(y @ y)
+    
+    def result(self):
+        if not self.n:
+            return {'mse': float('nan'), 'mae': float('nan'), 'r2': float('nan')}
+        sst = self.sum_y2 - self.sum_y ** 2 / self.n
+        return {'mse': self.sse / self.n, 'mae': self.sae / self.n, 'r2': 1 - self.sse / sst if sst else 0.0}
+
 
 class TrafficModelTrainer:
     """Train and evaluate traffic prediction models"""
     
-    def __init__(self, data_path=None):
+    def __init__(self, data_path=None, generate=True, synthetic_rows=10000, seed=42):
+        """
+        data_path: CSV to train on in memory; without it synthetic_rows
+        synthetic samples are generated from seed, unless generate is False
+        (streaming reads its own data)
+        """
         self.model = None
         self.scaler = StandardScaler()
-        self.feature_columns = ['hour', 'day_of_week', 'lat', 'lon', 'is_weekend', 'is_peak_hour']
+        # same transform the API applies at prediction time (saved next to the model)
+        self.pipeline = FeaturePipeline(target_scale=100)   # congestion_level is 0-1
+        self.feature_columns = self.pipeline.features
         self.target_column = 'congestion_level'
+        self.synthetic_rows = synthetic_rows
+        self.seed = seed
         
         if data_path:
             self.data = self.load_data(data_path)
+        elif generate:
+            self.data = self.generate_synthetic_data(synthetic_rows, seed)
         else:
-            self.data = self.generate_synthetic_data()
+            self.data = None
     
     def load_data(self, data_path):
         """Load training data from CSV"""
@@ -40,64 +195,38 @@ class TrafficModelTrainer:
         except Exception as e:
             print(f"Error loading data: {e}")
             print("Generating synthetic data instead...")
-            return self.generate_synthetic_data()
+            return self.generate_synthetic_data(self.synthetic_rows, self.seed)
     
-    def generate_synthetic_data(self, n_samples=10000):
+    def generate_synthetic_data(self, n_samples=10000, seed=42, chunk_size=SYNTHETIC_CHUNK_ROWS,
+                                output_dir=None, output_format='npz'):
         """
         Generate synthetic traffic data for training
         This simulates realistic traffic patterns
+        
+        Rows are generated a chunk at a time as whole arrays from one seeded
+        Generator (reproducible for a given seed and chunk_size). With
+        output_dir, each chunk is written there as a columnar file
+        ('npz', or 'parquet' with pyarrow installed) and the file paths are
+        returned instead of a DataFrame, so memory stays at one chunk.
         """
         print(f"Generating {n_samples} synthetic training samples...")
+        start = time.perf_counter()
+        chunks = iter_synthetic_chunks(n_samples, seed, chunk_size)
         
-        np.random.seed(42)
-        
-        data = []
-        
-        for _ in range(n_samples):
-            hour = np.random.randint(0, 24)
-            day_of_week = np.random.randint(0, 7)
-            lat = np.random.uniform(28.4, 28.7)  # Delhi area
-            lon = np.random.uniform(77.0, 77.4)
-            
-            is_weekend = 1 if day_of_week >= 5 else 0
-            is_peak_hour = 1 if (7 <= hour <= 9 or 17 <= hour <= 19) and not is_weekend else 0
-            
-            # Generate realistic congestion levels
-            base_congestion = 0.3
-            
-            # Peak hours increase congestion
-            if is_peak_hour:
-                base_congestion += 0.4
-            
-            # Weekdays have more traffic
-            if not is_weekend:
-                base_congestion += 0.2
-            
-            # Late night has less traffic
-            if 22 <= hour or hour <= 5:
-                base_congestion -= 0.2
-            
-            # Add some randomness
-            congestion_level = np.clip(base_congestion + np.random.normal(0, 0.1), 0, 1)
-            
-            data.append({
-                'hour': hour,
-                'day_of_week': day_of_week,
-                'lat': lat,
-                'lon': lon,
-                'is_weekend': is_weekend,
-                'is_peak_hour': is_peak_hour,
-                'congestion_level': congestion_level
-            })
+        if output_dir:
+            paths = write_columnar_chunks(chunks, output_dir, output_format)
+            print(f"Wrote {n_samples} rows in {len(paths)} {output_format} files to {output_dir} "
+                  f"({time.perf_counter() - start:.1f}s)")
+            return paths
         
-        df = pd.DataFrame(data)
-        print("Synthetic data generated successfully")
+        df = pd.concat([pd.DataFrame(chunk) for chunk in chunks], ignore_index=True)
+        print(f"Synthetic data generated successfully ({time.perf_counter() - start:.2f}s)")
         return df
     
     def prepare_features(self):
         """Prepare features and target for training"""
-        X = self.data[self.feature_columns]
-        y = self.data[self.target_column]
+        X = self.pipeline.transform(self.data)
+        y = self.data[self.target_column].to_numpy()
         
         return X, y
     
@@ -105,7 +234,7 @@ class TrafficModelTrainer:
         """
         Train the model
         
-        model_type: 'random_forest' or 'gradient_boosting'
+        model_type: 'random_forest', 'gradient_boosting' or 'hist_gradient_boosting'
         test_size: proportion of data for testing
         """
         print(f"\nTraining {model_type} model...")
@@ -140,13 +269,30 @@ class TrafficModelTrainer:
                 learning_rate=0.1,
                 random_state=42
             )
+        elif model_type == 'hist_gradient_boosting':
+            # features binned once (<= 255 bins), trees grown multithreaded,
+            # stops once the held-out loss has not improved for 10 iterations
+            self.model = HistGradientBoostingRegressor(
+                max_iter=500,
+                learning_rate=0.1,
+                max_leaf_nodes=31,
+                max_depth=6,        # bounds the compiled evaluator's steps per tree
+                early_stopping=True,
+                validation_fraction=0.1,
+                n_iter_no_change=10,
+                random_state=42
+            )
         else:
             raise ValueError(f"Unknown model type: {model_type}")
         
         # Train model
         print("Training in progress...")
+        fit_start = time.perf_counter()
         self.model.fit(X_train_scaled, y_train)
-        print("Training completed!")
+        fit_seconds = time.perf_counter() - fit_start
+        print(f"Training completed in {fit_seconds:.1f}s!")
+        if hasattr(self.model, 'n_iter_'):
+            print(f"Early stopping after {self.model.n_iter_} iterations")
         
         # Evaluate
         print("\nEvaluating model...")
@@ -182,7 +328,83 @@ class TrafficModelTrainer:
             'train_mse': train_mse,
             'test_mse': test_mse,
             'train_r2': train_r2,
-            'test_r2': test_r2
+            'test_r2': test_r2,
+            'fit_seconds': fit_seconds
+        }
+    
+    def train_streaming(self, data_path, model_type='sgd', chunk_size=SYNTHETIC_CHUNK_ROWS,
+                        test_size=0.2, epochs=2, seed=42):
+        """
+        Train out of core, one chunk of data_path in memory at a time
+        
+        model_type: 'sgd' (linear) or 'mlp' (small neural net), both fitted with partial_fit
+        Pass 1 fits the scaler with partial_fit; then each epoch re-reads the
+        data and feeds the training rows of every chunk to the model. A fixed
+        test_size share of each chunk is held out and scored at the end.
+        Reports peak RSS and rows per second.
+        """
+        print(f"\nStreaming {model_type} training from {data_path} (chunks of {chunk_size} rows)...")
+        columns = set(self.feature_columns) | {self.target_column}
+        start = time.perf_counter()
+        
+        def chunks():
+            for i, chunk in enumerate(iter_data_chunks(data_path, chunk_size, columns)):
+                X = self.pipeline.transform(chunk)
+                y = chunk[self.target_column].to_numpy(dtype=np.float64)
+                # same held-out rows every pass
+                test = np.random.default_rng([seed, i]).random(len(chunk)) < test_size
+                yield X, y, test
+        
+        # Pass 1: scaler statistics
+        self.scaler = StandardScaler()
+        rows = 0
+        for X, y, test in chunks():
+            self.scaler.partial_fit(X[~test])
+            rows += len(X)
+        
+        if model_type == 'sgd':
+            self.model = SGDRegressor(alpha=1e-5, learning_rate='invscaling', eta0=0.01, random_state=seed)
+        elif model_type == 'mlp':
+            self.model = MLPRegressor(hidden_layer_sizes=(32, 16), learning_rate_init=1e-3, random_state=seed)
+        else:
+            raise ValueError(f"Unknown streaming model type: {model_type}")
+        
+        rng = np.random.default_rng(seed)
+        for epoch in range(epochs):
+            for X, y, test in chunks():
+                train = np.flatnonzero(~test)
+                rng.shuffle(train)
+                self.model.partial_fit(self.scaler.transform(X[train]), y[train])
+            print(f"Epoch {epoch + 1}/{epochs} done ({time.perf_counter() - start:.1f}s, peak RSS {_peak_rss_text()})")
+        
+        # Held-out evaluation, also streamed
+        train_metrics, test_metrics = StreamingMetrics(), StreamingMetrics()
+        for X, y, test in chunks():
+            predictions = self.model.predict(self.scaler.transform(X))
+            train_metrics.update(y[~test], predictions[~test])
+            test_metrics.update(y[test], predictions[test])
+        
+        elapsed = time.perf_counter() - start
+        train_result, test_result = train_metrics.result(), test_metrics.result()
+        # every row is read epochs + 2 times (scaler, training passes, evaluation)
+        rows_per_second = rows * (epochs + 2) / elapsed
+        
+        print("\n=== MODEL PERFORMANCE ===")
+        print(f"Rows: {rows} ({test_metrics.n} held out)")
+        print(f"Test MSE: {test_result['mse']:.4f}")
+        print(f"Test MAE: {test_result['mae']:.4f}")
+        print(f"Test R²: {test_result['r2']:.4f}")
+        print(f"Time: {elapsed:.1f}s, {rows_per_second:,.0f} rows/s, peak RSS {_peak_rss_text()}")
+        
+        return {
+            'rows': rows,
+            'train_mse': train_result['mse'],
+            'test_mse': test_result['mse'],
+            'train_r2': train_result['r2'],
+            'test_r2': test_result['r2'],
+            'seconds': elapsed,
+            'rows_per_second': rows_per_second,
+            'peak_rss_mb': peak_rss_mb()
         }
     
     def save_model(self, output_dir=None):
@@ -217,21 +439,45 @@ class TrafficModelTrainer:
         joblib.dump(self.model, model_default)
         joblib.dump(self.scaler, scaler_default)
 
+        # Feature spec the API builds its inputs with
+        features_ts = os.path.join(model_dir, f"traffic_rf_core_{timestamp}.features.json")
+        features_default = os.path.join(model_dir, "traffic_rf_core.features.json")
+        self.pipeline.save(features_ts)
+        self.pipeline.save(features_default)
+
+        # Flattened tree arrays for the NumPy evaluator
+        compiled_ts = os.path.join(model_dir, f"traffic_rf_core_{timestamp}.forest.joblib")
+        compiled_default = os.path.join(model_dir, "traffic_rf_core.forest.joblib")
+        try:
+            export_compiled_model(self.model, compiled_ts)
+            export_compiled_model(self.model, compiled_default)
+        except ValueError as e:
+            # not a tree ensemble: the API serves it through sklearn predict
+            print(f"Compiled export skipped: {e}")
+            if os.path.exists(compiled_default):
+                os.remove(compiled_default)   # would pair an older forest with this model
+            compiled_ts = compiled_default = None
+
+        # Publish the timestamped (never overwritten) files; running APIs hot-reload from this pointer
+        write_pointer(model_dir, timestamp, os.path.basename(model_ts), os.path.basename(scaler_ts),
+                      compiled_ts and os.path.basename(compiled_ts), os.path.basename(features_ts))
+
         print("\n=== CORE MODEL SAVED ===")
         print(model_ts)
         print(scaler_ts)
         print(model_default)
         print(scaler_default)
+        if compiled_default:
+            print(compiled_default)
+        print(features_default)
+        print(f"Serving pointer -> version {timestamp}")
 
         return model_ts
 
     
     def predict_sample(self, hour, day_of_week, lat, lon):
         """Make a sample prediction"""
-        is_weekend = 1 if day_of_week >= 5 else 0
-        is_peak_hour = 1 if (7 <= hour <= 9 or 17 <= hour <= 19) and not is_weekend else 0
-        
-        features = np.array([[hour, day_of_week, lat, lon, is_weekend, is_peak_hour]])
+        features = self.pipeline.transform({'hour': [hour], 'day_of_week': [day_of_week], 'lat': [lat], 'lon': [lon]})
         features_scaled = self.scaler.transform(features)
         
         prediction = self.model.predict(features_scaled)[0]
@@ -240,15 +486,42 @@ class TrafficModelTrainer:
 
 def main():
     """Main training pipeline"""
+    parser = argparse.ArgumentParser(description='Train the GeoSense traffic model')
+    parser.add_argument('--synthetic-rows', type=int, default=10000, help='synthetic samples to generate')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--write-synthetic', metavar='DIR',
+                        help='only write the synthetic rows to DIR in chunks, then exit')
+    parser.add_argument('--format', choices=['npz', 'parquet'], default='npz', help='chunk file format')
+    parser.add_argument('--data', help='training data: CSV file or directory of chunk files')
+    parser.add_argument('--stream', action='store_true', help='train out of core from --data in chunks')
+    parser.add_argument('--model-type', default=None,
+                        help='random_forest / gradient_boosting / hist_gradient_boosting, or sgd / mlp with --stream')
+    parser.add_argument('--chunk-size', type=int, default=SYNTHETIC_CHUNK_ROWS)
+    parser.add_argument('--epochs', type=int, default=2)
+    args = parser.parse_args()
+    
+    if args.write_synthetic:
+        paths = write_columnar_chunks(iter_synthetic_chunks(args.synthetic_rows, args.seed),
+                                      args.write_synthetic, args.format)
+        print(f"Wrote {args.synthetic_rows} synthetic rows in {len(paths)} files to {args.write_synthetic}")
+        return
+    
     print("=" * 60)
     print("GeoSense Traffic Prediction Model Training")
     print("=" * 60)
     
-    # Initialize trainer
-    trainer = TrafficModelTrainer()
-    
-    # Train model
-    metrics = trainer.train(model_type='random_forest')
+    if args.stream:
+        if not args.data:
+            parser.error('--stream needs --data')
+        trainer = TrafficModelTrainer(generate=False)
+        metrics = trainer.train_streaming(args.data, args.model_type or 'sgd', args.chunk_size,
+                                          epochs=args.epochs, seed=args.seed)
+    else:
+        # Initialize trainer
+        trainer = TrafficModelTrainer(args.data, synthetic_rows=args.synthetic_rows, seed=args.seed)
+        
+        # Train model
+        metrics = trainer.train(model_type=args.model_type or 'random_forest')
     
     # Save model
     model_path = trainer.save_model()
@@ -0,0 +1,74 @@
+"""
+Training Engine Benchmark
+Trains random_forest, gradient_boosting and hist_gradient_boosting on the
+same synthetic data, saves each like the trainer does and serves it through
+MLPredictor, reporting fit time, artifact size, test R² and single-row
+inference latency (p50 / p99).
+
+Usage: python scripts/benchmarks/bench_engines.py [--rows N] [--calls N]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'backend'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'ml_models', 'training'))
+
+from services.ml_predictor import MLPredictor  # noqa: E402
+from services.model_registry import ModelRegistry  # noqa: E402
+from train_model import TrafficModelTrainer  # noqa: E402
+
+ENGINES = ['random_forest', 'gradient_boosting', 'hist_gradient_boosting']
+
+
+def serving_latency(model_dir, rows, calls):
+    """p50 / p99 microseconds of one-row predictions through the serving path"""
+    predictor = MLPredictor(registry=ModelRegistry(model_dir))
+    predictor.predict_congestion(rows[0])   # load artifacts
+    samples = []
+    for i in range(calls):
+        row = rows[i % len(rows)]
+        start = time.perf_counter()
+        predictor.predict_congestion(row)
+        samples.append(time.perf_counter() - start)
+    return np.percentile(samples, 50) * 1e6, np.percentile(samples, 99) * 1e6, predictor.compiled is not None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare training engines')
+    parser.add_argument('--rows', type=int, default=200000, help='synthetic rows (80% train, 20% test)')
+    parser.add_argument('--calls', type=int, default=2000, help='single-row predictions timed per engine')
+    args = parser.parse_args()
+
+    trainer = TrafficModelTrainer()
+    data = trainer.generate_synthetic_data(args.rows)
+    rows = [{k: [v] for k, v in row.items()} for row in data.head(500).to_dict('records')]
+
+    print(f"\n{'engine':24s} {'fit s':>8s} {'size MB':>8s} {'test R2':>8s} {'p50 us':>8s} {'p99 us':>8s}  serving")
+    for engine in ENGINES:
+        trainer.data = data
+        model_dir = tempfile.mkdtemp()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                metrics = trainer.train(model_type=engine)
+                trainer.save_model(output_dir=model_dir)
+            pointer = ModelRegistry(model_dir).read_pointer()
+            size = sum(os.path.getsize(os.path.join(model_dir, pointer[k])) for k in ('model', 'compiled') if pointer[k])
+            p50, p99, compiled = serving_latency(model_dir, rows, args.calls)
+            print(f"{engine:24s} {metrics['fit_seconds']:8.2f} {size / 1e6:8.2f} {metrics['test_r2']:8.4f} "
+                  f"{p50:8.1f} {p99:8.1f}  {'compiled' if compiled else 'sklearn'}")
+        finally:
+            shutil.rmtree(model_dir)
+
+
+if __name__ == '__main__':
+    main()
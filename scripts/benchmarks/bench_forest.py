@@ -0,0 +1,69 @@
+"""
+Compiled Forest Benchmark
+Times sklearn predict against the flattened NumPy evaluator for single rows
+and batches, on the training script's synthetic data (or a saved model),
+and reports the largest difference between their outputs.
+
+Usage: python scripts/benchmarks/bench_forest.py [--model model.pkl] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'backend'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'ml_models', 'training'))
+
+from services.compiled_forest import CompiledForest  # noqa: E402
+
+
+def time_it(func, X, repeat):
+    """Median microseconds per call"""
+    func(X)   # warm up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(X)
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples)) * 1e6
+
+
+def load_or_train(model_path):
+    if model_path:
+        return joblib.load(model_path)
+    from train_model import TrafficModelTrainer
+    trainer = TrafficModelTrainer()
+    trainer.train(model_type='random_forest')
+    return trainer.model
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the compiled forest evaluator')
+    parser.add_argument('--model', help='joblib-saved forest (default: train one on synthetic data)')
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    model = load_or_train(args.model)
+    compiled = CompiledForest.from_sklearn(model)
+    print(f"\n{type(model).__name__}: {compiled.n_trees} trees, {len(compiled.value)} nodes, depth {compiled.depth}")
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(10000, compiled.n_features))
+    print(f"max |difference| on 10000 rows: {np.abs(compiled.predict(X) - model.predict(X)).max():.2e}")
+
+    for rows in (1, 24, 1000):
+        batch = X[:rows]
+        repeat = max(5, args.repeat // max(1, rows // 100))
+        sklearn_us = time_it(model.predict, batch, repeat)
+        compiled_us = time_it(compiled.predict, batch, repeat)
+        print(f"  {rows:5d} rows  sklearn {sklearn_us:10.1f} us | compiled {compiled_us:10.1f} us "
+              f"({sklearn_us / compiled_us:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
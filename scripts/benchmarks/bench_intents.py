@@ -0,0 +1,114 @@
+"""
+Chat Intent Matcher Benchmark
+Times scan()/classify() against the inline keyword-list scans they
+replaced, over a corpus of chat messages, and reports any messages where
+the two disagree on the intent.
+
+Usage: python scripts/benchmarks/bench_intents.py [corpus.txt] [--repeat N]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'backend')
+sys.path.insert(0, BACKEND_DIR)
+
+from services.chat_intents import scan, classify  # noqa: E402
+from services.gazetteer import normalize_name  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chat_messages.txt')
+
+TRAVEL_INTENTS = ['reach', 'get to', 'safest', 'safe route', 'route', 'reach here', 'reach there',
+                  'how to get', 'need to reach', 'need to get']
+SAFETY_KEYWORDS = ['safe', 'safety', 'rain', 'flood', 'construction', 'blocked', 'ambulance', 'vip']
+
+
+def legacy_scan(message):
+    """The original chat() detection: one substring pass per keyword plus a coordinate search"""
+    text_lower = message.lower()
+    return {
+        'travel': any(tok in text_lower for tok in TRAVEL_INTENTS),
+        'safety': any(tok in text_lower for tok in SAFETY_KEYWORDS),
+        'route': any(k in text_lower for k in ['route', 'distance', 'how to go', 'how do i get', 'directions']),
+        'nearby': 'near me' in text_lower or 'nearby' in text_lower or 'near ' in text_lower,
+        'address': 'address' in text_lower or 'what is at' in text_lower,
+        'coords': re.search(r'(-?\d+\.\d+)\s*,\s*(-?\d+\.\d+)', message),
+        'autocomplete': any(k in text_lower for k in ['autocomplete', 'suggest', 'search ', 'find ']),
+        'traffic': 'traffic' in text_lower
+    }
+
+
+def legacy_classify(message):
+    """Original detection followed by the original .replace()/.split() slot extraction"""
+    found = legacy_scan(message)
+    text_lower = message.lower()
+    if found['route']:
+        kind = 'route'
+        if ' from ' in text_lower and ' to ' in text_lower:
+            message.split(' from ', 1)[1].split(' to ', 1)
+    elif found['nearby']:
+        kind = 'nearby'
+        normalize_name(text_lower.replace('near me', '').replace('nearby', '').replace('near', ''))
+    elif found['address'] or found['coords']:
+        kind = 'reverse_geocode'
+    elif found['autocomplete']:
+        kind = 'autocomplete'
+        message.replace('autocomplete', '').replace('suggest', '').replace('search', '').replace('find', '').strip()
+    elif found['traffic']:
+        kind = 'traffic'
+    else:
+        kind = 'help'
+    return kind, found['travel'], found['safety']
+
+
+def current_classify(message):
+    matches = scan(message)
+    return classify(message, matches)['type'], 'travel' in matches, 'safety' in matches
+
+
+def time_it(func, messages, repeat):
+    """Mean microseconds per message"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in messages:
+            func(message)
+    elapsed = time.perf_counter() - start
+    return elapsed / (repeat * len(messages)) * 1e6
+
+
+def report(label, messages, repeat):
+    print(f"{label}: {len(messages)} messages, mean {sum(map(len, messages)) / len(messages):.0f} chars")
+    for name, legacy, current in (('detect', legacy_scan, scan),
+                                  ('detect + extract', legacy_classify, current_classify)):
+        legacy_us = time_it(legacy, messages, repeat)
+        current_us = time_it(current, messages, repeat)
+        print(f"  {name:17s} keyword lists {legacy_us:7.2f} us | scan {current_us:7.2f} us "
+              f"({legacy_us / current_us:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the chat intent matcher')
+    parser.add_argument('corpus', nargs='?', default=DEFAULT_CORPUS)
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding='utf-8') as f:
+        messages = [line.rstrip('\n') for line in f if line.strip()]
+
+    disagreements = [(m, legacy_classify(m), current_classify(m))
+                     for m in messages if legacy_classify(m) != current_classify(m)]
+
+    report('Corpus', messages, args.repeat)
+    # long multi-sentence messages
+    long_messages = [' '.join(messages[i:i + 8]) for i in range(0, len(messages), 8)]
+    report('Long messages', long_messages, max(1, args.repeat // 8))
+    print(f"Intent disagreements: {len(disagreements)}")
+    for message, old, new in disagreements:
+        print(f"  {message!r}: legacy={old} scan={new}")
+
+
+if __name__ == '__main__':
+    main()
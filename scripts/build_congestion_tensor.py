@@ -0,0 +1,42 @@
+"""
+Congestion Tensor Build Script
+Evaluates the serving model over every service-area grid cell x 168 hours of
+the week and writes the memory-mapped tensor the API slices for busiest-hours.
+Run nightly (e.g. cron `0 3 * * *`) and after publishing a new model.
+"""
+
+import sys
+import os
+import argparse
+import logging
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from config import Config
+from services.ml_predictor import MLPredictor
+from services.model_registry import get_model_registry
+from services.congestion_tensor import build_congestion_tensor
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the hour-of-week congestion tensor')
+    parser.add_argument('--output', default=Config.CONGESTION_TENSOR_PATH,
+                        help='tensor .npy path (default: CONGESTION_TENSOR_PATH, where the API reads it)')
+    parser.add_argument('--cell-size', type=float, default=Config.AREA_GRID_CELL_DEG)
+    args = parser.parse_args()
+
+    predictor = MLPredictor(registry=get_model_registry())
+    predictor.load_from_registry()
+    if not predictor.is_trained:
+        logger.error(f"No trained model in {Config.MODEL_DIR}; tensor not built")
+        return 1
+
+    index = build_congestion_tensor(predictor, args.output, cell_size_deg=args.cell_size)
+    logger.info(f"Built {index['cells']} cells for model version {index['model_version']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())